@@ -0,0 +1 @@
+"""Benchmarks for pseudo TV hot paths. Run modules with ``python -m benchmarks.<name>``."""
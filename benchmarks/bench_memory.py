@@ -0,0 +1,131 @@
+"""Per-item memory of the library representations.
+
+Usage::
+
+    python -m benchmarks.bench_memory --items 1000000
+
+Builds the same synthetic library (series of seasons in per-season folders,
+with genre and show cut out of each path the way the filename parser does)
+three ways and reports the bytes retained per item, measured with
+``tracemalloc``:
+
+- ``dataclass``: the previous ``MediaItem`` layout, a plain dataclass holding
+  a ``Path``, a ``timedelta`` and its own genre/show strings.
+- ``MediaItem``: the current slotted item with interned strings.
+- ``catalog``: :class:`~pseudo_tv.catalog.CatalogItem` views over a
+  published catalog (the mapped file is reported separately, since it is
+  shared by every attached process).
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from functools import partial
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from pseudo_tv.catalog import CatalogGeneration, publish_catalog
+from pseudo_tv.models import MediaItem
+
+from .synthetic import GENRES
+
+
+@dataclass
+class DataclassItem:
+    """The pre-compaction ``MediaItem`` layout, kept here as the reference."""
+
+    path: Path
+    title: str
+    duration: timedelta
+    genre: Optional[str] = None
+    show: Optional[str] = None
+    season: Optional[int] = None
+    episode: Optional[int] = None
+    year: Optional[int] = None
+
+
+def raw_items(count: int, episodes_per_season: int = 12, seasons_per_show: int = 5) -> Iterator[Tuple]:
+    """Fresh field values per item, as a scan produces them."""
+    per_show = episodes_per_season * seasons_per_show
+    for i in range(count):
+        show_id, rest = divmod(i, per_show)
+        season, episode = divmod(rest, episodes_per_season)
+        genre = GENRES[show_id % len(GENRES)]
+        path = (
+            f"/media/tv/Show {show_id:05d}/Season {season + 1:02d}/"
+            f"Show.{show_id:05d}.S{season + 1:02d}E{episode + 1:02d}.Episode {episode + 1}[{genre}].mkv"
+        )
+        parts = path.split("/")
+        yield (
+            path,
+            f"Episode {episode + 1}",
+            timedelta(minutes=22 + i % 40),
+            path[path.rindex("[") + 1 : path.rindex("]")],
+            parts[3],
+            season + 1,
+            episode + 1,
+            2000 + show_id % 25,
+        )
+
+
+def retained_bytes(build: Callable[[], List]) -> Tuple[int, List]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return after - before, result
+
+
+def cache_labels(items: List[MediaItem]) -> None:
+    """Compute every item's label; each is cached on its item, so nothing else is kept."""
+    for item in items:
+        _ = item.label
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+    count = args.items
+
+    legacy_bytes, legacy = retained_bytes(
+        lambda: [
+            DataclassItem(Path(path), title, duration, genre, show, season, episode, year)
+            for path, title, duration, genre, show, season, episode, year in raw_items(count)
+        ]
+    )
+    del legacy
+    compact_bytes, compact = retained_bytes(lambda: [MediaItem(*fields) for fields in raw_items(count)])
+    # Labels are cached on first use; measure what that adds as well.
+    label_bytes, _ = retained_bytes(partial(cache_labels, compact))
+
+    with tempfile.TemporaryDirectory() as directory:
+        catalog_path = Path(directory) / "library.catalog"
+        publish_catalog(catalog_path, compact)
+        file_bytes = os.path.getsize(catalog_path)
+        del compact
+        catalog_bytes, views = retained_bytes(lambda: list(CatalogGeneration(catalog_path)))
+        del views
+
+    print(f"{count:,} items, bytes per item")
+    print(f"  {'dataclass':<22} {legacy_bytes / count:8.1f}")
+    print(f"  {'MediaItem':<22} {compact_bytes / count:8.1f}  ({compact_bytes / legacy_bytes:.0%} of dataclass)")
+    print(f"  {'  + cached labels':<22} {label_bytes / count:8.1f}")
+    print(f"  {'catalog views':<22} {catalog_bytes / count:8.1f}  (+ {file_bytes / count:.1f} shared in the mapped file)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
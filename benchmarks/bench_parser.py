@@ -0,0 +1,97 @@
+"""Filename parser throughput.
+
+Usage::
+
+    python -m benchmarks.bench_parser --count 1000000
+
+``parse_many`` is timed on the names sorted, as a scan hands it one
+directory listing at a time, so episodes of a season arrive together.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from typing import Callable, List
+
+from pseudo_tv.parsing import FilenameParser
+
+
+def legacy_parse(name: str) -> dict:
+    """The scanner's original two-``re.match`` parser, kept for comparison."""
+    base = name.rsplit(".", 1)[0]
+    tv_match = re.match(
+        r"(?P<show>.+?)\s*[.-]\s*S(?P<season>\d{1,2})E(?P<episode>\d{1,2})\s*[.-]?\s*(?P<title>[^\[]+)?(?:\[(?P<genre>[^\]]+)\])?",
+        base,
+        re.IGNORECASE,
+    )
+    if tv_match:
+        data = tv_match.groupdict()
+        season = int(data["season"])
+        episode = int(data["episode"])
+        return {
+            "show": data.get("show"),
+            "season": season,
+            "episode": episode,
+            "title": (data.get("title") or "").replace(".", " ").strip() or f"Episode {episode}",
+            "genre": (data.get("genre") or "").strip() or None,
+        }
+    movie_match = re.match(r"(?P<title>.+?)\s*(?P<year>\d{4})?(?:\[(?P<genre>[^\]]+)\])?", base)
+    if movie_match:
+        data = movie_match.groupdict()
+        year = int(data["year"]) if data.get("year") else None
+        return {
+            "title": (data.get("title") or "").replace(".", " ").strip(),
+            "year": year,
+            "genre": (data.get("genre") or "").strip() or None,
+        }
+    return {"title": base}
+
+
+def synthetic_names(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    genres = ["comedy", "drama", "animation", "documentary", "news"]
+    shows = [f"Show.Number.{n}" for n in range(max(1, count // 200))]
+    names = []
+    for index in range(count):
+        genre = rng.choice(genres)
+        roll = rng.random()
+        if roll < 0.7:
+            show = rng.choice(shows)
+            names.append(f"{show}.S{rng.randint(1, 20):02d}E{rng.randint(1, 30):02d}.Episode.Title[{genre}].mkv")
+        elif roll < 0.8:
+            names.append(f"Daily.Show.20{rng.randint(10, 24)}.0{rng.randint(1, 9)}.1{rng.randint(0, 9)}.Guest[{genre}].mp4")
+        else:
+            names.append(f"Some.Movie.Title.{index}.{rng.randint(1950, 2024)}[{genre}].mp4")
+    return names
+
+
+def measure(label: str, run: Callable[[], object], count: int) -> None:
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed:8.3f}s  {count / elapsed:>12,.0f} names/s")
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    names = synthetic_names(args.count, args.seed)
+    listing = sorted(names)
+    builtin = FilenameParser()
+    extended = FilenameParser(["multi_episode", "daily", "absolute"])
+    print(f"{args.count:,} filenames")
+    measure("legacy re.match", lambda: [legacy_parse(n) for n in names], args.count)
+    measure("parse (builtin rules)", lambda: [builtin.parse(n) for n in listing], args.count)
+    measure("parse_many (builtin rules)", lambda: builtin.parse_many(listing), args.count)
+    measure("parse (+3 presets)", lambda: [extended.parse(n) for n in listing], args.count)
+    measure("parse_many (+3 presets)", lambda: extended.parse_many(listing), args.count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Read latency while schedules are rebuilt and published from another thread.
+
+Usage::
+
+    python -m benchmarks.bench_snapshots --items 20000 --readers 8 --seconds 10
+    python -m benchmarks.bench_snapshots --items 20000 --readers 8 --seconds 10 --locked
+
+Reader threads query one :class:`~pseudo_tv.player.LivePlayer` in a loop
+(now playing, upcoming and a 4-hour guide at random moments, taking
+``current`` afresh for every query). The run has two phases of
+``--seconds`` each: first no rebuilds, then a writer thread that rebuilds the
+24-hour schedule back to back, each time from a slightly different subset of
+the library, and publishes it. Latency percentiles are reported per phase.
+
+Every answer is checked against the player it came from: each entry must be
+on that build's copy of its channel, its item must be in that channel's pool
+and it must fall inside the window asked for. Any failure counts as a torn
+read and makes the exit status 1.
+
+``--locked`` runs the same load the way a host without snapshots would: one
+lock held by the writer for the whole rebuild and by readers for each query.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pseudo_tv.matching import ItemIndex
+from pseudo_tv.models import MediaItem, ScheduleEntry
+from pseudo_tv.player import LivePlayer, Player
+from pseudo_tv.scheduler import Scheduler
+
+from .bench_memory import raw_items
+from .synthetic import make_channels
+
+START = datetime(2026, 1, 1)
+DAY = timedelta(hours=24)
+GUIDE_WINDOW = timedelta(hours=4)
+UPCOMING_WINDOW = timedelta(hours=2)
+
+
+def playable_channels(library: List[MediaItem], count: int, seed: int) -> List:
+    index = ItemIndex(library)
+    channels = []
+    for channel in make_channels(count, len(library), seed=seed):
+        try:
+            channel.selected(library, index=index)
+        except ValueError:  # e.g. a show channel with no episodes in this library
+            continue
+        channels.append(channel)
+    return channels
+
+
+def library_variant(library: List[MediaItem], build: int) -> List[MediaItem]:
+    """The library minus every 7th item, offset by ``build``, so consecutive builds differ."""
+    skip = build % 7
+    return [item for position, item in enumerate(library) if position % 7 != skip]
+
+
+def _pools(player: Player) -> Dict[str, Tuple[object, frozenset]]:
+    pools = getattr(player, "_bench_pools", None)
+    if pools is None:
+        pools = player._bench_pools = {
+            name: (timeline.channel, frozenset(item.path_string for item in timeline.channel.items))
+            for name, timeline in player.schedule.timelines.items()
+        }
+    return pools
+
+
+def torn(player: Player, entries: List[ScheduleEntry], first: datetime, last: datetime) -> bool:
+    """Whether any entry does not belong to ``player``'s build or lies outside ``[first, last]``."""
+    pools = _pools(player)
+    for entry in entries:
+        channel, paths = pools.get(entry.channel.name, (None, ()))
+        if entry.channel is not channel or entry.item.path_string not in paths:
+            return True
+        if entry.end < first or entry.start > last:
+            return True
+    return False
+
+
+def query(player: Player, kind: int, moment: datetime) -> Tuple[List[ScheduleEntry], datetime, datetime]:
+    if kind == 0:
+        return list(player.now_playing(moment).values()), moment, moment
+    if kind == 1:
+        listings = player.upcoming(moment, horizon=UPCOMING_WINDOW)
+        return [e for entries in listings.values() for e in entries], moment, moment + UPCOMING_WINDOW
+    listings = player.guide(moment, moment + GUIDE_WINDOW)
+    return [e for entries in listings.values() for e in entries], moment, moment + GUIDE_WINDOW
+
+
+class Reader(threading.Thread):
+    def __init__(self, live: LivePlayer, lock, phase: Callable[[], int], stop: threading.Event, seed: int):
+        super().__init__(daemon=True)
+        self.live = live
+        self.lock = lock
+        self.phase = phase
+        self.stop = stop
+        self.rng = random.Random(seed)
+        self.latencies: Tuple[List[int], List[int]] = ([], [])
+        self.torn = 0
+
+    def run(self) -> None:
+        rng = self.rng
+        kind = 0
+        while not self.stop.is_set():
+            moment = START + timedelta(seconds=rng.randrange(int((DAY - GUIDE_WINDOW).total_seconds())))
+            phase = self.phase()
+            started = time.perf_counter_ns()
+            with self.lock:
+                player = self.live.current
+                entries, first, last = query(player, kind, moment)
+            elapsed = time.perf_counter_ns() - started
+            self.latencies[phase].append(elapsed)
+            if torn(player, entries, first, last):
+                self.torn += 1
+            kind = (kind + 1) % 3
+
+
+def percentile(ordered: List[int], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] / 1000 if ordered else 0.0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=20_000)
+    parser.add_argument("--channels", type=int, default=50)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10, help="Length of each phase")
+    parser.add_argument("--locked", action="store_true", help="Guard reads and rebuilds with one lock instead")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    library = [MediaItem(*fields) for fields in raw_items(args.items)]
+    channels = playable_channels(library, args.channels, args.seed)
+    scheduler = Scheduler(channels, seed=args.seed)
+    state_path = Path(tempfile.gettempdir()) / "pseudo_tv_bench_snapshots_state.json"
+    live = LivePlayer(Player(scheduler.build_schedule(library, START, DAY), state_path=state_path))
+    lock = threading.Lock() if args.locked else nullcontext()
+
+    phase = [0]
+    stop = threading.Event()
+    readers = [Reader(live, lock, lambda: phase[0], stop, seed=args.seed + i) for i in range(args.readers)]
+    rebuilds: List[float] = []
+
+    def rebuild_loop() -> None:
+        build = 1
+        while not stop.is_set():
+            started = time.perf_counter()
+            with lock:
+                live.publish(scheduler.build_schedule(library_variant(library, build), START, DAY))
+            rebuilds.append(time.perf_counter() - started)
+            build += 1
+
+    print(
+        f"{args.items:,} items, {len(channels)} channels, {args.readers} readers, "
+        f"{'one lock' if args.locked else 'snapshots'}, switch interval {sys.getswitchinterval() * 1000:.0f} ms"
+    )
+    for reader in readers:
+        reader.start()
+    time.sleep(args.seconds)
+    phase[0] = 1
+    writer = threading.Thread(target=rebuild_loop, daemon=True)
+    writer.start()
+    time.sleep(args.seconds)
+    stop.set()
+    writer.join()
+    for reader in readers:
+        reader.join()
+
+    print(f"  {'phase':<12} {'queries':>9} {'p50 us':>9} {'p99 us':>9} {'p99.9 us':>9} {'max us':>10}")
+    for number, name in enumerate(("idle", "rebuilding")):
+        ordered = sorted(latency for reader in readers for latency in reader.latencies[number])
+        print(
+            f"  {name:<12} {len(ordered):9,} {percentile(ordered, 0.5):9.1f} {percentile(ordered, 0.99):9.1f} "
+            f"{percentile(ordered, 0.999):9.1f} {percentile(ordered, 1.0):10.1f}"
+        )
+    if rebuilds:
+        print(f"  {len(rebuilds)} rebuilds published, {sum(rebuilds) / len(rebuilds) * 1000:.0f} ms each on average")
+    torn_reads = sum(reader.torn for reader in readers)
+    print(f"  torn reads: {torn_reads}")
+    return 1 if torn_reads else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
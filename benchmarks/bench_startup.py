@@ -0,0 +1,53 @@
+"""Cold-start wall time of CLI commands, each in a fresh interpreter.
+
+Usage::
+
+    python -m benchmarks.bench_startup --config pseudo_tv.example.yaml --runs 21
+
+Reports the median per command next to a bare ``python -c pass`` and exits
+with status 1 if any command is slower than ``--target-ms``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+
+def median_ms(command: List[str], runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(command, capture_output=True)
+        timings.append(time.perf_counter() - started)
+        if result.returncode != 0:
+            raise SystemExit(f"{' '.join(command)} failed:\n{result.stderr.decode()}")
+    return statistics.median(timings) * 1000
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default="pseudo_tv.example.yaml")
+    parser.add_argument("--commands", default="channels,now", help="Comma-separated subcommands to time")
+    parser.add_argument("--runs", type=int, default=21)
+    parser.add_argument("--target-ms", type=float, default=150.0, help="Cold-start budget per command")
+    args = parser.parse_args(argv)
+
+    interpreter = median_ms([sys.executable, "-c", "pass"], args.runs)
+    print(f"{'python -c pass':<16} {interpreter:8.1f} ms")
+    over = []
+    for command in filter(None, args.commands.split(",")):
+        elapsed = median_ms([sys.executable, "-m", "pseudo_tv.app", args.config, command], args.runs)
+        flag = "  OVER TARGET" if elapsed > args.target_ms else ""
+        print(f"{command:<16} {elapsed:8.1f} ms{flag}")
+        if flag:
+            over.append(command)
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""End-to-end timings for scan, select, build and query on synthetic libraries.
+
+Usage::
+
+    python -m benchmarks.bench_suite --sizes 1000,10000,100000 --output results.json
+    python -m benchmarks.bench_suite --sizes 1000,10000 --save-baseline
+    python -m benchmarks.bench_suite --sizes 1000,10000 --baseline benchmarks/baseline.json
+
+Each measurement is the best of ``--repeat`` runs, stored in seconds under a
+``"<stage>@<items>"`` key. With a baseline, stages slower than
+``1 + --tolerance`` times the stored value are reported and the exit status
+is 1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from pseudo_tv.library import LibraryScanner
+from pseudo_tv.matching import ItemIndex
+from pseudo_tv.player import Player
+from pseudo_tv.scheduler import Scheduler
+
+from .synthetic import make_channels, make_library
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+
+def best_of(repeat: int, run: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run_size(size: int, args: argparse.Namespace) -> Dict[str, float]:
+    results: Dict[str, float] = {}
+
+    def record(stage: str, seconds: float) -> None:
+        results[f"{stage}@{size}"] = seconds
+        print(f"  {stage:<14} {seconds:9.4f}s")
+
+    print(f"{size:,} items")
+    with tempfile.TemporaryDirectory(prefix="pseudo_tv_bench_") as tmp:
+        root = Path(tmp)
+        started = time.perf_counter()
+        make_library(root, size, meta_ratio=args.meta_ratio, depth=args.depth, seed=args.seed)
+        print(f"  (generated in {time.perf_counter() - started:.1f}s)")
+        scanner = LibraryScanner([root], workers=args.scan_workers)
+        library: List = []
+
+        def scan() -> None:
+            library[:] = scanner.scan()
+
+        record("scan", best_of(args.repeat, scan))
+
+    channels = make_channels(args.channels, size, seed=args.seed)
+
+    def select_all() -> None:
+        index = ItemIndex(library)
+        for channel in channels:
+            try:
+                channel.select_items(library, index=index)
+            except ValueError:  # e.g. a show channel with no episodes in a small library
+                channel.items = []
+
+    record("select", best_of(args.repeat, select_all))
+    playable = [channel for channel in channels if channel.items]
+    scheduler = Scheduler(playable, seed=args.seed)
+    start = datetime(2026, 1, 1)
+    built: List = []
+
+    def build() -> None:
+        built[:] = [scheduler.build_schedule(library, start, timedelta(hours=24))]
+
+    record("build", best_of(args.repeat, build))
+    schedule = built[0]
+    player = Player(schedule, state_path=Path(tempfile.gettempdir()) / "pseudo_tv_bench_state.json")
+    rng = random.Random(args.seed)
+    moments = [start + timedelta(seconds=rng.randrange(24 * 3600)) for _ in range(args.queries)]
+    player.now_playing(start)  # build the per-channel index outside the timed region
+    record("now_playing", best_of(args.repeat, lambda: [player.now_playing(m) for m in moments]))
+    record("upcoming", best_of(args.repeat, lambda: [player.upcoming(m) for m in moments]))
+    record(
+        "guide",
+        best_of(args.repeat, lambda: [Scheduler.guide(schedule, m, m + timedelta(hours=4)) for m in moments]),
+    )
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    regressions = []
+    print(f"\n{'stage':<22} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        ratio = current / previous if previous else float("inf")
+        flag = "  REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{key:<22} {previous:10.4f} {current:10.4f} {ratio:7.2f}{flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000", help="Comma-separated library sizes, e.g. 1000,100000,1000000")
+    parser.add_argument("--channels", type=int, default=50)
+    parser.add_argument("--meta-ratio", type=float, default=0.1, help="Share of files with a .meta.json companion")
+    parser.add_argument("--depth", type=int, default=2, help="Directory levels below the media root")
+    parser.add_argument("--scan-workers", type=int, default=1)
+    parser.add_argument("--queries", type=int, default=1000, help="Lookups per query stage")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write results JSON here")
+    parser.add_argument(
+        "--baseline", type=Path, default=None, help=f"Compare against this file (default {DEFAULT_BASELINE.name} if present)"
+    )
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging, as a fraction")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, float] = {}
+    for size in (int(part) for part in args.sizes.split(",") if part):
+        results.update(run_size(size, args))
+
+    document = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            key: getattr(args, key)
+            for key in ("sizes", "channels", "meta_ratio", "depth", "scan_workers", "queries", "repeat", "seed")
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(document, indent=2))
+    if args.save_baseline:
+        (args.baseline or DEFAULT_BASELINE).write_text(json.dumps(document, indent=2))
+        print(f"Saved baseline to {args.baseline or DEFAULT_BASELINE}")
+        return 0
+
+    baseline_path = args.baseline or DEFAULT_BASELINE
+    if not baseline_path.exists():
+        return 0
+    baseline = json.loads(baseline_path.read_text())
+    if baseline.get("settings", {}).get("channels") != args.channels:
+        print("Baseline was recorded with a different channel count; ratios may not be comparable.")
+    regressions = compare(results, baseline.get("results", {}), args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} stage(s) slower than baseline by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
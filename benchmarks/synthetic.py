@@ -0,0 +1,67 @@
+"""Synthetic media libraries and channel configs for benchmarks."""
+
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+from typing import List
+
+from pseudo_tv.config import Config
+from pseudo_tv.models import Channel
+
+GENRES = ["comedy", "drama", "animation", "documentary", "news", "family", "horror", "scifi"]
+
+
+def make_library(root: Path, count: int, meta_ratio: float = 0.1, depth: int = 2, seed: int = 0) -> int:
+    """Create ``count`` zero-byte media files under ``root`` and return how many companions were written.
+
+    Episodes are filed as ``Show/Season NN/...`` padded out to ``depth``
+    directory levels; movies go under ``Movies/``. A ``meta_ratio`` share of
+    files get a ``.meta.json`` companion overriding runtime and genre.
+    """
+    rng = random.Random(seed)
+    shows = max(1, count // 100)
+    companions = 0
+    created = set()
+    for index in range(count):
+        genre = rng.choice(GENRES)
+        if rng.random() < 0.8:
+            show = f"Show.{index % shows:05d}"
+            season = rng.randint(1, 10)
+            parts = [show, f"Season {season:02d}"][:depth] if depth else []
+            name = f"{show}.S{season:02d}E{index // shows % 100:02d}.Episode.{index}[{genre}].mkv"
+        else:
+            parts = ["Movies", f"{index % 26:02d}"][:depth] if depth else []
+            name = f"Movie.Title.{index}.{rng.randint(1950, 2024)}[{genre}].mp4"
+        parts += [f"extra{level}" for level in range(len(parts), depth)]
+        directory = root.joinpath(*parts)
+        if directory not in created:
+            directory.mkdir(parents=True, exist_ok=True)
+            created.add(directory)
+        path = directory / name
+        open(path, "wb").close()
+        if rng.random() < meta_ratio:
+            companion = {"duration_minutes": rng.choice([22, 30, 44, 60, 90, 120]), "genre": rng.choice(GENRES)}
+            path.with_name(name + ".meta.json").write_text(json.dumps(companion))
+            companions += 1
+    return companions
+
+
+def make_channels(count: int, library_size: int, seed: int = 0) -> List[Channel]:
+    """Channels by genre, by show and by runtime, half of them repeating."""
+    rng = random.Random(seed)
+    shows = max(1, library_size // 100)
+    channels = []
+    for index in range(count):
+        kind = index % 3
+        data = {"name": f"Channel {index:04d}", "allow_repeats": index % 2 == 0, "shuffle": index % 4 != 1}
+        if kind == 0:
+            data["include_genres"] = rng.sample(GENRES, 2)
+        elif kind == 1:
+            data["include_shows"] = [f"Show.{rng.randrange(shows):05d}" for _ in range(3)]
+        else:
+            data["include_genres"] = [rng.choice(GENRES)]
+            data["minimum_runtime_minutes"] = 40
+        channels.append(Config._parse_channel(data))
+    return channels
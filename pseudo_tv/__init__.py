@@ -1,8 +1,15 @@
 """Pseudo TV standalone Python app.
 
 This package provides tools to build pseudo-live channels from a media library.
+Submodules are imported on first attribute access, so ``import pseudo_tv``
+stays cheap for commands that only need part of it.
 """
 
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING
+
 __all__ = [
     "MediaItem",
     "ChannelRule",
@@ -12,10 +19,37 @@ __all__ = [
     "Config",
     "Scheduler",
     "Player",
+    "LivePlayer",
 ]
 
-from .models import Channel, ChannelRule, MediaItem, ScheduleEntry
-from .library import LibraryScanner
-from .config import Config
-from .scheduler import Scheduler
-from .player import Player
+_EXPORTS = {
+    "MediaItem": ".models",
+    "ChannelRule": ".models",
+    "Channel": ".models",
+    "ScheduleEntry": ".models",
+    "LibraryScanner": ".library",
+    "Config": ".config",
+    "Scheduler": ".scheduler",
+    "Player": ".player",
+    "LivePlayer": ".player",
+}
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .config import Config
+    from .library import LibraryScanner
+    from .models import Channel, ChannelRule, MediaItem, ScheduleEntry
+    from .player import LivePlayer, Player
+    from .scheduler import Scheduler
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,19 +1,36 @@
 from __future__ import annotations
 
 import argparse
+import json
+import sys
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List
+from typing import List, Sequence, Tuple
 
 from .config import Config
-from .library import LibraryScanner
+from .instrumentation import metrics, span
+from .library import MANIFEST_NAMES, LibraryScanner
+from .models import MediaItem
+from .parsing import FilenameParser
 from .player import Player
 from .scheduler import Scheduler
+from .timeline import VIRTUAL_ANCHOR, Schedule
+
+# Modules only some commands need (NumPy, asyncio, sqlite3, gzip, inotify,
+# cProfile) are imported inside the functions that use them, so `channels`
+# and `now` do not pay for them at startup.
 
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Standalone pseudo TV application")
     parser.add_argument("config", type=Path, help="Path to YAML/JSON configuration")
+    parser.add_argument("--profile", action="store_true", help="Print a phase timing breakdown to stderr")
+    parser.add_argument(
+        "--profile-output",
+        type=Path,
+        default=None,
+        help="With --profile, write metrics JSON (*.json) or a cProfile dump (any other name) instead",
+    )
     sub = parser.add_subparsers(dest="command", required=True)
 
     sub.add_parser("scan", help="Scan media library")
@@ -27,6 +44,26 @@ def build_parser() -> argparse.ArgumentParser:
     upcoming = sub.add_parser("upcoming", help="Show upcoming schedule")
     upcoming.add_argument("--hours", type=float, default=2, help="Lookahead window in hours")
 
+    serve = sub.add_parser("serve", help="Serve guide queries over HTTP/JSON")
+    serve.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    serve.add_argument("--port", type=int, default=8080, help="Port to listen on (0 picks a free one)")
+    serve.add_argument(
+        "--rebuild-margin-minutes",
+        type=float,
+        default=120,
+        help="Rebuild the schedule in the background this long before it runs out",
+    )
+
+    export = sub.add_parser("export", help="Write the schedule as XMLTV or M3U")
+    export.add_argument("--format", choices=("xmltv", "m3u"), default="xmltv", help="Output format")
+    export.add_argument("--days", type=float, default=1, help="Days of schedule to export")
+    export.add_argument("--output", type=Path, default=None, help="Output file (default stdout; .gz is compressed)")
+    export.add_argument("--gzip", action="store_true", help="Gzip the output regardless of file name")
+
+    watch = sub.add_parser("watch", help="Follow library changes and patch the schedule as they happen")
+    watch.add_argument("--interval", type=float, default=2.0, help="Polling interval in seconds")
+    watch.add_argument("--polling", action="store_true", help="Poll even where inotify is available")
+
     init_cfg = sub.add_parser("init-config", help="Write a starter config file")
     init_cfg.add_argument("--output", type=Path, default=Path("pseudo_tv.example.yaml"))
 
@@ -35,16 +72,90 @@ def build_parser() -> argparse.ArgumentParser:
 
 def load_app(config_path: Path):
     config = Config.load(config_path)
-    scanner = LibraryScanner(config.media_roots)
-    library = scanner.scan()
-    scheduler = Scheduler(config.channels)
-    schedule = scheduler.build_schedule(
-        library=library,
-        start=datetime.now().replace(minute=0, second=0, microsecond=0),
-        duration=timedelta(hours=24),
-    )
+    scanner, library = load_library(config)
+    scheduler = make_scheduler(config)
+    with span("schedule.build"):
+        schedule = build_schedule(config, scheduler, library)
     player = Player(schedule, state_path=config.state_path)
-    return config, scanner, scheduler, schedule, player
+    return config, scanner, library, scheduler, schedule, player
+
+
+def load_library(config: Config, publish: bool = False) -> Tuple[LibraryScanner, Sequence[MediaItem]]:
+    """The scanner and the library; with ``library_catalog`` set, the published catalog.
+
+    The catalog is (re)published from a fresh scan when ``publish`` is set or
+    when none exists yet; otherwise it is attached without scanning.
+    """
+    scanner = make_scanner(config)
+    if config.library_catalog is None:
+        return scanner, scanner.scan()
+    from .catalog import SharedCatalog
+
+    catalog = SharedCatalog(config.library_catalog)
+    if publish or not catalog.exists():
+        return scanner, catalog.publish(scanner.scan())
+    try:
+        return scanner, catalog.current()
+    except (OSError, ValueError):
+        return scanner, catalog.publish(scanner.scan())  # unreadable or from an older version
+
+
+def make_scanner(config: Config) -> LibraryScanner:
+    index = None
+    if config.library_index_path:
+        from .index import LibraryIndex
+
+        index = LibraryIndex(config.library_index_path)
+    return LibraryScanner(
+        config.media_roots,
+        index=index,
+        workers=config.scan_workers,
+        ignore_dirs=config.ignore_dirs,
+        parser=FilenameParser(config.filename_patterns),
+        probe_durations=config.probe_durations,
+        probe_workers=config.probe_workers,
+        manifest_names=config.metadata_manifests if config.metadata_manifests is not None else MANIFEST_NAMES,
+        catalog=config.metadata_catalog,
+        dedupe=config.dedupe,
+        dedupe_workers=config.dedupe_workers,
+    )
+
+
+def streams_library(config: Config) -> bool:
+    """Whether one-shot commands can scan and schedule in a single streaming pass."""
+    return (
+        config.streaming_scan
+        and not (config.virtual_schedule or config.schedule_cache_path or config.columnar_schedule)
+        and config.library_catalog is None
+        and not config.dedupe
+    )
+
+
+def make_scheduler(config: Config) -> Scheduler:
+    return Scheduler(config.channels, seed=config.seed, workers=config.build_workers)
+
+
+def virtual_anchor(config: Config) -> datetime:
+    return config.virtual_anchor or VIRTUAL_ANCHOR
+
+
+def build_schedule(
+    config: Config, scheduler: Scheduler, library, start: datetime | None = None, duration: timedelta = timedelta(hours=24)
+):
+    """Build the schedule in the mode the config asks for, covering ``duration`` from the top of the hour."""
+    if start is None:
+        start = datetime.now().replace(minute=0, second=0, microsecond=0)
+    if config.virtual_schedule:
+        return scheduler.build_virtual_schedule(library=library, anchor=virtual_anchor(config), start=start)
+    if config.schedule_cache_path:
+        from .snapshot import ScheduleCache
+
+        return ScheduleCache(config.schedule_cache_path).schedule(scheduler, library, start=start, duration=duration)
+    if config.columnar_schedule:
+        from .columnar import ColumnarSchedule
+
+        return ColumnarSchedule.build(scheduler, library, start=start, duration=duration)
+    return scheduler.build_schedule(library=library, start=start, duration=duration)
 
 
 def command_scan(scanner, library):
@@ -57,15 +168,11 @@ def command_channels(config):
     print(Player.summarize_channels(config.channels))
 
 
-def command_guide(scheduler, schedule, hours: float):
+def command_guide(player, hours: float):
     window_start = datetime.now()
-    window_end = window_start + timedelta(hours=hours)
-    by_channel = scheduler.guide(schedule, window_start, window_end)
-    for channel, entries in sorted(by_channel.items()):
-        print(f"=== {channel} ===")
-        for entry in entries:
-            print(f"{entry.start:%H:%M} - {entry.end:%H:%M}: {entry.label()}")
-        print()
+    guide = player.describe_guide(window_start, window_start + timedelta(hours=hours))
+    if guide:
+        print(guide)
 
 
 def command_now(player):
@@ -79,6 +186,98 @@ def command_upcoming(player, hours: float):
     print(player.describe_upcoming(now, horizon=timedelta(hours=hours)))
 
 
+def command_serve(config, scheduler, library, player, host: str, port: int, rebuild_margin_minutes: float):
+    import asyncio
+
+    from .server import GuideServer
+
+    if config.library_catalog is not None:
+        from .catalog import SharedCatalog
+
+        catalog = SharedCatalog(config.library_catalog)
+
+        def current_library():
+            # Pick up a generation republished by `scan` or `watch` since the last build.
+            try:
+                return catalog.current()
+            except (OSError, ValueError):
+                return library
+
+    else:
+
+        def current_library():
+            return library
+
+    server = GuideServer(
+        player,
+        config.channels,
+        rebuild=lambda: build_schedule(config, scheduler, current_library()),
+        rebuild_margin=timedelta(minutes=rebuild_margin_minutes),
+    )
+    try:
+        asyncio.run(server.serve_forever(host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+def command_export(config, scheduler, library, fmt: str, days: float, output: Path | None, compress: bool):
+    from .export import open_output, schedule_entries, stream_entries, write_m3u, write_xmltv
+
+    start = datetime.now().replace(minute=0, second=0, microsecond=0)
+    end = start + timedelta(days=days)
+    if config.schedule_cache_path or config.columnar_schedule:
+        # Export what `now`, `guide` and `serve` read: the cached schedule
+        # (extended and stored back if it runs short) or the columnar build.
+        schedule = build_schedule(config, scheduler, library, start=start, duration=end - start)
+        entries = schedule_entries(schedule, start, end)
+    else:
+        # The same entries build_schedule would make, generated channel by channel.
+        entries = stream_entries(
+            scheduler, library, start, end, virtual=config.virtual_schedule, anchor=virtual_anchor(config)
+        )
+    with open_output(output, compress=True if compress else None) as handle:
+        if fmt == "xmltv":
+            count = write_xmltv(handle, scheduler.channels, entries)
+        else:
+            count = write_m3u(handle, entries)
+    if output is not None and str(output) != "-":
+        print(f"Wrote {count} {'programmes' if fmt == 'xmltv' else 'playlist entries'} to {output}")
+
+
+def command_watch(config, scanner, library, scheduler, schedule, player, interval: float, polling: bool):
+    from .watcher import open_watcher
+
+    with open_watcher(scanner, library, interval=interval, polling=polling) as watcher:
+        print(f"Watching {', '.join(map(str, config.media_roots))} ({type(watcher).__name__}); Ctrl+C to stop.")
+        try:
+            while True:
+                delta = watcher.poll(timeout=interval)
+                if not delta:
+                    continue
+                now = datetime.now()
+                delta.apply(library)
+                if config.library_catalog is not None:
+                    from .catalog import publish_catalog
+
+                    generation = publish_catalog(config.library_catalog, library)
+                    print(f"Published catalog generation {generation}.")
+                for path in delta.removed:
+                    print(f"- {path}")
+                for item in delta.added:
+                    print(f"+ {item.label} -> {item.path}")
+                if isinstance(schedule, Schedule):
+                    schedule, touched = scheduler.apply_delta(schedule, delta, now)
+                    print(f"Updated channels: {', '.join(touched) or 'none'}")
+                else:
+                    # Virtual and columnar schedules are rebuilt rather than patched.
+                    schedule = build_schedule(config, scheduler, library)
+                    print("Rebuilt schedule.")
+                player = Player(schedule, state_path=config.state_path)
+                print(player.describe_now_playing(now))
+        except KeyboardInterrupt:
+            pass
+
+
 def command_init_config(output: Path):
     example = Config(
         media_roots=[Path("./sample_media")],
@@ -99,23 +298,95 @@ def main(argv: List[str] | None = None) -> None:
     parser = build_parser()
     args = parser.parse_args(argv)
 
+    output = args.profile_output if args.profile else None
+    if output is not None and output.suffix != ".json":
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(run_command, parser, args)
+        finally:
+            profiler.dump_stats(output)
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(15)
+        return
+    try:
+        run_command(parser, args)
+    finally:
+        if output is not None:
+            output.write_text(json.dumps(metrics.snapshot(), indent=2))
+        elif args.profile:
+            print(metrics.format_table(), file=sys.stderr)
+
+
+def run_command(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
     if args.command == "init-config":
         command_init_config(args.output)
         return
 
-    config, scanner, scheduler, schedule, player = load_app(args.config)
-    library = scanner.scan()
+    # Build only what the command needs: `channels` stops at the config,
+    # `scan` at the library and `export` streams without a 24-hour build.
+    config = Config.load(args.config)
+    if args.command == "channels":
+        command_channels(config)
+        return
+    if args.command in ("guide", "now", "upcoming") and streams_library(config):
+        from .pipeline import stream_schedule
 
+        scheduler = make_scheduler(config)
+        scanner = make_scanner(config)
+        start = datetime.now().replace(minute=0, second=0, microsecond=0)
+        schedule = stream_schedule(scanner, scheduler, start, timedelta(hours=24))
+        player = Player(schedule, state_path=config.state_path)
+        if args.command == "guide":
+            command_guide(player, hours=args.hours)
+        elif args.command == "now":
+            command_now(player)
+        else:
+            command_upcoming(player, hours=args.hours)
+        return
+    scanner, library = load_library(config, publish=args.command in ("scan", "watch"))
+    if args.command == "watch" and not isinstance(library, list):
+        library = list(library)  # patched in place as changes arrive, then republished
     if args.command == "scan":
         command_scan(scanner, library)
-    elif args.command == "channels":
-        command_channels(config)
-    elif args.command == "guide":
-        command_guide(scheduler, schedule, hours=args.hours)
+        return
+    scheduler = make_scheduler(config)
+    if args.command == "export":
+        command_export(
+            config,
+            scheduler,
+            library,
+            fmt=args.format,
+            days=args.days,
+            output=args.output,
+            compress=args.gzip,
+        )
+        return
+    with span("schedule.build"):
+        schedule = build_schedule(config, scheduler, library)
+    player = Player(schedule, state_path=config.state_path)
+
+    if args.command == "guide":
+        command_guide(player, hours=args.hours)
     elif args.command == "now":
         command_now(player)
     elif args.command == "upcoming":
         command_upcoming(player, hours=args.hours)
+    elif args.command == "watch":
+        command_watch(
+            config, scanner, library, scheduler, schedule, player, interval=args.interval, polling=args.polling
+        )
+    elif args.command == "serve":
+        command_serve(
+            config,
+            scheduler,
+            library,
+            player,
+            host=args.host,
+            port=args.port,
+            rebuild_margin_minutes=args.rebuild_margin_minutes,
+        )
     else:
         parser.error(f"Unknown command: {args.command}")
 
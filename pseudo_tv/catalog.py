@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import sys
+from array import array
+from collections.abc import Sequence as SequenceABC
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .instrumentation import count, span
+from .models import MediaItem
+
+CATALOG_VERSION = 1
+
+_MAGIC = b"PTVCAT\0\0"
+_MICROSECOND = timedelta(microseconds=1)
+_NONE = -1
+
+# Fixed-width columns, one value per item. String columns hold row numbers
+# into the table of the same name; -1 stands for ``None``.
+_COLUMNS = (
+    ("duration_us", "q"),
+    ("season", "i"),
+    ("episode", "i"),
+    ("year", "i"),
+    ("path", "i"),
+    ("title", "i"),
+    ("genre", "i"),
+    ("show", "i"),
+)
+_TABLES = ("path", "title", "genre", "show")
+
+
+class _StringTable:
+    """Distinct strings, stored as one UTF-8 blob plus end offsets."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.offsets = array("Q", [0])
+        self.data = bytearray()
+
+    def add(self, value: Optional[str]) -> int:
+        if value is None:
+            return _NONE
+        value = str(value)
+        row = self.ids.get(value)
+        if row is None:
+            row = self.ids[value] = len(self.ids)
+            self.data += value.encode("utf-8", "surrogateescape")
+            self.offsets.append(len(self.data))
+        return row
+
+
+def _optional_int(value) -> int:
+    return _NONE if value is None else int(value)
+
+
+def publish_catalog(path: Path, items: Iterable[MediaItem]) -> int:
+    """Write ``items`` to ``path`` as the next catalog generation and return its number.
+
+    The file is written next to ``path`` and moved into place with
+    ``os.replace``, so attached readers keep their mapping of the previous
+    generation and new readers see only complete files.
+    """
+    path = Path(path)
+    with span("catalog.publish"):
+        columns = {name: array(code) for name, code in _COLUMNS}
+        tables = {name: _StringTable() for name in _TABLES}
+        rows = 0
+        for item in items:
+            columns["duration_us"].append(item.duration_us)
+            columns["season"].append(_optional_int(item.season))
+            columns["episode"].append(_optional_int(item.episode))
+            columns["year"].append(_optional_int(item.year))
+            columns["path"].append(tables["path"].add(item.path_string))
+            columns["title"].append(tables["title"].add(item.title))
+            columns["genre"].append(tables["genre"].add(item.genre))
+            columns["show"].append(tables["show"].add(item.show))
+            rows += 1
+
+        sections: List[Tuple[str, str, bytes]] = [(name, code, columns[name].tobytes()) for name, code in _COLUMNS]
+        for name in _TABLES:
+            sections.append((f"{name}.offsets", "Q", tables[name].offsets.tobytes()))
+            sections.append((f"{name}.data", "B", bytes(tables[name].data)))
+        layout = {}
+        position = 0
+        for name, code, raw in sections:
+            layout[name] = [position, len(raw), code]
+            position += len(raw) + (-len(raw) % 8)  # keep every section 8-byte aligned
+
+        generation = _stored_generation(path) + 1
+        header = {
+            "version": CATALOG_VERSION,
+            "byteorder": sys.byteorder,
+            "generation": generation,
+            "count": rows,
+            "sections": layout,
+        }
+        raw_header = json.dumps(header, separators=(",", ":")).encode()
+        raw_header += b" " * (-(len(_MAGIC) + 8 + len(raw_header)) % 8)
+
+        temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with temporary.open("wb") as handle:
+            handle.write(_MAGIC)
+            handle.write(len(raw_header).to_bytes(8, "little"))
+            handle.write(raw_header)
+            for _, _, raw in sections:
+                handle.write(raw)
+                handle.write(b"\0" * (-len(raw) % 8))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, path)
+        count("catalog.items", rows)
+    return generation
+
+
+def _read_header(mapped) -> Tuple[Dict, int]:
+    if mapped[: len(_MAGIC)] != _MAGIC:
+        raise ValueError("not a catalog file")
+    offset = len(_MAGIC) + 8
+    header_size = int.from_bytes(mapped[len(_MAGIC) : offset], "little")
+    header = json.loads(mapped[offset : offset + header_size])
+    if header.get("version") != CATALOG_VERSION or header.get("byteorder") != sys.byteorder:
+        raise ValueError("catalog written by an incompatible version or platform")
+    return header, offset + header_size
+
+
+def _stored_generation(path: Path) -> int:
+    try:
+        with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return int(_read_header(mapped)[0]["generation"])
+    except (OSError, ValueError, KeyError):
+        return 0
+
+
+class CatalogGeneration(SequenceABC):
+    """One published catalog, mapped read-only; a sequence of :class:`CatalogItem` views.
+
+    Columns are ``memoryview`` casts over the mapping, so attaching costs
+    no copying and every process shares the same page-cache pages. Views are
+    created on first access and then reused, so an item keeps its identity
+    for as long as the generation is alive. The mapping is released once
+    the generation and all of its views are garbage.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as handle:
+            stat = os.fstat(handle.fileno())
+            self._mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        self.file_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        try:
+            header, data_start = _read_header(self._mapped)
+        except ValueError:
+            self._mapped.close()
+            raise
+        self.generation: int = header["generation"]
+        self._count: int = header["count"]
+        view = memoryview(self._mapped)
+        self._sections = {
+            name: view[data_start + offset : data_start + offset + size].cast(code)
+            for name, (offset, size, code) in header["sections"].items()
+        }
+        self._items: List[Optional[CatalogItem]] = [None] * self._count
+        # Genres and shows repeat across many items; decode each one once.
+        self._decoded: Dict[str, Dict[int, str]] = {"genre": {}, "show": {}}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("catalog index out of range")
+        item = self._items[index]
+        if item is None:
+            item = self._items[index] = CatalogItem(self, index)
+        return item
+
+    def column(self, name: str) -> memoryview:
+        """A fixed-width column (``duration_us``, ``season``, ``episode``, ``year``) as a typed view."""
+        return self._sections[name]
+
+    def string(self, table: str, row: int) -> Optional[str]:
+        """Row ``row`` of string table ``table`` (``path``, ``title``, ``genre`` or ``show``)."""
+        if row == _NONE:
+            return None
+        cache = self._decoded.get(table)
+        if cache is not None and row in cache:
+            return cache[row]
+        offsets = self._sections[f"{table}.offsets"]
+        value = bytes(self._sections[f"{table}.data"][offsets[row] : offsets[row + 1]]).decode(
+            "utf-8", "surrogateescape"
+        )
+        if cache is not None:
+            cache[row] = value
+        return value
+
+    def materialize(self) -> List[MediaItem]:
+        """Plain, independent :class:`MediaItem` copies of every item."""
+        return [item.materialize() for item in self]
+
+
+class CatalogItem:
+    """Read-only view of one catalog row with the attributes of a :class:`MediaItem`."""
+
+    __slots__ = ("catalog", "row")
+
+    def __init__(self, catalog: CatalogGeneration, row: int):
+        self.catalog = catalog
+        self.row = row
+
+    def _string(self, table: str) -> Optional[str]:
+        return self.catalog.string(table, self.catalog.column(table)[self.row])
+
+    def _int(self, column: str) -> Optional[int]:
+        value = self.catalog.column(column)[self.row]
+        return None if value == _NONE else value
+
+    @property
+    def path(self) -> Path:
+        return Path(self._string("path"))
+
+    @property
+    def path_string(self) -> str:
+        return self._string("path")
+
+    @property
+    def title(self) -> str:
+        return self._string("title")
+
+    @property
+    def duration_us(self) -> int:
+        return self.catalog.column("duration_us")[self.row]
+
+    @property
+    def duration(self) -> timedelta:
+        return self.duration_us * _MICROSECOND
+
+    @property
+    def genre(self) -> Optional[str]:
+        return self._string("genre")
+
+    @property
+    def show(self) -> Optional[str]:
+        return self._string("show")
+
+    @property
+    def season(self) -> Optional[int]:
+        return self._int("season")
+
+    @property
+    def episode(self) -> Optional[int]:
+        return self._int("episode")
+
+    @property
+    def year(self) -> Optional[int]:
+        return self._int("year")
+
+    is_episode = MediaItem.is_episode
+    label = property(MediaItem.format_label)
+    format_label = MediaItem.format_label
+    to_dict = MediaItem.to_dict
+
+    def materialize(self) -> MediaItem:
+        return MediaItem.from_dict(self.to_dict())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CatalogItem) and other.catalog is self.catalog:
+            return other.row == self.row
+        if isinstance(other, (CatalogItem, MediaItem)):
+            return self.to_dict() == other.to_dict()
+        return NotImplemented
+
+    __hash__ = None  # like MediaItem
+
+    def __repr__(self) -> str:
+        return f"CatalogItem({self.label!r}, generation={self.catalog.generation}, row={self.row})"
+
+
+class SharedCatalog:
+    """A catalog file that one process publishes and any number attach to.
+
+    :meth:`current` re-attaches only when the file has been replaced, so
+    calling it before each rebuild is how a republished generation reaches
+    every worker; schedules built from the previous generation keep working
+    until they are dropped. Put the file on a tmpfs such as ``/dev/shm`` to
+    keep it out of disk I/O entirely.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._current: Optional[CatalogGeneration] = None
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def publish(self, items: Iterable[MediaItem]) -> CatalogGeneration:
+        publish_catalog(self.path, items)
+        return self.current()
+
+    def current(self) -> CatalogGeneration:
+        """The newest published generation. Raises ``OSError``/``ValueError`` if there is none."""
+        current = self._current
+        if current is not None:
+            stat = os.stat(self.path)
+            if current.file_key == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                return current
+        self._current = CatalogGeneration(self.path)
+        count("catalog.attaches")
+        return self._current
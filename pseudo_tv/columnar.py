@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+try:  # Optional dependency; only the columnar schedule needs it
+    import numpy as np  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - exercised in envs without NumPy
+    np = None
+
+from .models import Channel, MediaItem, ScheduleEntry
+from .scheduler import Scheduler
+from .timeline import TimelineQueries
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def to_epoch_us(moment: datetime) -> int:
+    """Microseconds since 1970-01-01 for the naive local datetimes used throughout the app."""
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+def from_epoch_us(value: int) -> datetime:
+    return _EPOCH + int(value) * _MICROSECOND
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("Install NumPy to use the columnar schedule store.")
+
+
+class ColumnarTimeline:
+    """One channel's contiguous slice of a :class:`ColumnarSchedule`."""
+
+    def __init__(self, schedule: "ColumnarSchedule", first: int, last: int):
+        self.schedule = schedule
+        self.first = first
+        self.last = last
+
+    @property
+    def channel(self) -> Channel:
+        return self.schedule.channels[self.schedule.channel_ids[self.first]]
+
+    @property
+    def end(self) -> datetime:
+        return from_epoch_us(self.schedule.ends[self.last - 1])
+
+    def at(self, moment: datetime) -> Optional[ScheduleEntry]:
+        schedule = self.schedule
+        value = to_epoch_us(moment)
+        row = self.first + int(np.searchsorted(schedule.starts[self.first : self.last], value, "right")) - 1
+        if row >= self.first and value < schedule.ends[row]:
+            return schedule.entry(row)
+        return None
+
+    def overlapping(self, window_start: datetime, window_end: datetime) -> List[ScheduleEntry]:
+        schedule = self.schedule
+        begin = self.first + int(np.searchsorted(schedule.ends[self.first : self.last], to_epoch_us(window_start), "right"))
+        end = self.first + int(np.searchsorted(schedule.starts[self.first : self.last], to_epoch_us(window_end), "left"))
+        return schedule.entries(range(begin, max(begin, end)))
+
+    def starting_within(self, after: datetime, until: datetime) -> List[ScheduleEntry]:
+        """Entries with ``after < start <= until``."""
+        starts = self.schedule.starts[self.first : self.last]
+        begin = self.first + int(np.searchsorted(starts, to_epoch_us(after), "right"))
+        end = self.first + int(np.searchsorted(starts, to_epoch_us(until), "right"))
+        return self.schedule.entries(range(begin, max(begin, end)))
+
+
+class ColumnarSchedule(TimelineQueries):
+    """A schedule stored as parallel NumPy columns instead of entry objects.
+
+    Each row is one slot: ``starts`` and ``durations`` are int64 microseconds
+    since the epoch, ``channel_ids`` and ``item_ids`` are int32 positions in
+    the ``channels`` and ``items`` side tables. Rows are grouped by channel
+    and sorted by start within each channel. :class:`ScheduleEntry` objects
+    are only created when rows are handed out for display.
+    """
+
+    def __init__(
+        self,
+        channels: Sequence[Channel],
+        items: Sequence[MediaItem],
+        starts,
+        durations,
+        channel_ids,
+        item_ids,
+    ):
+        _require_numpy()
+        self.channels = list(channels)
+        self.items = list(items)
+        order = np.lexsort((starts, channel_ids))
+        self.starts = np.asarray(starts, dtype=np.int64)[order]
+        self.durations = np.asarray(durations, dtype=np.int64)[order]
+        self.channel_ids = np.asarray(channel_ids, dtype=np.int32)[order]
+        self.item_ids = np.asarray(item_ids, dtype=np.int32)[order]
+        self.ends = self.starts + self.durations
+        self._bounds = np.searchsorted(self.channel_ids, np.arange(len(self.channels) + 1))
+        self.timelines = {
+            channel.name: ColumnarTimeline(self, int(self._bounds[i]), int(self._bounds[i + 1]))
+            for i, channel in enumerate(self.channels)
+            if self._bounds[i + 1] > self._bounds[i]
+        }
+
+    @classmethod
+    def build(
+        cls, scheduler: Scheduler, library: Iterable[MediaItem], start: datetime, duration: timedelta
+    ) -> "ColumnarSchedule":
+        """Vectorized equivalent of :meth:`Scheduler.build_schedule` for the same seed."""
+        _require_numpy()
+        items = list(library)
+        item_ids = {id(item): i for i, item in enumerate(items)}
+        origin = to_epoch_us(start)
+        span = duration // _MICROSECOND
+        columns = {"starts": [], "durations": [], "channel_ids": [], "item_ids": []}
+        runs = scheduler.start_runs(items, start)
+        for channel_id, run in enumerate(runs):
+            pool_ids = np.fromiter((item_ids[id(item)] for item in run.pool), dtype=np.int32, count=len(run.pool))
+            pool_durations = np.fromiter(
+                (item.duration_us for item in run.pool), dtype=np.int64, count=len(run.pool)
+            )
+            if run.channel.allow_repeats:
+                period = int(pool_durations.sum())
+                if period <= 0:
+                    raise ValueError(f"Channel '{run.channel.name}' has no playable runtime.")
+                cycles = span // period + 1
+                pool_ids = np.tile(pool_ids, cycles)
+                pool_durations = np.tile(pool_durations, cycles)
+            offsets = np.concatenate(([0], np.cumsum(pool_durations[:-1])))
+            # Like the object builder: a slot is scheduled if it starts before the horizon.
+            count = int(np.searchsorted(offsets, span, "left"))
+            columns["starts"].append(origin + offsets[:count])
+            columns["durations"].append(pool_durations[:count])
+            columns["channel_ids"].append(np.full(count, channel_id, dtype=np.int32))
+            columns["item_ids"].append(pool_ids[:count])
+        merged = {
+            name: np.concatenate(parts) if parts else np.empty(0, dtype=np.int64) for name, parts in columns.items()
+        }
+        return cls([run.channel for run in runs], items, **merged)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __iter__(self) -> Iterator[ScheduleEntry]:
+        """Entries ordered by start and channel name, like a built ``Schedule``."""
+        names = np.array([channel.name for channel in self.channels], dtype=object)[self.channel_ids]
+        for row in np.lexsort((names, self.starts)):
+            yield self.entry(int(row))
+
+    def entry(self, row: int) -> ScheduleEntry:
+        return ScheduleEntry(
+            channel=self.channels[self.channel_ids[row]],
+            item=self.items[self.item_ids[row]],
+            start=from_epoch_us(self.starts[row]),
+        )
+
+    def entries(self, rows: Iterable[int]) -> List[ScheduleEntry]:
+        return [self.entry(int(row)) for row in rows]
+
+    def playing_rows(self, timestamps) -> "np.ndarray":
+        """Rows airing at each timestamp on every channel, in one vectorized lookup.
+
+        ``timestamps`` are epoch microseconds (see :func:`to_epoch_us`). The
+        result has shape ``(len(timestamps), len(channels))`` and holds ``-1``
+        where a channel has nothing on.
+        """
+        moments = np.asarray(timestamps, dtype=np.int64)
+        if len(self.starts) == 0:
+            return np.full((len(moments), len(self.channels)), -1, dtype=np.int64)
+        # Offset each channel into its own key range so one searchsorted covers
+        # all of them. Moments outside the schedule are clamped; they match nothing.
+        base = int(self.starts.min()) - 1
+        top = int(self.ends.max())
+        width = top - base + 1
+        keys = self.channel_ids.astype(np.int64) * width + (self.starts - base)
+        channel_ids = np.arange(len(self.channels), dtype=np.int64)
+        moments = np.clip(moments, base, top)
+        queries = channel_ids[None, :] * width + (moments - base)[:, None]
+        rows = np.searchsorted(keys, queries, "right") - 1
+        clipped = np.clip(rows, 0, None)
+        valid = (rows >= 0) & (self.channel_ids[clipped] == channel_ids[None, :]) & (moments[:, None] < self.ends[clipped])
+        return np.where(valid, rows, -1)
+
+    def playing_at_many(self, moments: Sequence[datetime]) -> List[Dict[str, ScheduleEntry]]:
+        """``playing_at`` for many moments, building entries only for the rows found."""
+        rows = self.playing_rows([to_epoch_us(moment) for moment in moments])
+        return [
+            {self.channels[c].name: self.entry(int(row)) for c, row in enumerate(line) if row >= 0} for line in rows
+        ]
@@ -1,16 +1,27 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Sequence
-
-try:  # Optional dependency; configs also accept JSON
-    import yaml  # type: ignore
-except ModuleNotFoundError:  # pragma: no cover - exercised in envs without PyYAML
-    yaml = None
+from typing import Dict, List, Optional, Sequence
 
+from .instrumentation import span
 from .models import Channel, ChannelRule
+from .state import ChannelPosition, StateStore
+
+CONFIG_CACHE_VERSION = 2
+
+
+def _yaml():
+    """PyYAML if installed. Imported on first use, since JSON configs never need it."""
+    try:
+        import yaml  # type: ignore
+    except ModuleNotFoundError:  # pragma: no cover - exercised in envs without PyYAML
+        return None
+    return yaml
 
 
 @dataclass
@@ -20,26 +31,111 @@ class Config:
     media_roots: Sequence[Path]
     channels: List[Channel] = field(default_factory=list)
     state_path: Path = Path(".pseudo_tv_state.json")
+    library_index_path: Optional[Path] = None
+    scan_workers: int = 1
+    ignore_dirs: List[str] = field(default_factory=list)
+    filename_patterns: List = field(default_factory=list)
+    virtual_schedule: bool = False
+    virtual_anchor: Optional[datetime] = None
+    seed: Optional[int] = None
+    schedule_cache_path: Optional[Path] = None
+    columnar_schedule: bool = False
+    build_workers: int = 1
+    probe_durations: bool = False
+    probe_workers: int = 4
+    metadata_manifests: Optional[List[str]] = None
+    metadata_catalog: Optional[Path] = None
+    dedupe: Optional[str] = None
+    dedupe_workers: int = 4
+    library_catalog: Optional[Path] = None
+    streaming_scan: bool = False
 
     @classmethod
-    def load(cls, path: Path) -> "Config":
-        data = cls._load_data(path)
+    def load(cls, path: Path, use_cache: bool = True) -> "Config":
+        """Parse ``path``, reusing the parsed data cached for it while the file is unchanged.
+
+        The cache is plain JSON under the user's cache directory (see
+        :meth:`cache_path`), so YAML configs are only parsed once per edit and
+        nothing read back from it is ever executed.
+        """
+        with span("config.load"):
+            if not use_cache:
+                return cls._from_data(cls._load_data(path))
+            stat = path.stat()
+            key = [CONFIG_CACHE_VERSION, str(path.resolve()), stat.st_mtime_ns, stat.st_size]
+            cache_path = cls.cache_path(path)
+            try:
+                cached = json.loads(cache_path.read_text())
+                if cached["key"] == key:
+                    return cls._from_data(cached["data"])
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+            data = cls._load_data(path)
+            config = cls._from_data(data)
+            temporary = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+            try:
+                cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+                with temporary.open("w") as handle:
+                    json.dump({"key": key, "data": data}, handle, default=str)
+                os.replace(temporary, cache_path)
+            except (OSError, TypeError, ValueError):
+                temporary.unlink(missing_ok=True)  # unwritable cache directory; just parse every time
+            return config
+
+    @staticmethod
+    def cache_path(path: Path) -> Path:
+        """``$XDG_CACHE_HOME/pseudo_tv/configs/<hash of the config's path>.json`` (``~/.cache`` by default)."""
+        root = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+        name = hashlib.sha256(str(path.resolve()).encode()).hexdigest()[:32]
+        return root / "pseudo_tv" / "configs" / f"{name}.json"
+
+    @classmethod
+    def _from_data(cls, data: Dict) -> "Config":
         media_roots = [Path(p) for p in data.get("media_roots", [])]
         channels = [cls._parse_channel(entry) for entry in data.get("channels", [])]
         state_path = Path(data.get("state_path", ".pseudo_tv_state.json"))
-        return cls(media_roots=media_roots, channels=channels, state_path=state_path)
+        library_index = data.get("library_index")
+        schedule_cache = data.get("schedule_cache")
+        manifests = data.get("metadata_manifests")
+        catalog = data.get("metadata_catalog")
+        library_catalog = data.get("library_catalog")
+        virtual_anchor = data.get("virtual_anchor")
+        return cls(
+            media_roots=media_roots,
+            channels=channels,
+            state_path=state_path,
+            library_index_path=Path(library_index) if library_index else None,
+            scan_workers=int(data.get("scan_workers", 1) or 1),
+            ignore_dirs=list(data.get("ignore_dirs", []) or []),
+            filename_patterns=list(data.get("filename_patterns", []) or []),
+            virtual_schedule=bool(data.get("virtual_schedule", False)),
+            virtual_anchor=datetime.fromisoformat(str(virtual_anchor)) if virtual_anchor else None,
+            seed=data.get("seed"),
+            schedule_cache_path=Path(schedule_cache) if schedule_cache else None,
+            columnar_schedule=bool(data.get("columnar_schedule", False)),
+            build_workers=int(data.get("build_workers", 1) or 1),
+            probe_durations=bool(data.get("probe_durations", False)),
+            probe_workers=int(data.get("probe_workers", 4) or 1),
+            metadata_manifests=list(manifests) if manifests is not None else None,
+            metadata_catalog=Path(catalog) if catalog else None,
+            dedupe=data.get("dedupe") or None,
+            dedupe_workers=int(data.get("dedupe_workers", 4) or 1),
+            library_catalog=Path(library_catalog) if library_catalog else None,
+            streaming_scan=bool(data.get("streaming_scan", False)),
+        )
 
     @staticmethod
     def _load_data(path: Path) -> Dict:
         text = path.read_text()
-        if yaml is not None:
-            return yaml.safe_load(text)
         try:
             return json.loads(text)
         except json.JSONDecodeError as exc:
-            raise RuntimeError(
-                "Install PyYAML or keep the config JSON-compatible (the bundled example is JSON)."
-            ) from exc
+            yaml = _yaml()
+            if yaml is None:
+                raise RuntimeError(
+                    "Install PyYAML or keep the config JSON-compatible (the bundled example is JSON)."
+                ) from exc
+            return yaml.safe_load(text)
 
     @staticmethod
     def _parse_channel(raw: Dict) -> Channel:
@@ -56,42 +152,69 @@ class Config:
             rules=rule,
             shuffle=bool(raw.get("shuffle", True)),
             allow_repeats=bool(raw.get("allow_repeats", False)),
+            max_items=int(raw["max_items"]) if raw.get("max_items") else None,
         )
 
     def to_dict(self) -> Dict:
         return {
             "media_roots": [str(p) for p in self.media_roots],
             "state_path": str(self.state_path),
-            "channels": [
-                {
-                    "name": channel.name,
-                    "shuffle": channel.shuffle,
-                    "allow_repeats": channel.allow_repeats,
-                    "include_genres": channel.rules.include_genres,
-                    "include_shows": channel.rules.include_shows,
-                    "include_paths": channel.rules.include_paths,
-                    "exclude_genres": channel.rules.exclude_genres,
-                    "minimum_runtime_minutes": channel.rules.minimum_runtime_minutes,
-                    "maximum_runtime_minutes": channel.rules.maximum_runtime_minutes,
-                }
-                for channel in self.channels
-            ],
+            "library_index": str(self.library_index_path) if self.library_index_path else None,
+            "scan_workers": self.scan_workers,
+            "ignore_dirs": list(self.ignore_dirs),
+            "filename_patterns": list(self.filename_patterns),
+            "virtual_schedule": self.virtual_schedule,
+            "virtual_anchor": self.virtual_anchor.isoformat() if self.virtual_anchor else None,
+            "seed": self.seed,
+            "schedule_cache": str(self.schedule_cache_path) if self.schedule_cache_path else None,
+            "columnar_schedule": self.columnar_schedule,
+            "build_workers": self.build_workers,
+            "probe_durations": self.probe_durations,
+            "probe_workers": self.probe_workers,
+            "metadata_manifests": list(self.metadata_manifests) if self.metadata_manifests is not None else None,
+            "metadata_catalog": str(self.metadata_catalog) if self.metadata_catalog else None,
+            "dedupe": self.dedupe,
+            "dedupe_workers": self.dedupe_workers,
+            "library_catalog": str(self.library_catalog) if self.library_catalog else None,
+            "streaming_scan": self.streaming_scan,
+            "channels": [self.channel_to_dict(channel) for channel in self.channels],
+        }
+
+    @staticmethod
+    def channel_to_dict(channel: Channel) -> Dict:
+        return {
+            "name": channel.name,
+            "shuffle": channel.shuffle,
+            "allow_repeats": channel.allow_repeats,
+            "max_items": channel.max_items,
+            "include_genres": channel.rules.include_genres,
+            "include_shows": channel.rules.include_shows,
+            "include_paths": channel.rules.include_paths,
+            "exclude_genres": channel.rules.exclude_genres,
+            "minimum_runtime_minutes": channel.rules.minimum_runtime_minutes,
+            "maximum_runtime_minutes": channel.rules.maximum_runtime_minutes,
         }
 
     def save(self, path: Path) -> None:
         data = self.to_dict()
+        yaml = _yaml()
         if yaml is not None:
             yaml.safe_dump(data, path.open("w"), sort_keys=False)
         else:
             json.dump(data, path.open("w"), indent=2)
 
-    def save_state(self, state: Dict) -> None:
-        self.state_path.write_text(json.dumps(state, indent=2, default=str))
+    def state_store(self) -> StateStore:
+        """The playback state at ``state_path``; the same store the player writes."""
+        return StateStore(self.state_path)
 
     def load_state(self) -> Dict:
-        if not self.state_path.exists():
-            return {}
-        try:
-            return json.loads(self.state_path.read_text())
-        except json.JSONDecodeError:
-            return {}
+        """The stored positions as ``{"positions": {channel: {...}}}``; empty if there are none."""
+        positions = self.state_store().positions
+        return {"positions": {name: position.to_dict() for name, position in positions.items()}}
+
+    def save_state(self, state: Dict) -> None:
+        """Record every position in ``state`` (as returned by :meth:`load_state`) and flush it."""
+        store = self.state_store()
+        for name, raw in state.get("positions", {}).items():
+            store.update(name, ChannelPosition.from_dict(raw))
+        store.flush()
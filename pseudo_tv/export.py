@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import gzip
+import io
+import os
+import re
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import takewhile
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence, TextIO
+from xml.sax.saxutils import escape, quoteattr
+
+from .models import Channel, MediaItem, ScheduleEntry
+from .scheduler import Scheduler
+from .timeline import CyclicTimeline, TimelineQueries
+
+_XMLTV_TIME = "%Y%m%d%H%M%S %z"
+
+
+def channel_id(channel: Channel) -> str:
+    """Stable XMLTV/M3U id for a channel, e.g. ``comedy-classics.pseudo-tv``."""
+    slug = re.sub(r"[^a-z0-9]+", "-", channel.name.lower()).strip("-")
+    return f"{slug or 'channel'}.pseudo-tv"
+
+
+def stream_entries(
+    scheduler: Scheduler,
+    library: Iterable[MediaItem],
+    start: datetime,
+    end: datetime,
+    virtual: bool = False,
+    chunk: timedelta = timedelta(hours=6),
+    anchor: Optional[datetime] = None,
+) -> Iterator[ScheduleEntry]:
+    """Yield the schedule for ``[start, end)`` one channel after another.
+
+    Channel runs are extended ``chunk`` at a time (or cyclic timelines are
+    walked lazily when ``virtual``, laid out from ``anchor`` as
+    :meth:`Scheduler.build_virtual_schedule` does), so memory does not grow with the length
+    of the window. For the same seed the entries match what
+    :meth:`Scheduler.build_schedule` (or the virtual schedule) would contain.
+
+    Channels are selected before this returns, so a config error such as a
+    channel without matching items is raised before any output is written.
+    """
+    if virtual:
+        return schedule_entries(scheduler.build_virtual_schedule(library, anchor=anchor or start, start=start), start, end)
+    runs = scheduler.start_runs(library, start)
+
+    def extend() -> Iterator[ScheduleEntry]:
+        for run in runs:
+            while not run.finished and run.pointer < end:
+                yield from run.extend(min(run.pointer + chunk, end))
+
+    return extend()
+
+
+def schedule_entries(schedule: TimelineQueries, start: datetime, end: datetime) -> Iterator[ScheduleEntry]:
+    """Yield the entries of a built schedule overlapping ``[start, end)`` one channel after another.
+
+    Cyclic timelines of a virtual schedule are walked lazily.
+    """
+    for timeline in schedule.timelines.values():
+        if isinstance(timeline, CyclicTimeline):
+            yield from takewhile(lambda e: e.start < end, timeline.iter_from(start))
+        else:
+            yield from timeline.overlapping(start, end)
+
+
+def _xmltv_time(moment: datetime) -> str:
+    return moment.astimezone().strftime(_XMLTV_TIME)
+
+
+def write_xmltv(handle: TextIO, channels: Sequence[Channel], entries: Iterable[ScheduleEntry]) -> int:
+    """Write an XMLTV document, one ``<programme>`` per entry as it arrives; returns the count."""
+    handle.write('<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE tv SYSTEM "xmltv.dtd">\n')
+    handle.write('<tv generator-info-name="pseudo_tv">\n')
+    for channel in channels:
+        handle.write(
+            f"  <channel id={quoteattr(channel_id(channel))}>"
+            f"<display-name>{escape(channel.name)}</display-name></channel>\n"
+        )
+    count = 0
+    ids = {}
+    for entry in entries:
+        channel = entry.channel
+        ident = ids.get(channel.name)
+        if ident is None:
+            ident = ids[channel.name] = quoteattr(channel_id(channel))
+        item = entry.item
+        parts = [
+            f'  <programme start="{_xmltv_time(entry.start)}" stop="{_xmltv_time(entry.end)}" channel={ident}>',
+            f"<title>{escape(item.show or item.title)}</title>",
+        ]
+        if item.show:
+            parts.append(f"<sub-title>{escape(item.title)}</sub-title>")
+        if item.genre:
+            parts.append(f"<category>{escape(item.genre)}</category>")
+        if item.year:
+            parts.append(f"<date>{item.year}</date>")
+        if item.season is not None or item.episode is not None:
+            season = item.season - 1 if item.season is not None else ""
+            episode = item.episode - 1 if item.episode is not None else ""
+            parts.append(f'<episode-num system="xmltv_ns">{season}.{episode}.</episode-num>')
+        parts.append("</programme>\n")
+        handle.write("".join(parts))
+        count += 1
+    handle.write("</tv>\n")
+    return count
+
+
+def _m3u_attribute(value: str) -> str:
+    # M3U has no escape syntax for attribute values, so quotes become apostrophes.
+    return value.replace('"', "'").replace("\n", " ")
+
+
+def write_m3u(handle: TextIO, entries: Iterable[ScheduleEntry]) -> int:
+    """Write an extended M3U playlist of the scheduled files, grouped by channel; returns the count.
+
+    A playlist lists what a channel plays rather than when, so each file
+    appears once per channel (at its first airing) however often it repeats
+    in the window.
+    """
+    handle.write("#EXTM3U\n")
+    count = 0
+    seen = set()
+    for entry in entries:
+        channel = entry.channel
+        key = (channel.name, entry.item.path_string)
+        if key in seen:
+            continue
+        seen.add(key)
+        seconds = int(entry.item.duration.total_seconds())
+        name = _m3u_attribute(channel.name)
+        label = entry.item.label.replace("\n", " ")
+        handle.write(
+            f'#EXTINF:{seconds} tvg-id="{channel_id(channel)}" tvg-name="{name}" '
+            f'group-title="{name}",{label}\n{entry.item.path}\n'
+        )
+        count += 1
+    return count
+
+
+@contextmanager
+def open_output(path: Optional[Path], compress: Optional[bool] = None) -> Iterator[TextIO]:
+    """Text handle for ``path`` (stdout for ``None`` or ``-``); gzip when asked or when it ends in ``.gz``.
+
+    Files are written next to ``path`` and moved into place only once the
+    block completes, so a failed export leaves any previous file untouched.
+    """
+    if compress is None:
+        compress = path is not None and path.suffix == ".gz"
+    if path is None or str(path) == "-":
+        if compress:
+            with gzip.GzipFile(fileobj=sys.stdout.buffer, mode="wb") as raw:
+                with io.TextIOWrapper(raw, encoding="utf-8") as handle:
+                    yield handle
+        else:
+            yield sys.stdout
+        return
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        if compress:
+            with gzip.open(temporary, "wt", encoding="utf-8") as handle:
+                yield handle
+        else:
+            with temporary.open("w", encoding="utf-8") as handle:
+                yield handle
+        os.replace(temporary, path)
+    finally:
+        if temporary.exists():
+            temporary.unlink()
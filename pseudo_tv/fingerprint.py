@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .instrumentation import count, span
+from .models import MediaItem
+
+SAMPLE_BYTES = 64 * 1024
+MIN_DEDUPE_BYTES = 4 * 1024
+PREFERENCES = ("first", "last", "newest", "oldest")
+
+
+@dataclass(frozen=True)
+class FileStamp:
+    """What a cached fingerprint is keyed on besides the path."""
+
+    mtime_ns: int
+    size: int
+
+
+def fingerprint(path: Path, size: Optional[int] = None, sample: int = SAMPLE_BYTES) -> Optional[str]:
+    """BLAKE2b digest of the size plus the first, middle and last ``sample`` bytes of ``path``.
+
+    The file is memory-mapped, so only the sampled pages are read no matter
+    how large it is. Files up to three samples long are hashed whole.
+    Returns ``None`` if the file cannot be read.
+    """
+    try:
+        if size is None:
+            size = os.stat(path).st_size
+        digest = hashlib.blake2b(size.to_bytes(8, "little"), digest_size=16)
+        if size:
+            with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if size <= 3 * sample:
+                    digest.update(mapped)
+                else:
+                    middle = (size - sample) // 2
+                    for offset in (0, middle, size - sample):
+                        digest.update(mapped[offset : offset + sample])
+    except (OSError, ValueError):
+        return None
+    return digest.hexdigest()
+
+
+class Deduplicator:
+    """Collapses items whose files have identical content.
+
+    Files smaller than ``min_size`` bytes (by default 4 KiB, which covers
+    empty placeholders and stubs) are never treated as duplicates. Of the
+    rest, only files that share their size with another item are fingerprinted,
+    on ``workers`` threads; digests are cached by path, mtime and size (and
+    persisted through ``store``, typically the library index), so an
+    unchanged library costs one ``stat`` per item. Of each group of
+    duplicates one item is kept according to ``prefer``:
+
+    - ``first``/``last``: earliest or latest in scan order, i.e. the order of
+      ``media_roots``.
+    - ``newest``/``oldest``: by file modification time.
+
+    The kept item stays at the position of the first copy, so the scan order
+    is otherwise unchanged.
+    """
+
+    def __init__(
+        self,
+        prefer: str = "first",
+        workers: int = 4,
+        load: Optional[Callable[[], Dict[str, Tuple[int, int, str]]]] = None,
+        store: Optional[Callable[[Dict[str, Tuple[int, int, str]]], None]] = None,
+        min_size: int = MIN_DEDUPE_BYTES,
+    ):
+        if prefer not in PREFERENCES:
+            raise ValueError(f"Unknown duplicate preference '{prefer}'; expected one of {', '.join(PREFERENCES)}.")
+        self.prefer = prefer
+        self.workers = workers
+        self.min_size = min_size
+        self._load = load
+        self._store = store
+        self._cache: Optional[Dict[str, Tuple[int, int, str]]] = None
+
+    def dedupe(self, items: Sequence[MediaItem]) -> List[MediaItem]:
+        with span("library.dedupe"):
+            stamps = self._stamps(items)
+            digests = self._digests(stamps)
+            groups: Dict[str, List[int]] = {}
+            for position, item in enumerate(items):
+                digest = digests.get(str(item.path))
+                if digest is not None:
+                    groups.setdefault(digest, []).append(position)
+            dropped = set()
+            keep: Dict[int, int] = {}
+            for positions in groups.values():
+                if len(positions) < 2:
+                    continue
+                chosen = self._choose(positions, items, stamps)
+                keep[positions[0]] = chosen
+                dropped.update(positions[1:])
+            count("dedupe.duplicates", len(dropped))
+            return [items[keep.get(i, i)] for i in range(len(items)) if i not in dropped]
+
+    def _stamps(self, items: Iterable[MediaItem]) -> Dict[str, FileStamp]:
+        stamps = {}
+        for item in items:
+            try:
+                stat = os.stat(item.path)
+            except OSError:
+                continue
+            stamps[str(item.path)] = FileStamp(stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def _digests(self, stamps: Dict[str, FileStamp]) -> Dict[str, str]:
+        by_size: Dict[int, List[str]] = {}
+        for path, stamp in stamps.items():
+            if stamp.size < self.min_size:
+                continue
+            by_size.setdefault(stamp.size, []).append(path)
+        candidates = [path for paths in by_size.values() if len(paths) > 1 for path in paths]
+
+        if self._cache is None:
+            self._cache = dict(self._load()) if self._load is not None else {}
+        cache = self._cache
+        digests: Dict[str, str] = {}
+        missing = []
+        for path in candidates:
+            stamp = stamps[path]
+            cached = cache.get(path)
+            if cached is not None and cached[:2] == (stamp.mtime_ns, stamp.size):
+                digests[path] = cached[2]
+            else:
+                missing.append(path)
+        count("dedupe.fingerprints", len(missing))
+
+        if missing:
+            sizes = [stamps[path].size for path in missing]
+            if self.workers > 1 and len(missing) > 1:
+                from concurrent.futures import ThreadPoolExecutor
+
+                with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                    results = list(pool.map(fingerprint, missing, sizes))
+            else:
+                results = list(map(fingerprint, missing, sizes))
+            for path, digest in zip(missing, results):
+                if digest is not None:
+                    stamp = stamps[path]
+                    cache[path] = (stamp.mtime_ns, stamp.size, digest)
+                    digests[path] = digest
+
+        stale = [path for path in cache if path not in stamps]
+        for path in stale:
+            del cache[path]
+        if self._store is not None and (missing or stale):
+            self._store(cache)
+        return digests
+
+    def _choose(self, positions: List[int], items: Sequence[MediaItem], stamps: Dict[str, FileStamp]) -> int:
+        if self.prefer == "first":
+            return positions[0]
+        if self.prefer == "last":
+            return positions[-1]
+        by_mtime = sorted(positions, key=lambda position: stamps[str(items[position].path)].mtime_ns)
+        return by_mtime[-1] if self.prefer == "newest" else by_mtime[0]
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Hashable, List, Tuple
+
+from .instrumentation import count
+from .models import ScheduleEntry
+from .timeline import TimelineQueries
+
+_SLOT_ORIGIN = datetime(2000, 1, 1)
+
+Grouped = Dict[str, List[ScheduleEntry]]
+# Per channel, the ``[first, last)`` slice of the cached window a request covers.
+Signature = Tuple[Tuple[str, int, int], ...]
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def to_dict(self) -> Dict:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+def render_guide(grouped: Grouped) -> str:
+    blocks = []
+    for channel, entries in sorted(grouped.items()):
+        lines = [f"=== {channel} ==="]
+        lines.extend(f"{entry.start:%H:%M} - {entry.end:%H:%M}: {entry.label()}" for entry in entries)
+        blocks.append("\n".join(lines) + "\n")
+    return "\n".join(blocks)
+
+
+def render_upcoming(grouped: Grouped) -> str:
+    if not grouped:
+        return "No upcoming items in window."
+    lines: List[str] = []
+    for name, entries in sorted(grouped.items()):
+        lines.append(f"Channel {name}:")
+        for entry in entries:
+            lines.append(f"  - {entry.start:%H:%M} {entry.item.label} ({entry.item.duration})")
+    return "\n".join(lines)
+
+
+class GuideCache:
+    """LRU cache of guide and upcoming listings for one schedule.
+
+    Windows are widened to ``slot`` boundaries (half hours by default) and
+    the grouped per-channel listing of the widened window is cached. A
+    request is answered by bisecting each cached channel list down to the
+    exact window, so results are identical to asking the schedule directly;
+    rendered text is cached per exact slice, so every request that sees the
+    same programmes reuses the same string. At most ``max_entries`` windows
+    and texts are kept, least recently used first out.
+
+    The cache empties itself when the schedule's ``generation`` changes
+    (e.g. after :meth:`Schedule.replace_channel`). ``stats`` counts hits,
+    misses, evictions and invalidations; the same events are reported as
+    ``guide_cache.*`` counters.
+
+    Threads may share a cache without locking. Two threads missing the same
+    window both compute it, and ``stats`` may drop a count under contention,
+    but answers are always complete.
+    """
+
+    def __init__(self, schedule: TimelineQueries, slot: timedelta = timedelta(minutes=30), max_entries: int = 256):
+        self.schedule = schedule
+        self.slot = slot
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._generation = schedule.generation
+
+    def floor(self, moment: datetime) -> datetime:
+        return moment - (moment - _SLOT_ORIGIN) % self.slot
+
+    def ceil(self, moment: datetime) -> datetime:
+        floor = self.floor(moment)
+        return floor if floor == moment else floor + self.slot
+
+    def guide(self, start: datetime, end: datetime) -> Grouped:
+        """Entries overlapping ``[start, end)`` per channel."""
+        _, window, signature = self._guide_slices(start, end)
+        return self._exact(window, signature)
+
+    def upcoming(self, after: datetime, until: datetime) -> Grouped:
+        """Entries with ``after < start <= until`` per channel."""
+        _, window, signature = self._upcoming_slices(after, until)
+        return self._exact(window, signature)
+
+    def guide_text(self, start: datetime, end: datetime) -> str:
+        return self._render(self._guide_slices(start, end), render_guide)
+
+    def upcoming_text(self, after: datetime, until: datetime) -> str:
+        return self._render(self._upcoming_slices(after, until), render_upcoming)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    # Internals ------------------------------------------------------------
+
+    def _guide_slices(self, start: datetime, end: datetime) -> Tuple[Hashable, Grouped, Signature]:
+        key = ("guide", self.floor(start), self.ceil(end))
+        window = self._lookup(key, lambda: self.schedule.overlapping(key[1], key[2]))
+        signature = []
+        for name, entries in window.items():
+            first = bisect_right(entries, start, key=_end_of)
+            last = bisect_left(entries, end, first, key=_start_of)
+            if first < last:
+                signature.append((name, first, last))
+        return key, window, tuple(signature)
+
+    def _upcoming_slices(self, after: datetime, until: datetime) -> Tuple[Hashable, Grouped, Signature]:
+        key = ("upcoming", self.floor(after), self.ceil(until))
+        window = self._lookup(key, lambda: self.schedule.starting_within(key[1], key[2]))
+        signature = []
+        for name, entries in window.items():
+            first = bisect_right(entries, after, key=_start_of)
+            last = bisect_right(entries, until, first, key=_start_of)
+            if first < last:
+                signature.append((name, first, last))
+        return key, window, tuple(signature)
+
+    @staticmethod
+    def _exact(window: Grouped, signature: Signature) -> Grouped:
+        return {name: window[name][first:last] for name, first, last in signature}
+
+    def _render(self, slices: Tuple[Hashable, Grouped, Signature], render: Callable[[Grouped], str]) -> str:
+        key, window, signature = slices
+        return self._lookup(("text", key, signature), lambda: render(self._exact(window, signature)))
+
+    def _lookup(self, key: Hashable, compute: Callable[[], object]):
+        generation = self.schedule.generation
+        if generation != self._generation:
+            if self._entries:
+                self.stats.invalidations += 1
+                count("guide_cache.invalidations")
+            self._entries.clear()
+            self._generation = generation
+        entries = self._entries
+        value = entries.get(key)
+        if value is not None:
+            try:
+                entries.move_to_end(key)
+            except KeyError:  # evicted by another thread meanwhile
+                pass
+            self.stats.hits += 1
+            count("guide_cache.hits")
+            return value
+        self.stats.misses += 1
+        count("guide_cache.misses")
+        value = entries[key] = compute()
+        while len(entries) > self.max_entries:
+            try:
+                entries.popitem(last=False)
+            except KeyError:
+                break
+            self.stats.evictions += 1
+            count("guide_cache.evictions")
+        return value
+
+
+def _start_of(entry: ScheduleEntry) -> datetime:
+    return entry.start
+
+
+def _end_of(entry: ScheduleEntry) -> datetime:
+    return entry.end
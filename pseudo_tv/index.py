@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import MediaItem
+
+
+@dataclass
+class DirectoryRecord:
+    """Last known state of a scanned directory.
+
+    ``metadata_mtimes`` maps the names of the metadata files in it
+    (manifests and ``.meta.json`` companions) to their mtimes, since editing one in place
+    leaves the directory's own mtime unchanged.
+    """
+
+    path: str
+    mtime_ns: int
+    subdirs: List[str]
+    metadata_mtimes: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class IndexedEntry:
+    """Last known state of a media file and the item built from it."""
+
+    path: str
+    mtime_ns: int
+    size: int
+    companion_mtime_ns: Optional[int]
+    item: MediaItem
+
+    def is_current(self, mtime_ns: int, size: int, companion_mtime_ns: Optional[int]) -> bool:
+        return (
+            self.mtime_ns == mtime_ns
+            and self.size == size
+            and self.companion_mtime_ns == companion_mtime_ns
+        )
+
+
+class LibraryIndex:
+    """Persistent SQLite index of the media library.
+
+    Directories are keyed by path and store their modification time plus the
+    list of subdirectories, so an unchanged directory can be reused without
+    listing it again. Media files are keyed by path and store mtime, size and
+    the mtime of their ``.meta.json`` companion alongside the built item.
+    When a directory manifest or catalog is in use that column holds a
+    signature of all metadata sources instead, and the catalog's own
+    signature is kept under ``settings``. Content fingerprints used for
+    duplicate detection are cached in ``fingerprints``.
+
+    Directory mtimes only change when entries are added, removed or renamed,
+    so each directory also records the mtimes of its metadata files, which
+    are checked before it is reused. Editing a media file in place (rather
+    than replacing it) is picked up on the next scan after its directory
+    changes, or after :meth:`clear`.
+    """
+
+    SCHEMA_VERSION = 4
+
+    def __init__(self, path: Path):
+        import sqlite3  # deferred: most commands never open an index
+
+        self.path = Path(path)
+        self._conn = sqlite3.connect(str(self.path))
+        self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != self.SCHEMA_VERSION:
+            self._conn.executescript(
+                """
+                DROP TABLE IF EXISTS directories;
+                DROP TABLE IF EXISTS entries;
+                DROP TABLE IF EXISTS settings;
+                DROP TABLE IF EXISTS fingerprints;
+                """
+            )
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS directories (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                subdirs TEXT NOT NULL,
+                metadata_mtimes TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                path TEXT PRIMARY KEY,
+                directory TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                companion_mtime_ns INTEGER,
+                item TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_directory ON entries (directory);
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                digest TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS settings (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """
+        )
+        self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def directories(self) -> Dict[str, DirectoryRecord]:
+        rows = self._conn.execute("SELECT path, mtime_ns, subdirs, metadata_mtimes FROM directories")
+        return {
+            path: DirectoryRecord(
+                path=path, mtime_ns=mtime_ns, subdirs=json.loads(subdirs), metadata_mtimes=json.loads(metadata_mtimes)
+            )
+            for path, mtime_ns, subdirs, metadata_mtimes in rows
+        }
+
+    def entries(self, directory: str) -> Dict[str, IndexedEntry]:
+        rows = self._conn.execute(
+            "SELECT path, mtime_ns, size, companion_mtime_ns, item FROM entries WHERE directory = ? ORDER BY path",
+            (directory,),
+        )
+        return {
+            path: IndexedEntry(
+                path=path,
+                mtime_ns=mtime_ns,
+                size=size,
+                companion_mtime_ns=companion_mtime_ns,
+                item=MediaItem.from_dict(json.loads(item)),
+            )
+            for path, mtime_ns, size, companion_mtime_ns, item in rows
+        }
+
+    def fingerprints(self) -> Dict[str, Tuple[int, int, str]]:
+        rows = self._conn.execute("SELECT path, mtime_ns, size, digest FROM fingerprints")
+        return {path: (mtime_ns, size, digest) for path, mtime_ns, size, digest in rows}
+
+    def replace_fingerprints(self, fingerprints: Dict[str, Tuple[int, int, str]]) -> None:
+        self._conn.execute("DELETE FROM fingerprints")
+        self._conn.executemany(
+            "INSERT INTO fingerprints (path, mtime_ns, size, digest) VALUES (?, ?, ?, ?)",
+            [(path, *stamp) for path, stamp in fingerprints.items()],
+        )
+        self._conn.commit()
+
+    def setting(self, name: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM settings WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_setting(self, name: str, value: Optional[str]) -> None:
+        if value is None:
+            self._conn.execute("DELETE FROM settings WHERE name = ?", (name,))
+        else:
+            self._conn.execute("INSERT OR REPLACE INTO settings (name, value) VALUES (?, ?)", (name, value))
+
+    def replace_directory(self, record: DirectoryRecord, entries: Iterable[IndexedEntry]) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO directories (path, mtime_ns, subdirs, metadata_mtimes) VALUES (?, ?, ?, ?)",
+            (record.path, record.mtime_ns, json.dumps(record.subdirs), json.dumps(record.metadata_mtimes)),
+        )
+        self._conn.execute("DELETE FROM entries WHERE directory = ?", (record.path,))
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO entries (path, directory, mtime_ns, size, companion_mtime_ns, item) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    entry.path,
+                    record.path,
+                    entry.mtime_ns,
+                    entry.size,
+                    entry.companion_mtime_ns,
+                    json.dumps(entry.item.to_dict()),
+                )
+                for entry in entries
+            ],
+        )
+
+    def prune(self, keep_directories: Iterable[str]) -> None:
+        """Drop directories (and their entries) that were not seen in the last scan."""
+        keep = set(keep_directories)
+        stale = [path for (path,) in self._conn.execute("SELECT path FROM directories") if path not in keep]
+        self._conn.executemany("DELETE FROM directories WHERE path = ?", [(p,) for p in stale])
+        self._conn.executemany("DELETE FROM entries WHERE directory = ?", [(p,) for p in stale])
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def clear(self) -> None:
+        self._conn.execute("DELETE FROM directories")
+        self._conn.execute("DELETE FROM entries")
+        self._conn.execute("DELETE FROM settings")
+        self._conn.execute("DELETE FROM fingerprints")
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
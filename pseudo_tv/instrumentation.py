@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterator, List
+
+Hook = Callable[[str, str, float], None]
+
+
+@dataclass
+class SpanStats:
+    calls: int = 0
+    total: float = 0.0
+    longest: float = 0.0
+
+
+class Metrics:
+    """Named timing spans and counters for the app's phases.
+
+    Spans accumulate call count, total and longest wall time; counters are
+    plain integers. Code paths report coarse units (one span per phase, one
+    counter update per directory or channel) so the bookkeeping stays off
+    per-item hot loops. Hooks registered with :meth:`add_hook` are called as
+    ``hook(kind, name, value)`` with ``kind`` ``"span"`` (value in seconds)
+    or ``"counter"`` (value is the increment), so a long-running host can
+    forward metrics as they happen; :meth:`snapshot` gives the totals.
+    """
+
+    def __init__(self) -> None:
+        self.spans: Dict[str, SpanStats] = {}
+        self.counters: Dict[str, int] = {}
+        self._hooks: List[Hook] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.calls += 1
+            stats.total += seconds
+            stats.longest = max(stats.longest, seconds)
+            hooks = self._hooks
+        for hook in hooks:
+            hook("span", name, seconds)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+            hooks = self._hooks
+        for hook in hooks:
+            hook("counter", name, amount)
+
+    def add_hook(self, hook: Hook) -> None:
+        with self._lock:
+            self._hooks = self._hooks + [hook]
+
+    def remove_hook(self, hook: Hook) -> None:
+        with self._lock:
+            self._hooks = [h for h in self._hooks if h is not hook]
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "spans": {name: asdict(stats) for name, stats in self.spans.items()},
+                "counters": dict(self.counters),
+            }
+
+    def format_table(self) -> str:
+        """Phase breakdown, longest total first, followed by the counters."""
+        snapshot = self.snapshot()
+        lines = [f"{'phase':<28} {'calls':>7} {'total ms':>10} {'max ms':>9}"]
+        for name, stats in sorted(snapshot["spans"].items(), key=lambda pair: -pair[1]["total"]):
+            lines.append(
+                f"{name:<28} {stats['calls']:>7} {stats['total'] * 1000:>10.2f} {stats['longest'] * 1000:>9.2f}"
+            )
+        if snapshot["counters"]:
+            lines.append("")
+            lines.extend(f"{name:<28} {value:>7}" for name, value in sorted(snapshot["counters"].items()))
+        return "\n".join(lines)
+
+
+metrics = Metrics()
+span = metrics.span
+count = metrics.count
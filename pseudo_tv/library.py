@@ -1,16 +1,69 @@
 from __future__ import annotations
 
+import fnmatch
 import json
-import re
-from dataclasses import dataclass
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
 from datetime import timedelta
 from pathlib import Path
-from typing import Iterable, List, Sequence
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
+from .index import DirectoryRecord, IndexedEntry, LibraryIndex
+from .instrumentation import count, span
 from .models import MediaItem
+from .parsing import FilenameParser
+from .probe import probe_duration
 
 
 _META_SUFFIX = ".meta.json"
+MANIFEST_NAMES = ("pseudo_tv.manifest.json", "pseudo_tv.manifest.jsonl")
+
+
+@dataclass
+class _DirectoryScan:
+    """Result of visiting one directory; ``record`` is set when the index needs updating."""
+
+    directory: str
+    subdirs: List[str]
+    items: List[MediaItem]
+    record: Optional[DirectoryRecord] = None
+    entries: List[IndexedEntry] = field(default_factory=list)
+
+
+@dataclass
+class _DirectoryMetadata:
+    """Which companions exist in a directory and its manifest, as of ``mtime_ns``."""
+
+    mtime_ns: int
+    names: Set[str]
+    manifest: Dict[str, dict]
+    manifest_mtime_ns: Optional[int]
+
+
+def _read_metadata_file(path: str) -> Dict[str, dict]:
+    """Entries of a manifest or catalog, keyed by file name or path.
+
+    ``.jsonl`` files hold one object per line with a ``file`` key; anything
+    else is a single JSON object mapping names to metadata. Unreadable files
+    and malformed lines are skipped.
+    """
+    try:
+        with open(path, encoding="utf-8") as handle:
+            if not path.endswith(".jsonl"):
+                data = json.load(handle)
+                return {str(name): fields for name, fields in data.items() if isinstance(fields, dict)}
+            entries = {}
+            for line in handle:
+                try:
+                    fields = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(fields, dict) and fields.get("file"):
+                    entries[str(fields.pop("file"))] = fields
+            return entries
+    except (OSError, ValueError, AttributeError):
+        return {}
 
 
 @dataclass
@@ -20,40 +73,443 @@ class LibraryScanner:
     The scanner uses filename parsing with fallbacks to companion
     ``*.meta.json`` files that can include ``title``, ``duration_minutes``,
     ``genre``, ``show``, ``season``, ``episode``, and ``year``.
+
+    When an ``index`` is supplied, scans are incremental: directories whose
+    mtime and metadata files are unchanged are served from the index, and within changed
+    directories only files whose mtime, size or companion mtime changed are
+    parsed again.
+
+    Directories are listed with ``os.scandir`` so file types come from the
+    directory entries rather than a stat per file. With ``workers > 1`` roots
+    and subdirectories are listed concurrently on a bounded thread pool;
+    directories whose name matches one of ``ignore_dirs`` (shell-style
+    patterns) are pruned. Items are always returned depth-first in name
+    order, regardless of the number of workers.
+
+    Filenames are parsed by ``parser``; pass a :class:`FilenameParser` with
+    extra rules to support other naming schemes.
+
+    With ``probe_durations`` the real runtime is read from the container
+    headers (see :func:`~pseudo_tv.probe.probe_duration`) for files whose
+    companion does not give one, on ``probe_workers`` threads. Probed items
+    are stored in the index like any other, so unchanged files are not
+    probed again.
+
+    Metadata for many files can also come from one manifest per directory
+    (any of ``manifest_names``) and from a library-wide ``catalog``; both
+    are JSON objects mapping names to companion fields, or JSONL with one
+    object per line and a ``file`` key. Manifest keys are file names;
+    catalog keys are paths, relative ones taken from the catalog's
+    directory. Each is read once per scan, and a per-file companion
+    overrides the manifest, which overrides the catalog. Outside full scans
+    (:meth:`scan_file`) directory listings are cached by mtime, so missing
+    companions are not looked up again until the directory changes.
+
+    With ``dedupe`` set to a preference (``first``, ``last``, ``newest`` or
+    ``oldest``) files with identical content, such as the same episode in two
+    roots, are collapsed into one item by a
+    :class:`~pseudo_tv.fingerprint.Deduplicator` running on
+    ``dedupe_workers`` threads. Fingerprints are kept in the index when there
+    is one. :meth:`scan_file` and :meth:`scan_tree` do not dedupe.
     """
 
     media_roots: Sequence[Path]
     supported_extensions: Sequence[str] = (".mp4", ".mkv", ".mov", ".avi", ".mp3")
+    index: Optional[LibraryIndex] = None
+    workers: int = 1
+    ignore_dirs: Sequence[str] = ()
+    parser: FilenameParser = field(default_factory=FilenameParser)
+    probe_durations: bool = False
+    probe_workers: int = 4
+    manifest_names: Sequence[str] = MANIFEST_NAMES
+    catalog: Optional[Path] = None
+    dedupe: Optional[str] = None
+    dedupe_workers: int = 4
+    _deduplicator: Optional[Any] = field(default=None, init=False, repr=False, compare=False)
+    _probe_pool: Optional[Any] = field(default=None, init=False, repr=False, compare=False)
+    _catalog_entries: Dict[str, dict] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _catalog_key: Optional[Tuple[int, int]] = field(default=None, init=False, repr=False, compare=False)
+    _directories: Dict[str, _DirectoryMetadata] = field(default_factory=dict, init=False, repr=False, compare=False)
 
     def scan(self) -> List[MediaItem]:
+        roots = [str(root) for root in self.media_roots]
+        with span("library.scan"), self._probing():
+            scanned = {result.directory: result for result in self._visit_all()}
+            items = self._ordered_items(roots, scanned)
+        if self.dedupe:
+            items = self._dedupe(items)
+        return items
+
+    def iter_scan(self, root_done: Optional[Callable[[str], None]] = None) -> Iterator[MediaItem]:
+        """Yield items directory by directory as they are scanned.
+
+        With one worker the order matches :meth:`scan`; with more, directories
+        come in the order they finish. ``root_done(root)`` is called once
+        everything under a media root has been yielded. The index is updated
+        as directories are visited and pruned only if the generator runs to
+        the end. Items are not deduplicated.
+        """
+        with self._probing():
+            for result in self._visit_all(root_done):
+                yield from result.items
+
+    @contextmanager
+    def _probing(self) -> Iterator[None]:
+        """Run duration probes on a thread pool for the duration of a scan, if enabled."""
+        if not self.probe_durations or self.probe_workers <= 1:
+            yield
+            return
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=self.probe_workers) as pool:
+            self._probe_pool = pool
+            try:
+                yield
+            finally:
+                self._probe_pool = None
+
+    def _dedupe(self, items: List[MediaItem]) -> List[MediaItem]:
+        if self._deduplicator is None:
+            from .fingerprint import Deduplicator
+
+            index = self.index
+            self._deduplicator = Deduplicator(
+                prefer=self.dedupe,
+                workers=self.dedupe_workers,
+                load=index.fingerprints if index is not None else None,
+                store=index.replace_fingerprints if index is not None else None,
+            )
+        return self._deduplicator.dedupe(items)
+
+    def _visit_all(self, root_done: Optional[Callable[[str], None]] = None) -> Iterator[_DirectoryScan]:
+        """Visit every directory under the media roots, yielding each result as it is ready."""
+        self._load_catalog()
+        index = self.index
+        known = index.directories() if index is not None else {}
+        if index is not None:
+            catalog_key = json.dumps(self._catalog_key)
+            if index.setting("catalog") != catalog_key:
+                # Catalog edits touch no directory mtime; relist everything once.
+                known = {}
+                index.set_setting("catalog", catalog_key)
+        visited: Set[str] = set()
+
+        def visit_args(directory: str) -> tuple:
+            record = known.get(directory)
+            previous = index.entries(directory) if index is not None and record is not None else {}
+            return directory, record, previous
+
+        def collect(result: Optional[_DirectoryScan]) -> List[str]:
+            if result is None:
+                return []
+            visited.add(result.directory)
+            if index is not None and result.record is not None:
+                index.replace_directory(result.record, result.entries)
+            return result.subdirs
+
+        roots = [str(root) for root in self.media_roots]
+        if self.workers <= 1:
+            for root in roots:
+                pending = [root]
+                while pending:
+                    result = self._visit_directory(*visit_args(pending.pop()))
+                    pending.extend(reversed(collect(result)))
+                    if result is not None:
+                        yield result
+                if root_done is not None:
+                    root_done(root)
+        else:
+            from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+            outstanding = dict.fromkeys(roots, 0)  # directories submitted but not yet collected, per root
+            owners: Dict[Any, str] = {}
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+
+                def submit(directory: str, root: str):
+                    outstanding[root] += 1
+                    future = pool.submit(self._visit_directory, *visit_args(directory))
+                    owners[future] = root
+                    return future
+
+                futures = {submit(root, root) for root in roots}
+                while futures:
+                    done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        root = owners.pop(future)
+                        result = future.result()
+                        for subdir in collect(result):
+                            futures.add(submit(subdir, root))
+                        if result is not None:
+                            yield result
+                        outstanding[root] -= 1
+                        if outstanding[root] == 0 and root_done is not None:
+                            root_done(root)
+
+        if index is not None:
+            index.prune(visited)
+            index.commit()
+
+    @staticmethod
+    def _ordered_items(roots: Sequence[str], scanned: Dict[str, _DirectoryScan]) -> List[MediaItem]:
+        # Depth-first, name-sorted order so the result does not depend on
+        # which worker finished first.
         items: List[MediaItem] = []
-        for root in self.media_roots:
-            for path in root.rglob("*"):
-                if not path.is_file():
-                    continue
-                if path.suffix.lower() not in self.supported_extensions and not path.name.endswith(_META_SUFFIX):
-                    continue
-                if path.name.endswith(_META_SUFFIX):
-                    # Metadata file; will be consumed when paired with a real media file.
-                    continue
-                metadata = self._load_companion_metadata(path)
-                item = self._build_item(path, metadata)
-                items.append(item)
+        pending = list(reversed(roots))
+        while pending:
+            result = scanned.get(pending.pop())
+            if result is None:
+                continue
+            items.extend(result.items)
+            pending.extend(reversed(result.subdirs))
         return items
 
+    def _visit_directory(
+        self, directory: str, record: Optional[DirectoryRecord], previous: Dict[str, IndexedEntry]
+    ) -> Optional[_DirectoryScan]:
+        track_changes = self.index is not None
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns if track_changes else 0
+        except OSError:
+            return None
+        count("scan.directories")
+        if track_changes:
+            count("scan.stats")
+        if record is not None and record.mtime_ns == mtime_ns and self._metadata_unchanged(directory, record):
+            count("scan.directories_reused")
+            return _DirectoryScan(
+                directory=directory,
+                subdirs=record.subdirs,
+                items=[entry.item for entry in previous.values()],
+            )
+
+        subdirs: List[str] = []
+        media: List[os.DirEntry] = []
+        names = set()
+        try:
+            with os.scandir(directory) as listing:
+                for entry in listing:
+                    names.add(entry.name)
+                    if entry.is_dir(follow_symlinks=False):
+                        if not self.is_ignored_dir(entry.name):
+                            subdirs.append(entry.path)
+                    elif entry.name.endswith(_META_SUFFIX):
+                        # Metadata file; will be consumed when paired with a real media file.
+                        continue
+                    elif os.path.splitext(entry.name)[1].lower() in self.supported_extensions and entry.is_file():
+                        media.append(entry)
+        except OSError:
+            return None
+        subdirs.sort()
+        media.sort(key=lambda e: e.name)
+        count("scan.files", len(media))
+
+        # Stat the manifests before reading them, so an edit in between is seen next time.
+        metadata_mtimes = self._manifest_mtimes(directory, names) if track_changes else {}
+        manifest, _ = self._load_manifest(directory, names, stat=False)
+        manifest_mtime_ns = max(metadata_mtimes.values(), default=None)
+
+        if not track_changes:
+            pending = []
+            for entry, parsed in zip(media, self.parser.parse_many(entry.name for entry in media)):
+                path = Path(entry.path)
+                metadata = self._metadata(path, manifest, entry.name + _META_SUFFIX in names)
+                pending.append((path, metadata, parsed))
+            items = self._build_items(pending)
+            count("scan.files_parsed", len(media))
+            return _DirectoryScan(directory=directory, subdirs=subdirs, items=items)
+
+        slots: List[Optional[IndexedEntry]] = []
+        stale = []
+        for entry in media:
+            companion_name = entry.name + _META_SUFFIX
+            has_companion = companion_name in names
+            try:
+                stat = entry.stat()
+                companion_mtime_ns = (
+                    os.stat(os.path.join(directory, companion_name)).st_mtime_ns if has_companion else None
+                )
+            except OSError:
+                continue
+            if companion_mtime_ns is not None:
+                metadata_mtimes[companion_name] = companion_mtime_ns
+            if manifest_mtime_ns is not None or self._catalog_key is not None:
+                companion_mtime_ns = self._metadata_signature(companion_mtime_ns, manifest_mtime_ns)
+            cached = previous.get(entry.path)
+            if cached is not None and cached.is_current(stat.st_mtime_ns, stat.st_size, companion_mtime_ns):
+                slots.append(cached)
+                continue
+            metadata = self._metadata(Path(entry.path), manifest, has_companion)
+            stale.append((len(slots), entry.path, stat, companion_mtime_ns, metadata))
+            slots.append(None)
+
+        built = self._build_items([(Path(path), metadata, None) for _, path, _, _, metadata in stale])
+        for (slot, path, stat, companion_mtime_ns, _), item in zip(stale, built):
+            slots[slot] = IndexedEntry(
+                path=path,
+                mtime_ns=stat.st_mtime_ns,
+                size=stat.st_size,
+                companion_mtime_ns=companion_mtime_ns,
+                item=item,
+            )
+        entries = [cached for cached in slots if cached is not None]
+        items = [cached.item for cached in entries]
+        count("scan.stats", sum(2 if entry.name + _META_SUFFIX in names else 1 for entry in media))
+        count("scan.files_parsed", len(stale))
+
+        return _DirectoryScan(
+            directory=directory,
+            subdirs=subdirs,
+            items=items,
+            record=DirectoryRecord(path=directory, mtime_ns=mtime_ns, subdirs=subdirs, metadata_mtimes=metadata_mtimes),
+            entries=entries,
+        )
+
+    @staticmethod
+    def _metadata_unchanged(directory: str, record: DirectoryRecord) -> bool:
+        """Whether every metadata file ``record`` saw still has the mtime it had then."""
+        count("scan.stats", len(record.metadata_mtimes))
+        for name, mtime_ns in record.metadata_mtimes.items():
+            try:
+                if os.stat(os.path.join(directory, name)).st_mtime_ns != mtime_ns:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def scan_file(self, path: Path) -> Optional[MediaItem]:
+        """The item for one media file, or ``None`` if ``path`` is not (or no longer) one."""
+        if path.suffix.lower() not in self.supported_extensions or not path.is_file():
+            return None
+        self._load_catalog()
+        listing = self._directory_metadata(str(path.parent))
+        if listing is None:
+            return None
+        metadata = self._metadata(path, listing.manifest, path.name + _META_SUFFIX in listing.names)
+        return self._build_items([(path, metadata, None)])[0]
+
+    def scan_tree(self, directory: Path) -> List[MediaItem]:
+        """Scan a single directory tree with this scanner's settings, bypassing the index."""
+        return replace(self, media_roots=[directory], index=None, dedupe=None).scan()
+
+    def is_ignored_dir(self, name: str) -> bool:
+        """Whether a directory called ``name`` matches one of ``ignore_dirs`` and is skipped."""
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.ignore_dirs)
+
+    def _directory_metadata(self, directory: str) -> Optional[_DirectoryMetadata]:
+        """The cached listing of ``directory``, refreshed when it or its manifest changes."""
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._directories.get(directory)
+        if cached is not None and cached.mtime_ns == mtime_ns:
+            manifest_mtime_ns = cached.manifest_mtime_ns
+            if manifest_mtime_ns is None or self._manifest_mtime(directory, cached.names) == manifest_mtime_ns:
+                return cached
+        try:
+            names = set(os.listdir(directory))
+        except OSError:
+            return None
+        manifest, manifest_mtime_ns = self._load_manifest(directory, names, stat=True)
+        listing = _DirectoryMetadata(mtime_ns, names, manifest, manifest_mtime_ns)
+        self._directories[directory] = listing
+        return listing
+
+    def _manifest_mtime(self, directory: str, names: Set[str]) -> Optional[int]:
+        return max(self._manifest_mtimes(directory, names).values(), default=None)
+
+    def _manifest_mtimes(self, directory: str, names: Set[str]) -> Dict[str, int]:
+        stamps = {}
+        for name in self.manifest_names:
+            if name in names:
+                try:
+                    stamps[name] = os.stat(os.path.join(directory, name)).st_mtime_ns
+                except OSError:
+                    pass
+        return stamps
+
+    def _load_manifest(self, directory: str, names: Set[str], stat: bool) -> Tuple[Dict[str, dict], Optional[int]]:
+        """Merged entries of the manifests listed in ``names`` and, with ``stat``, their newest mtime."""
+        manifest: Dict[str, dict] = {}
+        found = [name for name in self.manifest_names if name in names]
+        if not found:
+            return manifest, None
+        mtime_ns = self._manifest_mtime(directory, names) if stat else None
+        for name in found:
+            count("scan.manifest_reads")
+            manifest.update(_read_metadata_file(os.path.join(directory, name)))
+        return manifest, mtime_ns
+
+    def _load_catalog(self) -> None:
+        """(Re)read ``catalog`` if it changed since the last scan."""
+        if self.catalog is None:
+            return
+        path = os.path.abspath(self.catalog)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._catalog_entries, self._catalog_key = {}, None
+            return
+        key = (stat.st_mtime_ns, stat.st_size)
+        if key == self._catalog_key:
+            return
+        count("scan.catalog_reads")
+        base = os.path.dirname(path)
+        self._catalog_entries = {
+            os.path.normpath(os.path.join(base, name)): fields for name, fields in _read_metadata_file(path).items()
+        }
+        self._catalog_key = key
+
+    def _metadata_signature(self, companion_mtime_ns: Optional[int], manifest_mtime_ns: Optional[int]) -> int:
+        # Stored in the index's companion mtime column, so editing the
+        # companion, the manifest or the catalog all invalidate the entry.
+        parts = (companion_mtime_ns, manifest_mtime_ns) + (self._catalog_key or (None, None))
+        return hash(tuple(-1 if part is None else part for part in parts))
+
+    def _metadata(self, media_path: Path, manifest: Dict[str, dict], has_companion: bool) -> dict:
+        """Catalog, manifest and companion fields for ``media_path``, later sources winning."""
+        metadata: dict = {}
+        if self._catalog_entries:
+            metadata.update(self._catalog_entries.get(os.path.abspath(media_path), ()))
+        if manifest:
+            metadata.update(manifest.get(media_path.name, ()))
+        if has_companion:
+            metadata.update(self._load_companion_metadata(media_path))
+        return metadata
+
     def _load_companion_metadata(self, media_path: Path) -> dict:
         companion = media_path.with_name(media_path.name + _META_SUFFIX)
-        if companion.exists():
-            try:
-                return json.loads(companion.read_text())
-            except json.JSONDecodeError:
-                pass
-        return {}
+        count("scan.companion_reads")
+        try:
+            return json.loads(companion.read_text())
+        except (OSError, json.JSONDecodeError):
+            return {}
 
-    def _build_item(self, path: Path, metadata: dict) -> MediaItem:
-        parsed = self._parse_filename(path.name)
+    def _build_items(self, pending: Sequence[Tuple[Path, dict, Optional[dict]]]) -> List[MediaItem]:
+        """Build items for ``(path, metadata, parsed)`` triples, probing durations first if enabled."""
+        probed: List[Optional[float]] = [None] * len(pending)
+        if self.probe_durations:
+            targets = [i for i, (_, metadata, _) in enumerate(pending) if not metadata.get("duration_minutes")]
+            paths = [pending[i][0] for i in targets]
+            pool = self._probe_pool
+            concurrent = pool is not None and len(paths) > 1
+            results = pool.map(probe_duration, paths) if concurrent else map(probe_duration, paths)
+            for i, seconds in zip(targets, results):
+                probed[i] = seconds
+            count("scan.probes", len(paths))
+        return [
+            self._build_item(path, metadata, parsed, seconds)
+            for (path, metadata, parsed), seconds in zip(pending, probed)
+        ]
+
+    def _build_item(
+        self, path: Path, metadata: dict, parsed: Optional[dict] = None, probed_seconds: Optional[float] = None
+    ) -> MediaItem:
+        if parsed is None:
+            parsed = self._parse_filename(path.name)
         title = metadata.get("title") or parsed.get("title") or path.stem
-        duration_minutes = metadata.get("duration_minutes") or parsed.get("duration") or 30
+        probed_minutes = probed_seconds / 60 if probed_seconds else None
+        duration_minutes = metadata.get("duration_minutes") or probed_minutes or parsed.get("duration") or 30
         genre = metadata.get("genre") or parsed.get("genre")
         show = metadata.get("show") or parsed.get("show")
         season = metadata.get("season") or parsed.get("season")
@@ -72,33 +528,7 @@ class LibraryScanner:
 
     def _parse_filename(self, name: str) -> dict:
         # Pattern: Show.Name.S01E02.Title[Genre].ext or Movie.Title.2012[Genre].ext
-        base = name.rsplit(".", 1)[0]
-        tv_match = re.match(
-            r"(?P<show>.+?)\s*[.-]\s*S(?P<season>\d{1,2})E(?P<episode>\d{1,2})\s*[.-]?\s*(?P<title>[^\[]+)?(?:\[(?P<genre>[^\]]+)\])?",
-            base,
-            re.IGNORECASE,
-        )
-        if tv_match:
-            data = tv_match.groupdict()
-            season = int(data["season"])
-            episode = int(data["episode"])
-            return {
-                "show": data.get("show"),
-                "season": season,
-                "episode": episode,
-                "title": (data.get("title") or "").replace(".", " ").strip() or f"Episode {episode}",
-                "genre": (data.get("genre") or "").strip() or None,
-            }
-        movie_match = re.match(r"(?P<title>.+?)\s*(?P<year>\d{4})?(?:\[(?P<genre>[^\]]+)\])?", base)
-        if movie_match:
-            data = movie_match.groupdict()
-            year = int(data["year"]) if data.get("year") else None
-            return {
-                "title": (data.get("title") or "").replace(".", " ").strip(),
-                "year": year,
-                "genre": (data.get("genre") or "").strip() or None,
-            }
-        return {"title": base}
+        return self.parser.parse(name)
 
     @staticmethod
     def format_items(items: Iterable[MediaItem]) -> str:
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Set
+
+from .models import ChannelRule, MediaItem
+
+
+class ItemIndex:
+    """Inverted index over a library for evaluating :class:`ChannelRule` s.
+
+    Items are identified by their position in the library. Genres and shows
+    map (case-insensitively) to sets of ids, runtimes are kept as a sorted
+    column so minimum/maximum runtime filters become a bisected range, and
+    paths are kept sorted so an ``include_paths`` prefix is a contiguous
+    slice. Selecting items for a rule therefore costs roughly the size of
+    the result instead of the size of the library.
+    """
+
+    def __init__(self, library: Iterable[MediaItem]):
+        self.items: List[MediaItem] = list(library)
+        self.genres: Dict[str, Set[int]] = {}
+        self.shows: Dict[str, Set[int]] = {}
+        self._genre_keys: List[Optional[str]] = []
+        self._minutes: List[float] = []
+        for item_id, item in enumerate(self.items):
+            genre = item.genre.lower() if item.genre else None
+            self._genre_keys.append(genre)
+            if genre is not None:
+                self.genres.setdefault(genre, set()).add(item_id)
+            if item.show:
+                self.shows.setdefault(item.show.lower(), set()).add(item_id)
+            self._minutes.append(item.duration_us / 60_000_000)
+
+        by_runtime = sorted(range(len(self.items)), key=self._minutes.__getitem__)
+        self._runtime_ids = by_runtime
+        self._runtime_values = [self._minutes[i] for i in by_runtime]
+
+        by_path = sorted((item.path_string, item_id) for item_id, item in enumerate(self.items))
+        self._path_keys = [path for path, _ in by_path]
+        self._path_ids = [item_id for _, item_id in by_path]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def with_path_prefix(self, prefix: str) -> List[int]:
+        start = bisect_left(self._path_keys, prefix)
+        # Every string starting with ``prefix`` sorts before ``prefix + U+10FFFF``.
+        end = bisect_left(self._path_keys, prefix + "\U0010ffff", start)
+        return self._path_ids[start:end]
+
+    def with_runtime(self, minimum: Optional[float], maximum: Optional[float]) -> List[int]:
+        start = bisect_left(self._runtime_values, minimum) if minimum else 0
+        end = bisect_right(self._runtime_values, maximum) if maximum else len(self._runtime_values)
+        return self._runtime_ids[start:end]
+
+    def select_ids(self, rule: ChannelRule) -> List[int]:
+        """Ids of items matching ``rule``, in library order.
+
+        Equivalent to ``[i for i, item in enumerate(items) if rule.matches(item)]``.
+        """
+        constraints: List[Set[int]] = []
+        if rule.include_genres:
+            constraints.append(self._union(self.genres, rule.include_genres))
+        if rule.include_shows:
+            constraints.append(self._union(self.shows, rule.include_shows))
+        if rule.include_paths:
+            constraints.append({i for prefix in rule.include_paths for i in self.with_path_prefix(prefix)})
+
+        minimum = rule.minimum_runtime_minutes
+        maximum = rule.maximum_runtime_minutes
+        if constraints:
+            constraints.sort(key=len)
+            candidates = set(constraints[0])
+            for other in constraints[1:]:
+                candidates &= other
+            if minimum or maximum:
+                minutes = self._minutes
+                candidates = {
+                    i
+                    for i in candidates
+                    if not (minimum and minutes[i] < minimum) and not (maximum and minutes[i] > maximum)
+                }
+        elif minimum or maximum:
+            candidates = set(self.with_runtime(minimum, maximum))
+        else:
+            candidates = set(range(len(self.items)))
+
+        if rule.exclude_genres:
+            excluded = {g.lower() for g in rule.exclude_genres}
+            genre_keys = self._genre_keys
+            candidates = {i for i in candidates if genre_keys[i] not in excluded}
+        return sorted(candidates)
+
+    def select(self, rule: ChannelRule) -> List[MediaItem]:
+        items = self.items
+        return [items[i] for i in self.select_ids(rule)]
+
+    @staticmethod
+    def _union(buckets: Dict[str, Set[int]], keys: Iterable[str]) -> Set[int]:
+        result: Set[int] = set()
+        for key in {k.lower() for k in keys}:
+            result |= buckets.get(key, set())
+        return result
@@ -1,23 +1,72 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import os
+import random
+import sys
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence
+
+from .instrumentation import count
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .matching import ItemIndex
+
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
 
 
-@dataclass
 class MediaItem:
-    """Represents a single playable item in the library."""
+    """Represents a single playable item in the library.
+
+    Items are kept small because large libraries hold millions of them:
+    the class has ``__slots__``, ``genre``, ``show`` and the parent
+    directory are interned so items in the same folder or series share one
+    string, and the duration is stored as integer microseconds. ``path`` and
+    ``duration`` are rebuilt on access; hot loops should read
+    ``path_string`` and ``duration_us`` instead. ``label`` is computed on
+    first use and cached, so items should be treated as immutable.
+    """
+
+    __slots__ = ("directory", "name", "title", "duration_us", "genre", "show", "season", "episode", "year", "_label")
 
-    path: Path
-    title: str
-    duration: timedelta
-    genre: Optional[str] = None
-    show: Optional[str] = None
-    season: Optional[int] = None
-    episode: Optional[int] = None
-    year: Optional[int] = None
+    def __init__(
+        self,
+        path: Path | str,
+        title: str,
+        duration: timedelta,
+        genre: Optional[str] = None,
+        show: Optional[str] = None,
+        season: Optional[int] = None,
+        episode: Optional[int] = None,
+        year: Optional[int] = None,
+    ):
+        directory, self.name = os.path.split(os.fspath(path))
+        self.directory = sys.intern(directory)
+        self.title = title
+        self.duration_us = duration // _MICROSECOND
+        self.genre = _intern(genre)
+        self.show = _intern(show)
+        self.season = season
+        self.episode = episode
+        self.year = year
+        self._label: Optional[str] = None
+
+    @property
+    def path(self) -> Path:
+        return Path(self.path_string)
+
+    @property
+    def path_string(self) -> str:
+        return os.path.join(self.directory, self.name) if self.directory else self.name
+
+    @property
+    def duration(self) -> timedelta:
+        return timedelta(microseconds=self.duration_us)
 
     @property
     def is_episode(self) -> bool:
@@ -25,6 +74,12 @@ class MediaItem:
 
     @property
     def label(self) -> str:
+        label = self._label
+        if label is None:
+            label = self._label = self.format_label()
+        return label
+
+    def format_label(self) -> str:
         if self.is_episode:
             season_str = f"S{self.season:02d}" if self.season is not None else "S??"
             episode_str = f"E{self.episode:02d}" if self.episode is not None else "E??"
@@ -32,6 +87,63 @@ class MediaItem:
         year = f" ({self.year})" if self.year else ""
         return f"{self.title}{year}"
 
+    def _key(self) -> tuple:
+        return (
+            self.path_string,
+            self.title,
+            self.duration_us,
+            self.genre,
+            self.show,
+            self.season,
+            self.episode,
+            self.year,
+        )
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is self.__class__:
+            return self._key() == other._key()
+        return NotImplemented
+
+    __hash__ = None  # mutable value type, as when this was an eq=True dataclass
+
+    def __repr__(self) -> str:
+        return (
+            f"MediaItem(path={self.path!r}, title={self.title!r}, duration={self.duration!r}, genre={self.genre!r}, "
+            f"show={self.show!r}, season={self.season!r}, episode={self.episode!r}, year={self.year!r})"
+        )
+
+    def __getstate__(self):
+        return self._key()
+
+    def __setstate__(self, state) -> None:
+        path, title, duration_us, genre, show, season, episode, year = state
+        self.__init__(path, title, duration_us * _MICROSECOND, genre, show, season, episode, year)
+
+    def to_dict(self) -> Dict:
+        return {
+            "path": self.path_string,
+            "title": self.title,
+            "duration_seconds": self.duration_us / 1_000_000,
+            "genre": self.genre,
+            "show": self.show,
+            "season": self.season,
+            "episode": self.episode,
+            "year": self.year,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "MediaItem":
+        return cls(
+            path=data["path"],
+            title=data["title"],
+            duration=timedelta(seconds=data["duration_seconds"]),
+            genre=data.get("genre"),
+            show=data.get("show"),
+            season=data.get("season"),
+            episode=data.get("episode"),
+            year=data.get("year"),
+        )
+
 
 @dataclass
 class ChannelRule:
@@ -52,11 +164,12 @@ class ChannelRule:
             if not item.show or item.show.lower() not in {s.lower() for s in self.include_shows}:
                 return False
         if self.include_paths:
-            if not any(str(item.path).startswith(p) for p in self.include_paths):
+            path = item.path_string
+            if not any(path.startswith(p) for p in self.include_paths):
                 return False
         if self.exclude_genres and item.genre and item.genre.lower() in {g.lower() for g in self.exclude_genres}:
             return False
-        minutes = item.duration.total_seconds() / 60
+        minutes = item.duration_us / 60_000_000
         if self.minimum_runtime_minutes and minutes < self.minimum_runtime_minutes:
             return False
         if self.maximum_runtime_minutes and minutes > self.maximum_runtime_minutes:
@@ -66,18 +179,66 @@ class ChannelRule:
 
 @dataclass
 class Channel:
-    """A pseudo channel built from matching library items."""
+    """A pseudo channel built from matching library items.
+
+    With ``max_items`` the pool is a uniform sample of that many matching
+    items, kept in library order, so huge catch-all channels stay bounded.
+
+    Configured channels are templates: the scheduler builds from copies made
+    by :meth:`selected`, whose ``items`` is a tuple that is never changed, so
+    a schedule's channels stay as they were while the next one is built.
+    """
 
     name: str
     rules: ChannelRule
-    items: List[MediaItem] = field(default_factory=list)
+    items: Sequence[MediaItem] = field(default_factory=list)
     shuffle: bool = True
     allow_repeats: bool = False
+    max_items: Optional[int] = None
+
+    def selected(
+        self, library: Iterable[MediaItem], index: Optional["ItemIndex"] = None, seed: object = None
+    ) -> "Channel":
+        """A copy of this channel with ``items`` picked from the library; this channel is left as it is.
+
+        ``index`` is used when one is supplied, and ``seed`` makes the
+        ``max_items`` sample reproducible.
+        """
+        return self.with_items(self._matching(library, index, seed))
+
+    def select_items(
+        self, library: Iterable[MediaItem], index: Optional["ItemIndex"] = None, seed: object = None
+    ) -> None:
+        """Fill ``items`` in place; see :meth:`selected`."""
+        self.items = self._matching(library, index, seed)
 
-    def select_items(self, library: Iterable[MediaItem]) -> None:
-        self.items = [item for item in library if self.rules.matches(item)]
-        if not self.items:
+    def with_items(self, items: Iterable[MediaItem]) -> "Channel":
+        return replace(self, items=tuple(items))
+
+    def selected_ids(self, index: "ItemIndex", seed: object = None) -> List[int]:
+        """Positions in ``index`` of the items :meth:`selected` would pick."""
+        count("rules.indexed_selects")
+        return self._sampled(index.select_ids(self.rules), seed)
+
+    def _matching(self, library: Iterable[MediaItem], index: Optional["ItemIndex"], seed: object) -> List[MediaItem]:
+        if index is not None:
+            items = index.items
+            return [items[i] for i in self.selected_ids(index, seed)]
+        library = library if isinstance(library, Sequence) else list(library)
+        count("rules.evaluations", len(library))
+        return self._sampled([item for item in library if self.rules.matches(item)], seed)
+
+    def _sampled(self, matches: List, seed: object) -> List:
+        if not matches:
             raise ValueError(f"Channel '{self.name}' has no matching items.")
+        if self.max_items and len(matches) > self.max_items:
+            keep = sorted(self.sample_random(seed).sample(range(len(matches)), self.max_items))
+            matches = [matches[i] for i in keep]
+        return matches
+
+    def sample_random(self, seed: object = None) -> random.Random:
+        """Generator for the ``max_items`` sample of this channel."""
+        return random.Random(f"{seed}:{self.name}:sample")
 
 
 @dataclass
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Pattern, Sequence, Union
+
+
+# Named groups a rule may define. Other groups are ignored.
+FIELDS = ("show", "season", "episode", "episode_end", "absolute", "title", "genre", "year", "month", "day")
+
+_GENRE = r"(?:\[(?P<genre>[^\]]+)\])?"
+# The built-in TV rule in two parts: everything up to the ``E`` of ``SxxEyy``
+# is decided by the show and season alone, which lets parse_many reuse it.
+_TV_HEAD = r"(?P<show>.+?)\s*[.-]\s*S(?P<season>\d{1,2})E"
+_TV_TAIL = r"(?P<episode>\d{1,2})\s*[.-]?\s*(?P<title>[^\[]+)?" + _GENRE
+
+
+@dataclass(frozen=True)
+class ParseRule:
+    """A named filename pattern.
+
+    ``pattern`` is matched against the file name without its extension and
+    may use the named groups listed in :data:`FIELDS`. A match with a
+    ``show`` group is treated as an episode, anything else as a movie.
+    """
+
+    name: str
+    pattern: str
+    ignore_case: bool = True
+
+
+BUILTIN_RULES: Sequence[ParseRule] = (
+    # Show.Name.S01E02.Title[Genre]
+    ParseRule("tv", _TV_HEAD + _TV_TAIL),
+    # Movie.Title.2012[Genre] or Movie Title (2012). The greedy title backtracks
+    # from the end, so the last year-like token wins.
+    ParseRule(
+        "movie",
+        r"(?P<title>.+)[\s._-]+\(?(?P<year>(?:19|20)\d{2})\)?[\s._-]*" + _GENRE + r"\s*$",
+        ignore_case=False,
+    ),
+    # Anything else: Title[Genre]
+    ParseRule("title", r"(?P<title>[^\[]+)" + _GENRE + r"\s*$", ignore_case=False),
+)
+
+# Opt-in rules users can enable by name from ``filename_patterns``.
+PRESET_RULES: Dict[str, ParseRule] = {
+    # Show.Name.S01E02E03.Title[Genre] or Show.Name.S01E02-E03.Title[Genre]
+    "multi_episode": ParseRule(
+        "multi_episode",
+        r"(?P<show>.+?)\s*[.-]\s*S(?P<season>\d{1,2})E(?P<episode>\d{1,3})(?:-?E(?P<episode_end>\d{1,3}))+"
+        r"\s*[.-]?\s*(?P<title>[^\[]+)?" + _GENRE,
+    ),
+    # Show.Name.2021.03.14.Title[Genre]
+    "daily": ParseRule(
+        "daily",
+        r"(?P<show>.+?)\s*[.\s_-]\s*(?P<year>(?:19|20)\d{2})[.-](?P<month>\d{2})[.-](?P<day>\d{2})"
+        r"\s*[.\s_-]?\s*(?P<title>[^\[]+)?" + _GENRE,
+    ),
+    # Show Name - 123 - Title[Genre] or Show.Name.E123.Title[Genre]
+    "absolute": ParseRule(
+        "absolute",
+        r"(?P<show>.+?)(?:\s+-\s+|[.\s_-]+(?:E|EP)\s*)(?P<absolute>\d{1,4})(?!\d)"
+        r"(?:\s*(?:\s-\s|[.\s_-])\s*(?P<title>[^\[]+))?" + _GENRE,
+    ),
+}
+
+RuleSpec = Union[str, ParseRule, Dict]
+
+
+def resolve_rule(spec: RuleSpec) -> ParseRule:
+    """Turn a config entry (preset name or ``{name, pattern}`` mapping) into a rule."""
+    if isinstance(spec, ParseRule):
+        return spec
+    if isinstance(spec, str):
+        try:
+            return PRESET_RULES[spec]
+        except KeyError:
+            raise ValueError(f"Unknown filename pattern preset '{spec}'.") from None
+    return ParseRule(
+        name=spec.get("name") or spec["pattern"],
+        pattern=spec["pattern"],
+        ignore_case=bool(spec.get("ignore_case", True)),
+    )
+
+
+class FilenameParser:
+    """Parses media filenames with a fixed, precompiled rule set.
+
+    Rules are compiled once when the parser is created and tried in order;
+    the first rule that matches wins. ``extra_rules`` are tried before the
+    built-in TV and movie rules. Show and genre strings are memoized so names
+    that share a show prefix return the same string objects.
+
+    :meth:`parse_many` also memoizes the show/season prefix of the built-in
+    TV rule: once ``Show.Name.S01E`` has been parsed, later names in the
+    batch that start with it only match the episode, title and genre.
+    """
+
+    def __init__(self, extra_rules: Iterable[RuleSpec] = ()):
+        self.rules: List[ParseRule] = [resolve_rule(spec) for spec in extra_rules] + list(BUILTIN_RULES)
+        self._compiled = [self._compile(rule) for rule in self.rules]
+        self._strings: Dict[str, Optional[str]] = {}
+        self._tv = len(self.rules) - len(BUILTIN_RULES)
+        self._tv_tail = self._compile(ParseRule("tv", _TV_TAIL))
+
+    @staticmethod
+    def _compile(rule: ParseRule) -> Pattern:
+        try:
+            return re.compile(rule.pattern, re.IGNORECASE if rule.ignore_case else 0)
+        except re.error as exc:
+            raise ValueError(f"Invalid filename pattern '{rule.name}': {exc}") from exc
+
+    def parse(self, name: str) -> dict:
+        base = name.rsplit(".", 1)[0]
+        for pattern in self._compiled:
+            match = pattern.match(base)
+            if match is not None:
+                return self._normalize(match.groupdict(), base)
+        return {"title": base}
+
+    def parse_many(self, names: Iterable[str]) -> List[dict]:
+        """Parse a batch of names, such as one directory listing; same results as :meth:`parse`.
+
+        The show and season of the last TV match are kept, and a name that
+        starts with the same prefix (up to the ``E`` of ``SxxEyy``) skips
+        the search for the show. Earlier rules in the set, such as extra
+        ones from config, are still tried first on every name.
+        """
+        compiled = self._compiled
+        tv = self._tv
+        tail = self._tv_tail
+        head = None  # (prefix, show, season) of the last TV match
+        results = []
+        for name in names:
+            base = name.rsplit(".", 1)[0]
+            parsed = None
+            for pattern in compiled[:tv]:
+                match = pattern.match(base)
+                if match is not None:
+                    parsed = self._normalize(match.groupdict(), base)
+                    break
+            if parsed is None and head is not None and base.startswith(head[0]):
+                match = tail.match(base, len(head[0]))
+                if match is not None:
+                    parsed = self._normalize({**match.groupdict(), "show": head[1], "season": head[2]}, base)
+            if parsed is None:
+                for position in range(tv, len(compiled)):
+                    match = compiled[position].match(base)
+                    if match is not None:
+                        if position == tv:
+                            head = (base[: match.start("episode")], match["show"], match["season"])
+                        parsed = self._normalize(match.groupdict(), base)
+                        break
+                else:
+                    parsed = {"title": base}
+            results.append(parsed)
+        return results
+
+    def rule_for(self, name: str) -> Optional[str]:
+        """Name of the rule that would parse ``name``, for debugging configs."""
+        base = name.rsplit(".", 1)[0]
+        for rule, pattern in zip(self.rules, self._compiled):
+            if pattern.match(base):
+                return rule.name
+        return None
+
+    def _intern(self, value: Optional[str]) -> Optional[str]:
+        if not value:
+            return None
+        strings = self._strings
+        if value in strings:
+            return strings[value]
+        cleaned = strings[value] = value.strip() or None
+        return cleaned
+
+    def _normalize(self, values: Dict[str, Optional[str]], base: str) -> dict:
+        get = values.get
+        genre = self._intern(get("genre"))
+        title = get("title")
+        title = title.replace(".", " ").strip() if title else ""
+        year = get("year")
+        year = int(year) if year else None
+        show = self._intern(get("show"))
+        if show is None:
+            return {"title": title or base, "year": year, "genre": genre}
+
+        season = get("season")
+        season = int(season) if season else None
+        episode = get("episode") or get("absolute")
+        episode = int(episode) if episode else None
+        if not title:
+            if get("month") and get("day"):
+                title = f"{values['year']}-{values['month']}-{values['day']}"
+            elif episode is not None:
+                title = f"Episode {episode}"
+        parsed = {"show": show, "season": season, "episode": episode, "title": title, "genre": genre}
+        if year is not None:
+            parsed["year"] = year
+        episode_end = get("episode_end")
+        if episode_end:
+            parsed["episode_end"] = int(episode_end)
+        return parsed
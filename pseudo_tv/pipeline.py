@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .instrumentation import count, span
+from .library import LibraryScanner
+from .models import Channel, MediaItem, ScheduleEntry
+from .scheduler import Scheduler
+from .timeline import Schedule
+
+
+class ChannelPool:
+    """Matching items for one channel, collected as they stream past.
+
+    With ``channel.max_items`` the pool is a reservoir sample: every
+    matching item has the same chance of being kept, and at most
+    ``max_items`` are held at any time.
+    """
+
+    def __init__(self, channel: Channel, seed: object = None):
+        self.channel = channel
+        self.limit = channel.max_items or None
+        self.seen = 0
+        self._kept: List[Tuple[int, MediaItem]] = []
+        self._random = channel.sample_random(seed) if self.limit else None
+
+    def add(self, item: MediaItem) -> None:
+        arrival = self.seen
+        self.seen += 1
+        if self.limit is None or len(self._kept) < self.limit:
+            self._kept.append((arrival, item))
+            return
+        slot = self._random.randrange(self.seen)
+        if slot < self.limit:
+            self._kept[slot] = (arrival, item)
+
+    def items(self, order: Optional[Callable[[MediaItem], object]] = None) -> List[MediaItem]:
+        """Kept items in arrival order, or sorted by ``order``."""
+        if order is not None:
+            return sorted((item for _, item in self._kept), key=order)
+        return [item for _, item in sorted(self._kept, key=lambda kept: kept[0])]
+
+
+class ChannelRouter:
+    """Dispatches scanned items to every matching channel pool in one pass.
+
+    A channel is ready once no root that is still being scanned can add to
+    it: channels with ``include_paths`` only wait for the roots those paths
+    overlap, everything else waits for the whole scan. Ready channels are
+    copies with their ``items`` filled in (raising ``ValueError`` when
+    nothing matched, as :meth:`Channel.selected` does), returned by
+    :meth:`root_done` and :meth:`finish`.
+
+    Channels are bucketed once by the keys :class:`~pseudo_tv.matching.ItemIndex`
+    selects on: by included genre if the rule has any, else by included show,
+    else by ``include_paths`` prefix. An item is only checked against the
+    channels in its genre and show buckets, the path channels whose prefix it
+    has, and channels with none of those constraints.
+    """
+
+    def __init__(self, channels: Sequence[Channel], roots: Iterable[os.PathLike | str], seed: object = None):
+        self.pools: Dict[str, ChannelPool] = {channel.name: ChannelPool(channel, seed) for channel in channels}
+        self.ready: List[Channel] = []
+        roots = [str(root) for root in roots]
+        self._roots = roots
+        self._waiting_on: Dict[str, set] = {channel.name: self._roots_for(channel, roots) for channel in channels}
+        self._by_genre: Dict[str, List[ChannelPool]] = {}
+        self._by_show: Dict[str, List[ChannelPool]] = {}
+        self._by_path: List[Tuple[Tuple[str, ...], ChannelPool]] = []
+        self._unkeyed: List[ChannelPool] = []
+        for pool in self.pools.values():
+            rules = pool.channel.rules
+            if rules.include_genres:
+                for genre in {g.lower() for g in rules.include_genres}:
+                    self._by_genre.setdefault(genre, []).append(pool)
+            elif rules.include_shows:
+                for show in {s.lower() for s in rules.include_shows}:
+                    self._by_show.setdefault(show, []).append(pool)
+            elif rules.include_paths:
+                self._by_path.append((tuple(rules.include_paths), pool))
+            else:
+                self._unkeyed.append(pool)
+
+    @staticmethod
+    def _roots_for(channel: Channel, roots: Iterable[str]) -> set:
+        prefixes = channel.rules.include_paths
+        if not prefixes:
+            return set(roots)
+        return {root for root in roots if any(root.startswith(p) or p.startswith(root) for p in prefixes)}
+
+    def candidates(self, item: MediaItem) -> List[ChannelPool]:
+        """Pools whose channel can match ``item``; each appears at most once."""
+        pools = list(self._unkeyed)
+        if item.genre:
+            pools.extend(self._by_genre.get(item.genre.lower(), ()))
+        if item.show:
+            pools.extend(self._by_show.get(item.show.lower(), ()))
+        if self._by_path:
+            path = item.path_string
+            pools.extend(pool for prefixes, pool in self._by_path if path.startswith(prefixes))
+        return pools
+
+    def add(self, item: MediaItem) -> None:
+        pools = self.candidates(item)
+        for pool in pools:
+            if pool.channel.rules.matches(item):
+                pool.add(item)
+        count("rules.evaluations", len(pools))
+
+    def _scan_order(self, item: MediaItem) -> tuple:
+        # Depth-first, name-sorted position as in LibraryScanner.scan: roots in
+        # order, and within a directory files before subdirectories. Sorting by
+        # it makes pools independent of which scan worker finished first.
+        path = item.path_string
+        for position, root in enumerate(self._roots):
+            if path.startswith(root.rstrip(os.sep) + os.sep):
+                parts = path[len(root.rstrip(os.sep)) + 1 :].split(os.sep)
+                return (position, *((1, part) for part in parts[:-1]), (0, parts[-1]))
+        return (len(self._roots), (0, path))
+
+    def root_done(self, root: str) -> List[Channel]:
+        """Record that ``root`` has been fully scanned; returns the channels that became ready."""
+        newly_ready = []
+        for name, waiting in list(self._waiting_on.items()):
+            if root in waiting:
+                waiting.discard(root)
+                if not waiting:
+                    newly_ready.append(self._complete(name))
+        return newly_ready
+
+    def finish(self) -> List[Channel]:
+        """Complete every channel that is not ready yet; returns those channels."""
+        return [self._complete(name) for name in list(self._waiting_on)]
+
+    def _complete(self, name: str) -> Channel:
+        del self._waiting_on[name]
+        pool = self.pools[name]
+        channel = pool.channel.with_items(pool.items(order=self._scan_order))
+        self.ready.append(channel)
+        if not channel.items:
+            raise ValueError(f"Channel '{channel.name}' has no matching items.")
+        return channel
+
+
+def stream_schedule(
+    scanner: LibraryScanner,
+    scheduler: Scheduler,
+    start: datetime,
+    duration: timedelta,
+    on_ready: Optional[Callable[[Channel, List[ScheduleEntry]], None]] = None,
+) -> Schedule:
+    """Scan, route and schedule in one pass without holding the whole library.
+
+    Items from :meth:`LibraryScanner.iter_scan` go straight to the channel
+    pools, and only items some channel keeps are retained. Each channel is
+    scheduled as soon as it is ready, with ``on_ready(channel, entries)``
+    called at that point. Pools are put in scan order, so the result matches
+    :meth:`Scheduler.build_schedule` over :meth:`LibraryScanner.scan` (with
+    ``dedupe`` off) unless a ``max_items`` sample applies; samples only
+    repeat exactly with a single scan worker.
+    """
+    router = ChannelRouter(scheduler.channels, scanner.media_roots, seed=scheduler.master_seed)
+    horizon = start + duration
+    entries: List[ScheduleEntry] = []
+
+    def schedule(channels: List[Channel]) -> None:
+        for channel in channels:
+            channel_entries = scheduler.start_run(channel, start).extend(horizon)
+            entries.extend(channel_entries)
+            if on_ready is not None:
+                on_ready(channel, channel_entries)
+
+    with span("schedule.stream"):
+        for item in scanner.iter_scan(root_done=lambda root: schedule(router.root_done(root))):
+            router.add(item)
+        schedule(router.finish())
+    return Schedule(Scheduler.ordered(entries))
@@ -1,44 +1,35 @@
 from __future__ import annotations
 
-import json
-from dataclasses import dataclass
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, List, Optional
 
+from .guide import GuideCache
+from .instrumentation import span
 from .models import Channel, ScheduleEntry
-
-
-@dataclass
-class PlayerState:
-    last_positions: Dict[str, str]
-
-    @classmethod
-    def from_disk(cls, path: Path) -> "PlayerState":
-        if not path.exists():
-            return cls(last_positions={})
-        try:
-            data = json.loads(path.read_text())
-            return cls(last_positions=data.get("last_positions", {}))
-        except json.JSONDecodeError:
-            return cls(last_positions={})
-
-    def save(self, path: Path) -> None:
-        payload = {"last_positions": self.last_positions}
-        path.write_text(json.dumps(payload, indent=2))
+from .state import ChannelPosition, StateStore
+from .timeline import FrozenSchedule
 
 
 class Player:
-    """Simulates playback of scheduled items."""
+    """Simulates playback of scheduled items.
+
+    The schedule is frozen (see :class:`FrozenSchedule`) and indexed when
+    the player is created, so one player can answer queries from any number
+    of threads; a changed schedule means a new player.
+    """
 
     def __init__(self, schedule: List[ScheduleEntry], state_path: Path):
-        self.schedule = schedule
+        self.schedule = FrozenSchedule.of(schedule)
+        self.guide_cache = GuideCache(self.schedule)
         self.state_path = state_path
-        self.state = PlayerState.from_disk(state_path)
+        self.state = StateStore(state_path)
 
     def now_playing(self, now: datetime) -> Dict[str, ScheduleEntry]:
-        entries = [entry for entry in self.schedule if entry.overlaps(now)]
-        return {entry.channel.name: entry for entry in entries}
+        with span("player.now_playing"):
+            return self.schedule.playing_at(now)
 
     def progress(self, entry: ScheduleEntry, now: datetime) -> float:
         elapsed = (now - entry.start).total_seconds()
@@ -46,13 +37,24 @@ class Player:
         return max(0.0, min(1.0, elapsed / total))
 
     def remember_positions(self, now: datetime) -> None:
-        positions = {}
-        for entry in self.schedule:
-            if entry.overlaps(now):
-                fraction = self.progress(entry, now)
-                positions[entry.channel.name] = f"{fraction:.2%}"  # human readable
-        self.state.last_positions.update(positions)
-        self.state.save(self.state_path)
+        updated = time.time()
+        for name, entry in self.now_playing(now).items():
+            self.state.update(
+                name,
+                ChannelPosition(
+                    path=str(entry.item.path),
+                    start=entry.start.isoformat(),
+                    offset_seconds=(now - entry.start).total_seconds(),
+                    duration_seconds=entry.item.duration.total_seconds(),
+                    updated=updated,
+                ),
+            )
+        with span("player.save_state"):
+            self.state.flush()
+
+    def last_position(self, channel: str) -> Optional[ChannelPosition]:
+        """The last remembered airing and offset on ``channel``, for resuming playback."""
+        return self.state.get(channel)
 
     def describe_now_playing(self, now: datetime) -> str:
         lines: List[str] = []
@@ -69,26 +71,21 @@ class Player:
         return "\n".join(lines)
 
     def upcoming(self, now: datetime, horizon: timedelta = timedelta(hours=2)) -> Dict[str, List[ScheduleEntry]]:
-        window_end = now + horizon
-        upcoming: Dict[str, List[ScheduleEntry]] = {}
-        for entry in self.schedule:
-            if entry.start <= now:
-                continue
-            if entry.start > window_end:
-                continue
-            upcoming.setdefault(entry.channel.name, []).append(entry)
-        return upcoming
+        with span("player.upcoming"):
+            return self.guide_cache.upcoming(now, now + horizon)
 
     def describe_upcoming(self, now: datetime, horizon: timedelta = timedelta(hours=2)) -> str:
-        listings = self.upcoming(now, horizon=horizon)
-        if not listings:
-            return "No upcoming items in window."
-        lines: List[str] = []
-        for name, entries in sorted(listings.items()):
-            lines.append(f"Channel {name}:")
-            for entry in entries:
-                lines.append(f"  - {entry.start:%H:%M} {entry.item.label} ({entry.item.duration})")
-        return "\n".join(lines)
+        with span("player.upcoming"):
+            return self.guide_cache.upcoming_text(now, now + horizon)
+
+    def guide(self, start: datetime, end: datetime) -> Dict[str, List[ScheduleEntry]]:
+        """Entries overlapping ``[start, end)`` per channel."""
+        with span("player.guide"):
+            return self.guide_cache.guide(start, end)
+
+    def describe_guide(self, start: datetime, end: datetime) -> str:
+        with span("player.guide"):
+            return self.guide_cache.guide_text(start, end)
 
     @staticmethod
     def summarize_channels(channels: Iterable[Channel]) -> str:
@@ -98,3 +95,27 @@ class Player:
                 f"- {channel.name}: genres={channel.rules.include_genres or 'any'}, shows={channel.rules.include_shows or 'any'}, repeat={'yes' if channel.allow_repeats else 'no'}"
             )
         return "\n".join(lines)
+
+
+class LivePlayer:
+    """The current :class:`Player` for hosts that query from many threads while rebuilding.
+
+    :meth:`publish` builds the new player, including its frozen schedule
+    index, before swapping it in with a single reference assignment, so
+    readers never lock and never see a half-built schedule. Read ``current``
+    once per request and use that player throughout, so one answer never
+    mixes two schedules. Only publishers take a lock, to keep ``generation``
+    in step with the player they swap in.
+    """
+
+    def __init__(self, player: Player):
+        self.current = player
+        self.generation = 0
+        self._publishing = threading.Lock()
+
+    def publish(self, schedule: List[ScheduleEntry]) -> Player:
+        player = Player(schedule, state_path=self.current.state_path)
+        with self._publishing:
+            self.current = player
+            self.generation += 1
+        return player
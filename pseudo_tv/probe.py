@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import mmap
+import struct
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+_MKV_EBML = 0x1A45DFA3
+_MKV_SEGMENT = 0x18538067
+_MKV_INFO = 0x1549A966
+_MKV_CLUSTER = 0x1F43B675
+_MKV_TIMECODE_SCALE = 0x2AD7B1
+_MKV_DURATION = 0x4489
+
+_MP3_BITRATES = {
+    True: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),  # MPEG-1 Layer III
+    False: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),  # MPEG-2/2.5 Layer III
+}
+_MP3_SAMPLE_RATES = (44100, 48000, 32000)
+_MP3_SEARCH_LIMIT = 64 * 1024
+
+
+def probe_duration(path: Path) -> Optional[float]:
+    """Duration of ``path`` in seconds, or ``None`` if the format is unknown or the headers are unreadable.
+
+    The file is memory-mapped and the container structure is followed to the
+    one field needed, so only the pages holding those headers are read:
+
+    - MP4/MOV: ``moov/mvhd`` timescale and duration.
+    - Matroska/WebM: ``Segment/Info`` ``TimecodeScale`` and ``Duration``.
+    - AVI: ``hdrl/avih`` microseconds per frame and total frames.
+    - MP3: Xing/Info or VBRI frame count, else a CBR estimate from the first frame.
+    """
+    reader = _READERS.get(Path(path).suffix.lower())
+    if reader is None:
+        return None
+    try:
+        with open(path, "rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            duration = reader(mapped)
+    except (OSError, ValueError, IndexError, struct.error):
+        return None  # empty, unreadable or truncated file
+    if duration is None or not 0 < duration < 10**7:
+        return None
+    return duration
+
+
+# MP4 / MOV ---------------------------------------------------------------
+
+
+def _find_box(data: mmap.mmap, start: int, end: int, kind: bytes) -> Optional[Tuple[int, int]]:
+    """Payload range of the first ``kind`` box between ``start`` and ``end``."""
+    position = start
+    while position + 8 <= end:
+        size, box = struct.unpack_from(">I4s", data, position)
+        header = 8
+        if size == 1:
+            (size,) = struct.unpack_from(">Q", data, position + 8)
+            header = 16
+        elif size == 0:
+            size = end - position
+        if size < header:
+            return None
+        if box == kind:
+            return position + header, min(position + size, end)
+        position += size
+    return None
+
+
+def _mp4_duration(data: mmap.mmap) -> Optional[float]:
+    moov = _find_box(data, 0, len(data), b"moov")
+    mvhd = _find_box(data, moov[0], moov[1], b"mvhd") if moov else None
+    if mvhd is None:
+        return None
+    start = mvhd[0]
+    if data[start] == 1:
+        timescale, duration = struct.unpack_from(">IQ", data, start + 20)
+    else:
+        timescale, duration = struct.unpack_from(">II", data, start + 12)
+    return duration / timescale if timescale else None
+
+
+# Matroska ----------------------------------------------------------------
+
+
+def _vint(data: mmap.mmap, position: int, marker: bool) -> Tuple[int, int, bool]:
+    """EBML variable-length integer at ``position``: ``(value, length, unknown_size)``."""
+    first = data[position]
+    if not first:
+        raise ValueError("invalid EBML vint")
+    length = 9 - first.bit_length()
+    value = first if marker else first & (0xFF >> length)
+    for offset in range(1, length):
+        value = (value << 8) | data[position + offset]
+    return value, length, not marker and value == (1 << (7 * length)) - 1
+
+
+def _ebml_element(data: mmap.mmap, position: int) -> Tuple[int, int, int, bool]:
+    """``(id, payload start, payload size, unknown_size)`` of the element at ``position``."""
+    element_id, id_length, _ = _vint(data, position, marker=True)
+    size, size_length, unknown = _vint(data, position + id_length, marker=False)
+    return element_id, position + id_length + size_length, size, unknown
+
+
+def _mkv_duration(data: mmap.mmap) -> Optional[float]:
+    element_id, start, size, _ = _ebml_element(data, 0)
+    if element_id != _MKV_EBML:
+        return None
+    element_id, start, size, unknown = _ebml_element(data, start + size)
+    if element_id != _MKV_SEGMENT:
+        return None
+    position, end = start, len(data) if unknown else min(start + size, len(data))
+    while position < end:
+        element_id, start, size, unknown = _ebml_element(data, position)
+        if element_id == _MKV_INFO:
+            return _mkv_info_duration(data, start, min(start + size, end))
+        if element_id == _MKV_CLUSTER or unknown:
+            return None  # media data starts; Info always comes before it in practice
+        position = start + size
+    return None
+
+
+def _mkv_info_duration(data: mmap.mmap, position: int, end: int) -> Optional[float]:
+    scale = 1_000_000
+    duration = None
+    while position < end:
+        element_id, start, size, _ = _ebml_element(data, position)
+        if element_id == _MKV_TIMECODE_SCALE:
+            scale = int.from_bytes(data[start : start + size], "big")
+        elif element_id == _MKV_DURATION and size in (4, 8):
+            (duration,) = struct.unpack_from(">f" if size == 4 else ">d", data, start)
+        position = start + size
+    return duration * scale / 1e9 if duration is not None else None
+
+
+# AVI ---------------------------------------------------------------------
+
+
+def _avi_duration(data: mmap.mmap) -> Optional[float]:
+    if data[0:4] != b"RIFF" or data[8:12] != b"AVI ":
+        return None
+    position, end = 12, len(data)
+    while position + 8 <= end:
+        chunk, size = struct.unpack_from("<4sI", data, position)
+        if chunk == b"LIST" and data[position + 8 : position + 12] == b"hdrl":
+            inner = position + 12
+            if data[inner : inner + 4] != b"avih":
+                return None
+            us_per_frame, _, _, _, frames = struct.unpack_from("<5I", data, inner + 8)
+            return frames * us_per_frame / 1e6 if frames and us_per_frame else None
+        position += 8 + size + (size & 1)
+    return None
+
+
+# MP3 ---------------------------------------------------------------------
+
+
+def _mp3_duration(data: mmap.mmap) -> Optional[float]:
+    position = 0
+    if data[0:3] == b"ID3":
+        size = data[6] << 21 | data[7] << 14 | data[8] << 7 | data[9]
+        position = 10 + size + (10 if data[5] & 0x10 else 0)
+    limit = min(len(data) - 4, position + _MP3_SEARCH_LIMIT)
+    while position < limit:
+        position = data.find(b"\xff", position, limit)
+        if position < 0:
+            return None
+        header = _mp3_header(data[position + 1], data[position + 2], data[position + 3])
+        if header is not None:
+            break
+        position += 1
+    else:
+        return None
+    mpeg1, bitrate, sample_rate, mono = header
+    samples_per_frame = 1152 if mpeg1 else 576
+    side_info = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+
+    xing = position + 4 + side_info
+    if data[xing : xing + 4] in (b"Xing", b"Info"):
+        (flags,) = struct.unpack_from(">I", data, xing + 4)
+        if flags & 1:
+            (frames,) = struct.unpack_from(">I", data, xing + 8)
+            return frames * samples_per_frame / sample_rate
+    vbri = position + 4 + 32
+    if data[vbri : vbri + 4] == b"VBRI":
+        (frames,) = struct.unpack_from(">I", data, vbri + 14)
+        return frames * samples_per_frame / sample_rate
+
+    end = len(data) - (128 if data[-128:-125] == b"TAG" else 0)
+    return (end - position) * 8 / (bitrate * 1000)
+
+
+def _mp3_header(b1: int, b2: int, b3: int) -> Optional[Tuple[bool, int, int, bool]]:
+    """``(mpeg1, kbps, sample rate, mono)`` for a Layer III frame header, else ``None``."""
+    if b1 & 0xE0 != 0xE0:
+        return None
+    version = (b1 >> 3) & 3  # 3: MPEG-1, 2: MPEG-2, 0: MPEG-2.5
+    layer = (b1 >> 1) & 3  # 1: Layer III
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 3
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    sample_rate = _MP3_SAMPLE_RATES[rate_index] >> (0 if mpeg1 else 1 if version == 2 else 2)
+    return mpeg1, _MP3_BITRATES[mpeg1][bitrate_index], sample_rate, b3 >> 6 == 3
+
+
+_READERS: Dict[str, Callable[[mmap.mmap], Optional[float]]] = {
+    ".mp4": _mp4_duration,
+    ".m4v": _mp4_duration,
+    ".mov": _mp4_duration,
+    ".mkv": _mkv_duration,
+    ".webm": _mkv_duration,
+    ".avi": _avi_duration,
+    ".mp3": _mp3_duration,
+}
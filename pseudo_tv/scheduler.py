@@ -1,50 +1,304 @@
 from __future__ import annotations
 
 import random
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, Iterable, List
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
 
+from .instrumentation import count, span
+from .matching import ItemIndex
 from .models import Channel, MediaItem, ScheduleEntry
+from .timeline import ChannelTimeline, CyclicTimeline, Schedule, VirtualSchedule
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .watcher import LibraryDelta
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+@dataclass
+class ChannelRun:
+    """Where a channel's playout stands: its pool order, next slot and start time.
+
+    :meth:`extend` continues the run up to a horizon, so a schedule can be
+    lengthened later with exactly the entries a longer build would have made.
+    """
+
+    channel: Channel
+    pool: List[MediaItem]
+    pointer: datetime
+    position: int = 0
+
+    @property
+    def finished(self) -> bool:
+        return not self.channel.allow_repeats and self.position >= len(self.pool)
+
+    def extend(self, horizon: Optional[datetime]) -> List[ScheduleEntry]:
+        """Entries from the current position until ``horizon`` (or the end of a non-repeating pool)."""
+        if horizon is None and self.channel.allow_repeats:
+            raise ValueError(f"Channel '{self.channel.name}' repeats forever; a horizon is required.")
+        entries: List[ScheduleEntry] = []
+        pool = self.pool
+        while not self.finished and (horizon is None or self.pointer < horizon):
+            if not pool:
+                raise ValueError(f"Channel '{self.channel.name}' has no items to schedule.")
+            item = pool[self.position % len(pool)]
+            entries.append(ScheduleEntry(channel=self.channel, item=item, start=self.pointer))
+            self.pointer += item.duration
+            self.position += 1
+        count("schedule.entries", len(entries))
+        return entries
+
+    def apply(self, starts: Sequence[int]) -> List[ScheduleEntry]:
+        """Turn start times computed by :func:`_build_in_worker` into entries and advance the run."""
+        pool = self.pool
+        size = len(pool)
+        position = self.position
+        entries = [
+            ScheduleEntry(channel=self.channel, item=pool[(position + offset) % size], start=_EPOCH + start * _MICROSECOND)
+            for offset, start in enumerate(starts)
+        ]
+        if entries:
+            last = entries[-1]
+            self.pointer = last.start + last.item.duration
+            self.position = position + len(entries)
+        count("schedule.entries", len(entries))
+        return entries
+
+
+_WORKER_INDEX: Optional[ItemIndex] = None
+
+
+def _init_worker(index: ItemIndex) -> None:
+    # With the fork start method the index is inherited rather than pickled.
+    global _WORKER_INDEX
+    _WORKER_INDEX = index
+
+
+def _channel_random(master_seed: object, channel: Channel) -> random.Random:
+    return random.Random(f"{master_seed}:{channel.name}")
+
+
+def _build_in_worker(task: Tuple[Channel, object, int, int]) -> Tuple[array, array, array]:
+    """Process-pool side of :meth:`Scheduler.build_runs` for one channel.
+
+    Selects and shuffles the channel's items and lays them out from the
+    start to the horizon (integer microseconds). Returns the selected items, the
+    pool order and the start times, all packed; items are referred to by
+    their position in the worker's :class:`ItemIndex`, which matches the
+    parent's.
+    """
+    channel, master_seed, pointer, horizon = task
+    index = _WORKER_INDEX
+    selected = array("q", channel.selected_ids(index, seed=master_seed))
+    order = selected
+    if channel.shuffle:
+        order = array("q", selected)
+        _channel_random(master_seed, channel).shuffle(order)
+    items = index.items
+    durations = [items[i].duration_us for i in order]
+    size = len(durations)
+    starts = array("q")
+    position = 0
+    while pointer < horizon and (channel.allow_repeats or position < size):
+        starts.append(pointer)
+        pointer += durations[position % size]
+        position += 1
+    return selected, order, starts
 
 
 class Scheduler:
-    """Builds schedules for channels and supports EPG-like guides."""
+    """Builds schedules for channels and supports EPG-like guides.
 
-    def __init__(self, channels: Iterable[Channel], seed: int | None = None):
+    Every channel shuffles with its own generator seeded from the master
+    ``seed`` and the channel name, so a channel's schedule does not depend on
+    the other channels or the order they are built in. With ``workers > 1``
+    :meth:`build_runs` selects, shuffles and lays out channels in a process
+    pool, and the parent only maps the packed results back to items and
+    entries; the result is identical to the serial build. Builds never
+    modify ``channels``: each one schedules :meth:`Channel.selected` copies,
+    so a rebuild can run alongside readers of the previous schedule.
+    """
+
+    def __init__(self, channels: Iterable[Channel], seed: int | None = None, workers: int = 1):
         self.channels = list(channels)
-        self.random = random.Random(seed)
+        self.seed = seed
+        self.master_seed = seed if seed is not None else random.getrandbits(64)
+        self.workers = workers
+
+    def channel_random(self, channel: Channel) -> random.Random:
+        return _channel_random(self.master_seed, channel)
 
-    def build_schedule(self, library: Iterable[MediaItem], start: datetime, duration: timedelta) -> List[ScheduleEntry]:
-        schedule: List[ScheduleEntry] = []
-        horizon = start + duration
+    def start_runs(self, library: Iterable[MediaItem], start: datetime) -> List[ChannelRun]:
+        """Select items for a copy of every channel and set up its run at ``start``."""
+        with span("schedule.select"):
+            item_index = library if isinstance(library, ItemIndex) else ItemIndex(library)
+            return [
+                self.start_run(channel.selected(item_index.items, index=item_index, seed=self.master_seed), start)
+                for channel in self.channels
+            ]
+
+    def start_run(self, channel: Channel, start: datetime) -> ChannelRun:
+        """Set up the run for a channel whose ``items`` are already selected."""
+        pool = list(channel.items)
+        if channel.shuffle:
+            self.channel_random(channel).shuffle(pool)
+        return ChannelRun(channel=channel, pool=pool, pointer=start)
+
+    def extend_runs(self, runs: Sequence[ChannelRun], horizon: datetime) -> List[ScheduleEntry]:
+        """Extend every run to ``horizon``."""
+        entries: List[ScheduleEntry] = []
+        for run in runs:
+            entries.extend(run.extend(horizon))
+        return entries
+
+    def build_runs(
+        self, library: Iterable[MediaItem], start: datetime, horizon: datetime
+    ) -> Tuple[List[ChannelRun], List[ScheduleEntry]]:
+        """Start every channel's run at ``start`` and extend it to ``horizon``; returns the runs and entries.
+
+        With ``workers > 1`` the per-channel work runs in a process pool.
+        """
+        item_index = library if isinstance(library, ItemIndex) else ItemIndex(library)
+        if self.workers <= 1 or len(self.channels) < 2:
+            runs = self.start_runs(item_index, start)
+            with span("schedule.extend"):
+                return runs, self.extend_runs(runs, horizon)
+        from concurrent.futures import ProcessPoolExecutor  # multiprocessing is slow to import; only load it here
+
+        tasks = [
+            (channel, self.master_seed, (start - _EPOCH) // _MICROSECOND, (horizon - _EPOCH) // _MICROSECOND)
+            for channel in self.channels
+        ]
+        items = item_index.items
+        runs: List[ChannelRun] = []
+        entries: List[ScheduleEntry] = []
+        with span("schedule.parallel"), ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(item_index,)
+        ) as pool:
+            chunksize = max(1, len(tasks) // (self.workers * 4))
+            results = pool.map(_build_in_worker, tasks, chunksize=chunksize)
+            for channel, (ids, order, starts) in zip(self.channels, results):
+                copy = channel.with_items(items[i] for i in ids)
+                run = ChannelRun(channel=copy, pool=[items[i] for i in order], pointer=start)
+                entries.extend(run.apply(starts))
+                runs.append(run)
+        return runs, entries
+
+    def build_schedule(self, library: Iterable[MediaItem], start: datetime, duration: timedelta) -> Schedule:
+        runs, entries = self.build_runs(library, start, start + duration)
+        with span("schedule.sort"):
+            return Schedule(self.ordered(entries))
+
+    def build_virtual_schedule(
+        self, library: Iterable[MediaItem], anchor: datetime, start: Optional[datetime] = None
+    ) -> VirtualSchedule:
+        """Build a schedule with no horizon.
+
+        Channels with ``allow_repeats`` become cyclic timelines anchored at
+        ``anchor`` that are evaluated on demand, so their answers do not
+        depend on when the schedule was built. Other channels are
+        materialized for their single pass through the pool from ``start``
+        (by default the current hour), as :meth:`build_schedule` lays them out.
+        """
+        if start is None:
+            start = datetime.now().replace(minute=0, second=0, microsecond=0)
+        item_index = library if isinstance(library, ItemIndex) else ItemIndex(library)
+        timelines = {}
         for channel in self.channels:
-            channel.select_items(library)
-            pool = list(channel.items)
-            if channel.shuffle:
-                self.random.shuffle(pool)
-            pointer = start
-            index = 0
-            while pointer < horizon:
-                if not pool:
-                    raise ValueError(f"Channel '{channel.name}' has no items to schedule.")
-                item = pool[index % len(pool)]
-                schedule.append(ScheduleEntry(channel=channel, item=item, start=pointer))
-                pointer += item.duration
-                index += 1
-                if not channel.allow_repeats and index >= len(pool):
+            channel = channel.selected(item_index.items, index=item_index, seed=self.master_seed)
+            if channel.allow_repeats:
+                timelines[channel.name] = CyclicTimeline(
+                    channel, channel.items, anchor, seed=self.channel_random(channel).getrandbits(64), shuffle=channel.shuffle
+                )
+                continue
+            timelines[channel.name] = ChannelTimeline(self.start_run(channel, start).extend(None))
+        return VirtualSchedule(timelines)
+
+    def apply_delta(
+        self, schedule: Sequence[ScheduleEntry], delta: "LibraryDelta", now: datetime
+    ) -> Tuple[Schedule, List[str]]:
+        """Patch ``schedule`` for a library change; returns the patched copy and the channels touched.
+
+        ``schedule`` and its channels are left as they are, so readers of it
+        are unaffected. Only the changed items are checked against channel
+        rules. On each touched channel, entries that started at or before
+        ``now`` are kept as they are. Later entries drop removed items, keep
+        modified ones in place and take new ones at a seeded random position
+        (at the end for channels without shuffle); they are then laid out
+        again from the end of the current airing, and repeating channels are
+        refilled up to the schedule's horizon.
+        """
+        removed = {str(path) for path in delta.removed}
+        source = Schedule.of(schedule)
+        timelines = source.timelines
+        horizon = source.horizon or max((t.end for t in timelines.values() if t.end is not None), default=now)
+        patched_schedule = Schedule(source)
+        touched = []
+        for template in self.channels:
+            timeline = timelines.get(template.name)
+            # The schedule's own copy of the channel holds the pool it was built from.
+            channel = timeline.channel if timeline is not None and timeline.channel is not None else template
+            gone = {str(item.path) for item in channel.items} & removed
+            updated = {
+                str(item.path): item for item in delta.added if str(item.path) in gone and channel.rules.matches(item)
+            }
+            fresh = [item for item in delta.added if str(item.path) not in updated and channel.rules.matches(item)]
+            if not gone and not fresh:
+                continue
+            touched.append(channel.name)
+            channel = channel.with_items(
+                [
+                    updated.get(str(item.path), item)
+                    for item in channel.items
+                    if str(item.path) not in gone or str(item.path) in updated
+                ]
+                + fresh
+            )
+
+            entries = timeline.entries if timeline is not None else []
+            split = bisect_right(timeline.starts, now) if timeline is not None else 0
+            kept = [ScheduleEntry(channel=channel, item=entry.item, start=entry.start) for entry in entries[:split]]
+            future = entries[split:]
+            queue = []
+            for entry in future:
+                path = str(entry.item.path)
+                if path not in gone:
+                    queue.append(entry.item)
+                elif path in updated:
+                    queue.append(updated[path])
+            rng = random.Random(f"{self.master_seed}:{channel.name}:{now.isoformat()}")
+            for item in fresh:
+                queue.insert(rng.randint(0, len(queue)) if channel.shuffle else len(queue), item)
+
+            pointer = max(kept[-1].end, now) if kept else future[0].start if future else now
+            patched = []
+            for item in queue:
+                if pointer >= horizon:
                     break
-        schedule.sort(key=lambda e: (e.start, e.channel.name))
-        return schedule
+                patched.append(ScheduleEntry(channel=channel, item=item, start=pointer))
+                pointer += item.duration
+            if channel.allow_repeats and channel.items and pointer < horizon:
+                pool = list(channel.items)
+                if channel.shuffle:
+                    rng.shuffle(pool)
+                patched.extend(ChannelRun(channel=channel, pool=pool, pointer=pointer).extend(horizon))
+            patched_schedule.replace_channel(channel.name, kept + patched)
+        return patched_schedule, touched
+
+    @staticmethod
+    def ordered(entries: List[ScheduleEntry]) -> List[ScheduleEntry]:
+        entries.sort(key=lambda e: (e.start, e.channel.name))
+        return entries
 
     @staticmethod
     def guide(schedule: List[ScheduleEntry], window_start: datetime, window_end: datetime) -> Dict[str, List[ScheduleEntry]]:
-        by_channel: Dict[str, List[ScheduleEntry]] = {}
-        for entry in schedule:
-            if entry.end <= window_start or entry.start >= window_end:
-                continue
-            by_channel.setdefault(entry.channel.name, []).append(entry)
-        return by_channel
+        return Schedule.of(schedule).overlapping(window_start, window_end)
 
     @staticmethod
     def current_program(schedule: List[ScheduleEntry], now: datetime) -> List[ScheduleEntry]:
-        return [entry for entry in schedule if entry.overlaps(now)]
+        playing = Schedule.of(schedule).playing_at(now).values()
+        return sorted(playing, key=lambda e: (e.start, e.channel.name))
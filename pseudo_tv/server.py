@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .instrumentation import metrics
+from .models import Channel, ScheduleEntry
+from .player import LivePlayer, Player
+
+logger = logging.getLogger(__name__)
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def entry_to_dict(entry: ScheduleEntry) -> Dict:
+    return {
+        "channel": entry.channel.name,
+        "title": entry.item.title,
+        "label": entry.item.label,
+        "show": entry.item.show,
+        "season": entry.item.season,
+        "episode": entry.item.episode,
+        "genre": entry.item.genre,
+        "start": entry.start.isoformat(),
+        "end": entry.end.isoformat(),
+        "duration_seconds": entry.item.duration.total_seconds(),
+        "path": str(entry.item.path),
+    }
+
+
+class GuideServer:
+    """Serves now-playing, upcoming and guide queries over HTTP/JSON.
+
+    The config, library and schedule stay in memory, so a request costs one
+    schedule lookup. ``rebuild`` is called in a worker thread once the
+    schedule's horizon is within ``rebuild_margin``; the new ``Player`` is
+    built and indexed in that thread too, then published through
+    :class:`LivePlayer`, so requests never wait for it. A rebuild that
+    raises is logged and retried after ``rebuild_retry``, doubling up to an
+    hour while it keeps failing; the old schedule is served meanwhile.
+
+    Endpoints (all ``GET``, times are ISO 8601 local time, default now):
+
+    - ``/now?at=``
+    - ``/upcoming?at=&hours=2``
+    - ``/guide?start=&hours=4``
+    - ``/channels``
+    - ``/health``
+    - ``/metrics`` (spans and counters from :mod:`pseudo_tv.instrumentation`)
+    """
+
+    def __init__(
+        self,
+        player: Player,
+        channels: List[Channel],
+        rebuild: Optional[Callable[[], object]] = None,
+        rebuild_margin: timedelta = timedelta(hours=2),
+        rebuild_retry: timedelta = timedelta(minutes=1),
+    ):
+        self.live = LivePlayer(player)
+        self.channels = channels
+        self.rebuild = rebuild
+        self.rebuild_margin = rebuild_margin
+        self.rebuild_retry = rebuild_retry
+        self.rebuilds = 0
+        self.rebuild_failures = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._watchdog: Optional[asyncio.Task] = None
+        self._routes = {
+            "/now": self.handle_now,
+            "/upcoming": self.handle_upcoming,
+            "/guide": self.handle_guide,
+            "/channels": self.handle_channels,
+            "/health": self.handle_health,
+            "/metrics": self.handle_metrics,
+        }
+
+    @property
+    def player(self) -> Player:
+        return self.live.current
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> Tuple[str, int]:
+        """Start listening (``port=0`` picks a free port) and return the bound address."""
+        self._server = await asyncio.start_server(self._serve_connection, host, port)
+        if self.rebuild is not None:
+            self._watchdog = asyncio.create_task(self._rebuild_when_due())
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 8080) -> None:
+        bound_host, bound_port = await self.start(host, port)
+        print(f"Serving on http://{bound_host}:{bound_port}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    # Background rebuild -------------------------------------------------
+
+    async def _rebuild_when_due(self) -> None:
+        failures = 0
+        while True:
+            horizon = self.player.schedule.horizon
+            if horizon is None:
+                return
+            delay = (horizon - self.rebuild_margin - datetime.now()).total_seconds()
+            if delay > 0:
+                await asyncio.sleep(min(delay, 3600))
+                continue
+            try:
+                with metrics.span("server.rebuild"):
+                    await asyncio.to_thread(lambda: self.live.publish(self.rebuild()))
+            except Exception:
+                self.rebuild_failures += 1
+                failures += 1
+                metrics.count("server.rebuild_failures")
+                retry = min(self.rebuild_retry.total_seconds() * 2 ** (failures - 1), 3600)
+                logger.exception("Schedule rebuild failed; retrying in %.0f s", retry)
+                await asyncio.sleep(retry)
+                continue
+            failures = 0
+            self.rebuilds += 1
+            new_horizon = self.player.schedule.horizon
+            if new_horizon is not None and new_horizon <= horizon:
+                # The rebuild did not move the horizon; back off instead of spinning.
+                await asyncio.sleep(60)
+
+    # HTTP ---------------------------------------------------------------
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                parts = request_line.decode("latin-1").split()
+                keep_alive = headers.get("connection", "").lower() != "close" and parts[-1:] != ["HTTP/1.0"]
+                status, body = self.dispatch(*parts[:2]) if len(parts) >= 2 else (400, {"error": "malformed request"})
+                payload = json.dumps(body).encode()
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                        "Content-Type: application/json\r\n"
+                        f"Content-Length: {len(payload)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    ).encode()
+                    + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def dispatch(self, method: str, target: str) -> Tuple[int, Dict]:
+        if method != "GET":
+            return 405, {"error": f"{method} not allowed"}
+        url = urlsplit(target)
+        handler = self._routes.get(url.path.rstrip("/") or "/")
+        if handler is None:
+            return 404, {"error": f"unknown path {url.path}"}
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            return 200, handler(query)
+        except RequestError as exc:
+            return exc.status, {"error": str(exc)}
+        except OverflowError:  # e.g. a window ending just short of datetime.max, widened by the guide cache
+            return 400, {"error": "requested time is out of range"}
+
+    # Handlers -----------------------------------------------------------
+
+    @staticmethod
+    def _moment(query: Dict[str, str], key: str) -> datetime:
+        if key not in query:
+            return datetime.now()
+        try:
+            return datetime.fromisoformat(query[key])
+        except ValueError:
+            raise RequestError(400, f"'{key}' must be an ISO 8601 datetime") from None
+
+    @staticmethod
+    def _hours(query: Dict[str, str], default: float) -> timedelta:
+        try:
+            return timedelta(hours=float(query.get("hours", default)))
+        except (ValueError, OverflowError):
+            raise RequestError(400, "'hours' must be a number of hours") from None
+
+    @staticmethod
+    def _end(start: datetime, hours: timedelta) -> datetime:
+        try:
+            return start + hours
+        except OverflowError:
+            raise RequestError(400, "'hours' reaches past the latest supported time") from None
+
+    def handle_now(self, query: Dict[str, str]) -> Dict:
+        now = self._moment(query, "at")
+        player = self.player
+        channels = {}
+        for name, entry in sorted(player.now_playing(now).items()):
+            channels[name] = {**entry_to_dict(entry), "progress": player.progress(entry, now)}
+        return {"at": now.isoformat(), "channels": channels}
+
+    def handle_upcoming(self, query: Dict[str, str]) -> Dict:
+        now = self._moment(query, "at")
+        horizon = self._hours(query, 2)
+        self._end(now, horizon)
+        listings = self.player.upcoming(now, horizon=horizon)
+        return {
+            "at": now.isoformat(),
+            "channels": {name: [entry_to_dict(e) for e in entries] for name, entries in sorted(listings.items())},
+        }
+
+    def handle_guide(self, query: Dict[str, str]) -> Dict:
+        start = self._moment(query, "start")
+        end = self._end(start, self._hours(query, 4))
+        by_channel = self.player.guide(start, end)
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "channels": {name: [entry_to_dict(e) for e in entries] for name, entries in sorted(by_channel.items())},
+        }
+
+    def handle_channels(self, query: Dict[str, str]) -> Dict:
+        return {
+            "channels": [
+                {"name": c.name, "shuffle": c.shuffle, "allow_repeats": c.allow_repeats, "genres": c.rules.include_genres}
+                for c in self.channels
+            ]
+        }
+
+    def handle_health(self, query: Dict[str, str]) -> Dict:
+        player = self.player
+        horizon = player.schedule.horizon
+        return {
+            "status": "ok",
+            "horizon": horizon.isoformat() if horizon else None,
+            "rebuilds": self.rebuilds,
+            "guide_cache": player.guide_cache.stats.to_dict(),
+        }
+
+    def handle_metrics(self, query: Dict[str, str]) -> Dict:
+        return metrics.snapshot()
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import sys
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from .config import Config
+from .models import Channel, MediaItem, ScheduleEntry
+from .scheduler import ChannelRun, Scheduler
+from .timeline import Schedule
+
+SNAPSHOT_VERSION = 1
+
+_MAGIC = b"PTVSNAP\0"
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def fingerprint(channels: Sequence[Channel], library: Sequence[MediaItem], seed: Optional[int]) -> str:
+    """Digest of everything a schedule depends on: channel config, library contents and seed."""
+    digest = hashlib.sha256()
+    digest.update(f"v{SNAPSHOT_VERSION}:{seed!r}\n".encode())
+    digest.update(json.dumps([Config.channel_to_dict(c) for c in channels], sort_keys=True).encode())
+    for item in library:
+        digest.update(
+            repr(
+                (str(item.path), item.title, item.duration, item.genre, item.show, item.season, item.episode, item.year)
+            ).encode()
+        )
+    return digest.hexdigest()
+
+
+@dataclass
+class ScheduleSnapshot:
+    """A built schedule plus the channel runs needed to extend it."""
+
+    fingerprint: str
+    anchor: datetime
+    entries: List[ScheduleEntry]
+    runs: List[ChannelRun]
+
+    @property
+    def horizon(self) -> datetime:
+        """Earliest point at which some channel that still has content runs out."""
+        pointers = [run.pointer for run in self.runs if not run.finished]
+        return min(pointers) if pointers else datetime.max
+
+    def save(self, path: Path, library: Sequence[MediaItem]) -> None:
+        """Write atomically: a JSON header followed by packed ``(channel, item, start)`` int64 triples."""
+        channel_ids = {id(run.channel): i for i, run in enumerate(self.runs)}
+        item_ids = {id(item): i for i, item in enumerate(library)}
+        header = {
+            "version": SNAPSHOT_VERSION,
+            "byteorder": sys.byteorder,
+            "fingerprint": self.fingerprint,
+            "anchor": self.anchor.isoformat(),
+            "count": len(self.entries),
+            "runs": [
+                {
+                    "items": [item_ids[id(item)] for item in run.channel.items],
+                    "pool": [item_ids[id(item)] for item in run.pool],
+                    "position": run.position,
+                    "pointer": (run.pointer - self.anchor) // _MICROSECOND,
+                }
+                for run in self.runs
+            ],
+        }
+        packed = array("q")
+        for entry in self.entries:
+            packed.extend(
+                (channel_ids[id(entry.channel)], item_ids[id(entry.item)], (entry.start - self.anchor) // _MICROSECOND)
+            )
+        raw_header = json.dumps(header, separators=(",", ":")).encode()
+        raw_header += b" " * (-(len(_MAGIC) + 8 + len(raw_header)) % 8)  # keep the entry table 8-byte aligned
+
+        temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with temporary.open("wb") as handle:
+            handle.write(_MAGIC)
+            handle.write(len(raw_header).to_bytes(8, "little"))
+            handle.write(raw_header)
+            handle.write(packed.tobytes())
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(
+        cls, path: Path, expected_fingerprint: str, channels: Sequence[Channel], library: Sequence[MediaItem]
+    ) -> Optional["ScheduleSnapshot"]:
+        """Memory-map a snapshot; returns ``None`` if it is missing, stale or unreadable."""
+        try:
+            with path.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if mapped[: len(_MAGIC)] != _MAGIC:
+                    return None
+                offset = len(_MAGIC) + 8
+                header_size = int.from_bytes(mapped[len(_MAGIC) : offset], "little")
+                header = json.loads(mapped[offset : offset + header_size])
+                if (
+                    header.get("version") != SNAPSHOT_VERSION
+                    or header.get("byteorder") != sys.byteorder
+                    or header.get("fingerprint") != expected_fingerprint
+                    or len(header.get("runs", [])) != len(channels)
+                ):
+                    return None
+                anchor = datetime.fromisoformat(header["anchor"])
+                channels = [
+                    channel.with_items(library[i] for i in raw["items"])
+                    for channel, raw in zip(channels, header["runs"])
+                ]
+                table = memoryview(mapped)[offset + header_size : offset + header_size + header["count"] * 24]
+                packed = table.cast("q")
+                try:
+                    entries = [
+                        ScheduleEntry(
+                            channel=channels[packed[i]],
+                            item=library[packed[i + 1]],
+                            start=anchor + packed[i + 2] * _MICROSECOND,
+                        )
+                        for i in range(0, len(packed), 3)
+                    ]
+                finally:
+                    packed.release()
+                    table.release()
+        except (OSError, ValueError, KeyError, IndexError):
+            return None
+
+        runs = []
+        for channel, raw in zip(channels, header["runs"]):
+            runs.append(
+                ChannelRun(
+                    channel=channel,
+                    pool=[library[i] for i in raw["pool"]],
+                    pointer=anchor + raw["pointer"] * _MICROSECOND,
+                    position=raw["position"],
+                )
+            )
+        return cls(fingerprint=expected_fingerprint, anchor=anchor, entries=entries, runs=runs)
+
+
+class ScheduleCache:
+    """Persists schedules between runs so each run does not reshuffle and rebuild.
+
+    A snapshot is reused while the channel config, library and seed match its
+    fingerprint. When it does not reach far enough, every channel continues
+    from where the stored run stopped, and entries that have already finished
+    are dropped before the snapshot is written back.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def schedule(self, scheduler: Scheduler, library: Sequence[MediaItem], start: datetime, duration: timedelta) -> Schedule:
+        library = list(library)
+        key = fingerprint(scheduler.channels, library, scheduler.seed)
+        horizon = start + duration
+        snapshot = ScheduleSnapshot.load(self.path, key, scheduler.channels, library)
+        if snapshot is not None and snapshot.anchor <= start:
+            if snapshot.horizon >= horizon:
+                return Schedule(snapshot.entries)
+            entries = [entry for entry in snapshot.entries if entry.end > start]
+            entries.extend(scheduler.extend_runs(snapshot.runs, horizon))
+        else:
+            runs, entries = scheduler.build_runs(library, start, horizon)
+            snapshot = ScheduleSnapshot(fingerprint=key, anchor=start, entries=[], runs=runs)
+        snapshot.entries = Scheduler.ordered(entries)
+        snapshot.save(self.path, library)
+        return Schedule(snapshot.entries)
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+try:  # POSIX only; without it the store still works for a single process
+    import fcntl
+except ModuleNotFoundError:  # pragma: no cover - exercised on Windows
+    fcntl = None
+
+STATE_VERSION = 2
+
+
+@dataclass
+class ChannelPosition:
+    """Where a channel was last seen: which airing, and how far into it."""
+
+    path: str
+    start: str
+    offset_seconds: float
+    duration_seconds: float
+    updated: float = 0.0
+
+    @property
+    def fraction(self) -> float:
+        if self.duration_seconds <= 0:
+            return 0.0
+        return max(0.0, min(1.0, self.offset_seconds / self.duration_seconds))
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ChannelPosition":
+        return cls(
+            path=data["path"],
+            start=data["start"],
+            offset_seconds=float(data["offset_seconds"]),
+            duration_seconds=float(data["duration_seconds"]),
+            updated=float(data.get("updated", 0.0)),
+        )
+
+
+class StateStore:
+    """Per-channel playback positions kept as a snapshot plus an append-only journal.
+
+    ``update`` only buffers; ``flush`` appends every pending position as one
+    JSON line each in a single ``write`` to ``<path>.journal``, so frequent
+    updates cost one small append rather than a rewrite. Once the journal
+    grows past ``compact_bytes`` it is folded into the snapshot, which is
+    replaced atomically. Loading replays the journal over the snapshot and
+    ignores a torn final line, so a crash at any point loses at most the
+    unflushed updates.
+
+    Several processes may share a store: appends take a shared ``flock`` on
+    ``<path>.lock`` and compaction an exclusive one, so no append can fall
+    between reading the journal and truncating it. Old state files holding
+    ``last_positions`` percentages are read as positions without an item.
+    """
+
+    def __init__(self, path: Path, compact_bytes: int = 64 * 1024, flush_interval: float = 5.0):
+        self.path = Path(path)
+        self.journal_path = self.path.with_name(self.path.name + ".journal")
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.compact_bytes = compact_bytes
+        self.flush_interval = flush_interval
+        self.positions: Dict[str, ChannelPosition] = {}
+        self._pending: Dict[str, ChannelPosition] = {}
+        self._last_flush = time.monotonic()
+        self.load()
+
+    def load(self) -> Dict[str, ChannelPosition]:
+        positions = self._read_snapshot()
+        self._replay_journal(positions)
+        positions.update(self._pending)
+        self.positions = positions
+        return positions
+
+    def get(self, channel: str) -> Optional[ChannelPosition]:
+        return self.positions.get(channel)
+
+    def update(self, channel: str, position: ChannelPosition) -> None:
+        """Record a position; it is written on the next :meth:`flush` (at most ``flush_interval`` later)."""
+        self.positions[channel] = position
+        self._pending[channel] = position
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        lines = "".join(
+            json.dumps({"channel": name, **position.to_dict()}, separators=(",", ":")) + "\n"
+            for name, position in self._pending.items()
+        ).encode()
+        with self._locked(exclusive=False):
+            descriptor = os.open(self.journal_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                end = os.fstat(descriptor).st_size
+                if end and os.pread(descriptor, 1, end - 1) != b"\n":
+                    lines = b"\n" + lines  # start clean after a line torn by a crash
+                os.write(descriptor, lines)
+                size = os.fstat(descriptor).st_size
+            finally:
+                os.close(descriptor)
+        self._pending.clear()
+        if size > self.compact_bytes:
+            self.compact()
+
+    def compact(self) -> None:
+        """Fold the journal into the snapshot and truncate it."""
+        with self._locked(exclusive=True):
+            positions = self._read_snapshot()
+            self._replay_journal(positions)
+            payload = {
+                "version": STATE_VERSION,
+                "positions": {name: position.to_dict() for name, position in sorted(positions.items())},
+            }
+            temporary = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with temporary.open("w") as handle:
+                json.dump(payload, handle, separators=(",", ":"))
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temporary, self.path)
+            if self.journal_path.exists():
+                os.truncate(self.journal_path, 0)
+        positions.update(self._pending)
+        self.positions = positions
+
+    def close(self) -> None:
+        self.flush()
+
+    @contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        descriptor = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(descriptor, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            os.close(descriptor)
+
+    def _read_snapshot(self) -> Dict[str, ChannelPosition]:
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return {}
+        positions = {}
+        if "last_positions" in data and "positions" not in data:
+            for name, percent in data["last_positions"].items():
+                try:
+                    fraction = float(str(percent).rstrip("%")) / 100
+                except ValueError:
+                    continue
+                positions[name] = ChannelPosition(path="", start="", offset_seconds=fraction, duration_seconds=1.0)
+            return positions
+        for name, raw in data.get("positions", {}).items():
+            try:
+                positions[name] = ChannelPosition.from_dict(raw)
+            except (KeyError, TypeError, ValueError):
+                continue
+        return positions
+
+    def _replay_journal(self, positions: Dict[str, ChannelPosition]) -> None:
+        try:
+            raw = self.journal_path.read_bytes()
+        except OSError:
+            return
+        for line in raw.splitlines():
+            try:
+                record = json.loads(line)
+                positions[record.pop("channel")] = ChannelPosition.from_dict(record)
+            except (json.JSONDecodeError, AttributeError, KeyError, TypeError, ValueError):
+                continue  # torn write from a crash mid-append
@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import heapq
+import random
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from itertools import accumulate, takewhile
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from .models import Channel, MediaItem, ScheduleEntry
+
+_MICROSECOND = timedelta(microseconds=1)
+
+# Where virtual schedules start unless the config sets ``virtual_anchor``. It
+# must not move between runs, or a fixed moment would show different items.
+VIRTUAL_ANCHOR = datetime(2000, 1, 1)
+
+
+class ChannelTimeline:
+    """One channel's entries with sorted start and end times.
+
+    Entries on a channel never overlap, so both ``starts`` and ``ends`` are
+    sorted and every query is a bisect plus a slice.
+    """
+
+    def __init__(self, entries: List[ScheduleEntry]):
+        self.entries = sorted(entries, key=lambda e: e.start)
+        self.starts = [entry.start for entry in self.entries]
+        self.ends = [entry.end for entry in self.entries]
+
+    @property
+    def channel(self) -> Optional[Channel]:
+        return self.entries[0].channel if self.entries else None
+
+    @property
+    def end(self) -> Optional[datetime]:
+        return self.ends[-1] if self.ends else None
+
+    def at(self, moment: datetime) -> Optional[ScheduleEntry]:
+        position = bisect_right(self.starts, moment) - 1
+        if position >= 0 and moment < self.ends[position]:
+            return self.entries[position]
+        return None
+
+    def overlapping(self, window_start: datetime, window_end: datetime) -> List[ScheduleEntry]:
+        first = bisect_right(self.ends, window_start)
+        last = bisect_left(self.starts, window_end, first)
+        return self.entries[first:last]
+
+    def starting_within(self, after: datetime, until: datetime) -> List[ScheduleEntry]:
+        """Entries with ``after < start <= until``."""
+        first = bisect_right(self.starts, after)
+        last = bisect_right(self.starts, until, first)
+        return self.entries[first:last]
+
+
+class CyclicTimeline:
+    """An endless timeline for a channel that repeats its pool.
+
+    The pool is played in cycles of identical total length. Cycle ``k``
+    starts at ``anchor + k * period`` and plays the pool in an order drawn
+    from ``(seed, k)`` (or in pool order when ``shuffle`` is off), so any
+    moment maps to a cycle by division and to an entry by bisecting that
+    cycle's prefix sums. Entries are created on demand; only the orderings of
+    the most recently used cycles are kept. Concurrent readers may race on
+    that cache, which at worst computes an ordering twice.
+    """
+
+    def __init__(
+        self,
+        channel: Channel,
+        pool: Sequence[MediaItem],
+        anchor: datetime,
+        seed: int,
+        shuffle: bool = True,
+        cached_cycles: int = 8,
+    ):
+        if not pool:
+            raise ValueError(f"Channel '{channel.name}' has no items to schedule.")
+        self.channel = channel
+        self.pool = list(pool)
+        self.anchor = anchor
+        self.seed = seed
+        self.shuffle = shuffle
+        self._durations = [item.duration_us for item in self.pool]
+        self.period = sum(self._durations)
+        if self.period <= 0:
+            raise ValueError(f"Channel '{channel.name}' has no playable runtime.")
+        self._cached_cycles = cached_cycles
+        self._cycles: "OrderedDict[int, Tuple[List[int], List[int]]]" = OrderedDict()
+
+    def _cycle(self, cycle: int) -> Tuple[List[int], List[int]]:
+        """Play order and start offsets (in microseconds) for one cycle."""
+        cached = self._cycles.get(cycle)
+        if cached is not None:
+            try:
+                self._cycles.move_to_end(cycle)
+            except KeyError:  # evicted by another thread meanwhile
+                pass
+            return cached
+        order = list(range(len(self.pool)))
+        if self.shuffle:
+            random.Random(f"{self.seed}:{cycle}").shuffle(order)
+        durations = self._durations
+        offsets = list(accumulate((durations[i] for i in order[:-1]), initial=0))
+        self._cycles[cycle] = (order, offsets)
+        while len(self._cycles) > self._cached_cycles:
+            try:
+                self._cycles.popitem(last=False)
+            except KeyError:
+                break
+        return order, offsets
+
+    def _entry(self, cycle: int, position: int) -> ScheduleEntry:
+        order, offsets = self._cycle(cycle)
+        start = self.anchor + (cycle * self.period + offsets[position]) * _MICROSECOND
+        return ScheduleEntry(channel=self.channel, item=self.pool[order[position]], start=start)
+
+    def _locate(self, moment: datetime) -> Tuple[int, int]:
+        cycle, offset = divmod((moment - self.anchor) // _MICROSECOND, self.period)
+        return cycle, bisect_right(self._cycle(cycle)[1], offset) - 1
+
+    def iter_from(self, moment: datetime) -> Iterator[ScheduleEntry]:
+        """Entries in order, starting with the one airing at ``moment``."""
+        cycle, position = self._locate(moment)
+        size = len(self.pool)
+        while True:
+            yield self._entry(cycle, position)
+            position += 1
+            if position == size:
+                cycle, position = cycle + 1, 0
+
+    @property
+    def end(self) -> Optional[datetime]:
+        return None
+
+    def at(self, moment: datetime) -> ScheduleEntry:
+        return self._entry(*self._locate(moment))
+
+    def overlapping(self, window_start: datetime, window_end: datetime) -> List[ScheduleEntry]:
+        return list(takewhile(lambda e: e.start < window_end, self.iter_from(window_start)))
+
+    def starting_within(self, after: datetime, until: datetime) -> List[ScheduleEntry]:
+        """Entries with ``after < start <= until``."""
+        entries = takewhile(lambda e: e.start <= until, self.iter_from(after))
+        return [entry for entry in entries if entry.start > after]
+
+
+class TimelineQueries:
+    """Schedule queries answered from per-channel timelines.
+
+    Subclasses provide ``timelines``, a mapping of channel name to an object
+    with ``channel``, ``end``, ``at``, ``overlapping`` and ``starting_within``.
+    ``generation`` changes whenever the answers may have; schedules that are
+    never modified leave it at 0.
+    """
+
+    timelines: Dict[str, ChannelTimeline | CyclicTimeline]
+    generation: int = 0
+
+    @property
+    def horizon(self) -> Optional[datetime]:
+        """When the first repeating channel runs out of entries; ``None`` if none ever does."""
+        ends = [
+            timeline.end
+            for timeline in self.timelines.values()
+            if timeline.end is not None and timeline.channel is not None and timeline.channel.allow_repeats
+        ]
+        return min(ends) if ends else None
+
+    def playing_at(self, moment: datetime) -> Dict[str, ScheduleEntry]:
+        playing = {}
+        for name, timeline in self.timelines.items():
+            entry = timeline.at(moment)
+            if entry is not None:
+                playing[name] = entry
+        return playing
+
+    def overlapping(self, window_start: datetime, window_end: datetime) -> Dict[str, List[ScheduleEntry]]:
+        by_channel = {}
+        for name, timeline in self.timelines.items():
+            entries = timeline.overlapping(window_start, window_end)
+            if entries:
+                by_channel[name] = entries
+        return by_channel
+
+    def starting_within(self, after: datetime, until: datetime) -> Dict[str, List[ScheduleEntry]]:
+        by_channel = {}
+        for name, timeline in self.timelines.items():
+            entries = timeline.starting_within(after, until)
+            if entries:
+                by_channel[name] = entries
+        return by_channel
+
+
+class Schedule(TimelineQueries, List[ScheduleEntry]):
+    """A flat schedule that also carries a per-channel time index.
+
+    It behaves like the ``List[ScheduleEntry]`` it replaces. The index is
+    built on first query and rebuilt if the number of entries changes, so
+    point lookups cost ``O(channels * log n)`` and window lookups scale with
+    the number of entries returned.
+    """
+
+    def __init__(self, entries: Iterable[ScheduleEntry] = ()):
+        super().__init__(entries)
+        self._timelines: Optional[Dict[str, ChannelTimeline]] = None
+        self._indexed_length = -1
+        self._generation = 0
+
+    @classmethod
+    def of(cls, schedule: Iterable[ScheduleEntry]) -> TimelineQueries:
+        """Wrap a plain entry list; schedules that can already be queried are returned as is."""
+        return schedule if isinstance(schedule, TimelineQueries) else cls(schedule)
+
+    @property
+    def timelines(self) -> Dict[str, ChannelTimeline]:
+        return self._ensure_index()
+
+    @property
+    def generation(self) -> int:
+        """Bumped each time the index is rebuilt or a channel is replaced."""
+        self._ensure_index()
+        return self._generation
+
+    def _ensure_index(self) -> Dict[str, ChannelTimeline]:
+        """Re-index if entries were added or removed since the last query."""
+        if self._timelines is None or self._indexed_length != len(self):
+            self._timelines = _index(self)
+            self._indexed_length = len(self)
+            self._generation += 1
+        return self._timelines
+
+    def replace_channel(self, name: str, entries: List[ScheduleEntry]) -> None:
+        """Make ``entries`` the whole of channel ``name``, re-indexing only that channel."""
+        timelines = self.timelines
+        others = [entry for entry in self if entry.channel.name != name]
+        entries = sorted(entries, key=lambda e: e.start)
+        self[:] = heapq.merge(others, entries, key=lambda e: (e.start, e.channel.name))
+        if entries:
+            timelines[name] = ChannelTimeline(entries)
+        else:
+            timelines.pop(name, None)
+        self._indexed_length = len(self)
+        self._generation += 1
+
+
+class FrozenSchedule(TimelineQueries, Tuple[ScheduleEntry, ...]):
+    """An immutable schedule, indexed when it is created.
+
+    Nothing about it changes afterwards, so any number of threads can query
+    it without locking; a changed schedule is a new object. It is a tuple of
+    entries in start and channel order, with the queries of :class:`Schedule`.
+    """
+
+    def __new__(cls, entries: Iterable[ScheduleEntry] = (), timelines: Optional[Mapping[str, ChannelTimeline]] = None):
+        self = super().__new__(cls, entries)
+        self.timelines = MappingProxyType(dict(timelines) if timelines is not None else _index(self))
+        return self
+
+    @classmethod
+    def of(cls, schedule: Iterable[ScheduleEntry]) -> TimelineQueries:
+        """Freeze ``schedule``. Virtual and columnar schedules, which have no
+        methods that change them, are returned as they are.
+        """
+        if isinstance(schedule, Schedule):
+            # replace_channel swaps whole timelines and never edits one, so
+            # the current ones can be shared.
+            return cls(schedule, timelines=schedule.timelines)
+        if isinstance(schedule, TimelineQueries):
+            return schedule
+        return cls(schedule)
+
+
+def _index(entries: Iterable[ScheduleEntry]) -> Dict[str, ChannelTimeline]:
+    by_channel: Dict[str, List[ScheduleEntry]] = {}
+    for entry in entries:
+        by_channel.setdefault(entry.channel.name, []).append(entry)
+    return {name: ChannelTimeline(channel_entries) for name, channel_entries in by_channel.items()}
+
+
+class VirtualSchedule(TimelineQueries):
+    """A schedule without a horizon.
+
+    Repeating channels are :class:`CyclicTimeline` s and non-repeating ones
+    are ordinary :class:`ChannelTimeline` s covering their single pass, so
+    queries work for any moment without materializing entries up front.
+    """
+
+    def __init__(self, timelines: Dict[str, ChannelTimeline]):
+        self.timelines = timelines
+
+    def entries(self, window_start: datetime, window_end: datetime) -> Iterator[ScheduleEntry]:
+        """Lazily yield entries overlapping ``[window_start, window_end)`` ordered by start and channel."""
+        streams = []
+        for name, timeline in sorted(self.timelines.items()):
+            if isinstance(timeline, CyclicTimeline):
+                stream = takewhile(lambda e: e.start < window_end, timeline.iter_from(window_start))
+            else:
+                stream = iter(timeline.overlapping(window_start, window_end))
+            streams.append(stream)
+        return heapq.merge(*streams, key=lambda e: (e.start, e.channel.name))
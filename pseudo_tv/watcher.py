@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .library import LibraryScanner
+from .models import MediaItem
+
+_META_SUFFIX = ".meta.json"
+
+# inotify(7) constants
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_ONLYDIR
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+@dataclass
+class LibraryDelta:
+    """Items that appeared in and paths that disappeared from the library.
+
+    A file that changed in place is listed in both: its old path under
+    ``removed`` and its rebuilt item under ``added``.
+    """
+
+    added: List[MediaItem] = field(default_factory=list)
+    removed: List[Path] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed)
+
+    def apply(self, library: List[MediaItem]) -> None:
+        """Update ``library`` in place."""
+        removed = {str(path) for path in self.removed}
+        if removed:
+            library[:] = [item for item in library if str(item.path) not in removed]
+        library.extend(self.added)
+
+
+class LibraryWatcher:
+    """Turns filesystem changes under the media roots into :class:`LibraryDelta` s.
+
+    Subclasses report which paths may have changed; only those are stat'ed
+    and parsed again, and compared against the items already known.
+    """
+
+    def __init__(self, scanner: LibraryScanner, library: Iterable[MediaItem]):
+        self.scanner = scanner
+        self.known: Dict[str, MediaItem] = {str(item.path): item for item in library}
+
+    def poll(self, timeout: float) -> LibraryDelta:
+        """Wait up to ``timeout`` seconds for changes and return them (possibly empty)."""
+        return self._resolve(self._changed_paths(timeout))
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "LibraryWatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _changed_paths(self, timeout: float) -> Set[str]:
+        raise NotImplementedError
+
+    def _known_under(self, directory: str) -> List[str]:
+        prefix = directory.rstrip(os.sep) + os.sep
+        return [path for path in self.known if path.startswith(prefix)]
+
+    def _resolve(self, changed: Set[str]) -> LibraryDelta:
+        delta = LibraryDelta()
+        for path in sorted(changed):
+            if path.endswith(_META_SUFFIX):
+                path = path[: -len(_META_SUFFIX)]
+            elif os.path.basename(path) in self.scanner.manifest_names:
+                path = os.path.dirname(path)
+            if os.path.isdir(path):
+                found = {str(item.path): item for item in self.scanner.scan_tree(Path(path))}
+                stale = [known for known in self._known_under(path) if known not in found]
+            else:
+                item = self.scanner.scan_file(Path(path))
+                found = {path: item} if item is not None else {}
+                stale = [] if item is not None else [path] if path in self.known else self._known_under(path)
+            for known_path in stale:
+                del self.known[known_path]
+                delta.removed.append(Path(known_path))
+            for found_path, item in found.items():
+                previous = self.known.get(found_path)
+                if previous == item:
+                    continue
+                if previous is not None:
+                    delta.removed.append(Path(found_path))
+                self.known[found_path] = item
+                delta.added.append(item)
+        return delta
+
+
+class PollingWatcher(LibraryWatcher):
+    """Portable watcher that re-lists only directories whose mtime changed.
+
+    Files rewritten in place do not change their directory's mtime, so such
+    edits are only picked up by :class:`InotifyWatcher`.
+    """
+
+    def __init__(self, scanner: LibraryScanner, library: Iterable[MediaItem], interval: float = 2.0):
+        super().__init__(scanner, library)
+        self.interval = interval
+        self._listings: Dict[str, Tuple[int, Set[str], Set[str]]] = {}
+        for root in scanner.media_roots:
+            self._register(str(root))
+
+    def _list(self, directory: str) -> Optional[Tuple[int, Set[str], Set[str]]]:
+        names: Set[str] = set()
+        subdirs: Set[str] = set()
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as listing:
+                for entry in listing:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not self.scanner.is_ignored_dir(entry.name):
+                            subdirs.add(entry.name)
+                    else:
+                        names.add(entry.name)
+        except OSError:
+            return None
+        return mtime_ns, names, subdirs
+
+    def _register(self, directory: str) -> None:
+        pending = [directory]
+        while pending:
+            current = pending.pop()
+            listing = self._list(current)
+            if listing is not None:
+                self._listings[current] = listing
+                pending.extend(os.path.join(current, name) for name in listing[2])
+
+    def _changed_paths(self, timeout: float) -> Set[str]:
+        deadline = time.monotonic() + timeout
+        while True:
+            changed = self._check()
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def _check(self) -> Set[str]:
+        changed: Set[str] = set()
+        for root in map(str, self.scanner.media_roots):
+            if root not in self._listings and os.path.isdir(root):
+                self._register(root)
+                changed.add(root)
+        for directory, (mtime_ns, names, subdirs) in list(self._listings.items()):
+            if directory not in self._listings:
+                continue  # dropped with a removed parent during this pass
+            try:
+                if os.stat(directory).st_mtime_ns == mtime_ns:
+                    continue
+            except OSError:
+                pass
+            listing = self._list(directory)
+            if listing is None:
+                for known in [d for d in self._listings if d == directory or d.startswith(directory + os.sep)]:
+                    del self._listings[known]
+                changed.add(directory)
+                continue
+            self._listings[directory] = listing
+            changed.update(os.path.join(directory, name) for name in names ^ listing[1])
+            for name in subdirs - listing[2]:
+                gone = os.path.join(directory, name)
+                for known in [d for d in self._listings if d == gone or d.startswith(gone + os.sep)]:
+                    del self._listings[known]
+                changed.add(gone)
+            for name in listing[2] - subdirs:
+                self._register(os.path.join(directory, name))
+                changed.add(os.path.join(directory, name))
+        return changed
+
+
+class InotifyWatcher(LibraryWatcher):
+    """Linux watcher driven by inotify events, so idle libraries cost nothing to watch."""
+
+    def __init__(self, scanner: LibraryScanner, library: Iterable[MediaItem], settle: float = 0.2):
+        super().__init__(scanner, library)
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.settle = settle
+        self._watches: Dict[int, str] = {}
+        try:
+            for root in scanner.media_roots:
+                self._watch_tree(str(root))
+        except OSError:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _watch_tree(self, directory: str) -> None:
+        pending = [directory]
+        while pending:
+            current = pending.pop()
+            wd = self._add_watch(self._fd, os.fsencode(current), _WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                if errno in (2, 20):  # ENOENT, ENOTDIR: gone before we got to it
+                    continue
+                raise OSError(errno, f"inotify_add_watch failed for {current}")
+            self._watches[wd] = current
+            try:
+                with os.scandir(current) as listing:
+                    for entry in listing:
+                        if entry.is_dir(follow_symlinks=False) and not self.scanner.is_ignored_dir(entry.name):
+                            pending.append(entry.path)
+            except OSError:
+                continue
+
+    def _changed_paths(self, timeout: float) -> Set[str]:
+        changed: Set[str] = set()
+        wait = timeout
+        # Keep reading until events stop arriving for ``settle`` seconds, so a
+        # burst (a copied season, an extracted archive) becomes one delta.
+        while select.select([self._fd], [], [], wait)[0]:
+            self._read_events(changed)
+            wait = self.settle
+        return changed
+
+    def _read_events(self, changed: Set[str]) -> None:
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                changed.update(map(str, self.scanner.media_roots))
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & _IN_IGNORED:
+                del self._watches[wd]
+                continue
+            if mask & _IN_DELETE_SELF:
+                changed.add(directory)
+                continue
+            path = os.path.join(directory, name)
+            if mask & _IN_ISDIR:
+                if self.scanner.is_ignored_dir(name):
+                    continue
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    self._watch_tree(path)
+                changed.add(path)
+            elif not mask & _IN_CREATE:  # files are picked up once written (IN_CLOSE_WRITE)
+                changed.add(path)
+
+
+def open_watcher(
+    scanner: LibraryScanner, library: Iterable[MediaItem], interval: float = 2.0, polling: bool = False
+) -> LibraryWatcher:
+    """An inotify watcher where available, otherwise a :class:`PollingWatcher`."""
+    library = list(library)
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(scanner, library)
+        except (OSError, AttributeError):
+            pass  # no inotify (or out of watches); poll instead
+    return PollingWatcher(scanner, library, interval=interval)
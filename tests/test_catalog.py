@@ -0,0 +1,66 @@
+"""Library catalog files: round trips, generations and re-attaching."""
+
+from __future__ import annotations
+
+import os
+from datetime import timedelta
+
+import pytest
+
+from pseudo_tv.catalog import CatalogGeneration, SharedCatalog, publish_catalog
+from pseudo_tv.models import MediaItem
+
+
+def library():
+    return [
+        MediaItem("/media/Show/Show.S01E01.mkv", "Pilot", timedelta(minutes=22, microseconds=7), "comedy", "Show", 1, 1),
+        MediaItem("/media/Films/Café Film (2020).mkv", "Café Film", timedelta(minutes=95), None, None, None, None, 2020),
+        MediaItem("/media/Show/Show.S01E02.mkv", "Second", timedelta(minutes=23), "comedy", "Show", 1, 2),
+    ]
+
+
+def test_round_trip_preserves_every_field(tmp_path):
+    path = tmp_path / "library.catalog"
+    assert publish_catalog(path, library()) == 1
+    catalog = CatalogGeneration(path)
+    assert len(catalog) == 3
+    assert catalog.materialize() == library()
+    assert [item.to_dict() for item in catalog] == [item.to_dict() for item in library()]
+    assert catalog[1].season is None and catalog[1].year == 2020
+    assert catalog[-1] is catalog[2]
+    assert list(catalog.column("duration_us")) == [item.duration_us for item in library()]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_republishing_keeps_attached_generations_readable(tmp_path):
+    path = tmp_path / "library.catalog"
+    shared = SharedCatalog(path)
+    first = shared.publish(library())
+    assert shared.current() is first  # unchanged file: no re-attach
+
+    second = shared.publish(library()[:1])
+    assert (first.generation, second.generation) == (1, 2)
+    assert shared.current() is second
+    assert len(first) == 3 and first[2].title == "Second"
+    assert len(second) == 1
+
+
+def test_current_notices_a_file_replaced_by_another_process(tmp_path):
+    path = tmp_path / "library.catalog"
+    shared = SharedCatalog(path)
+    shared.publish(library())
+    stale = shared.current()
+    publish_catalog(path, library()[::-1])
+    os.utime(path, ns=(stale.file_key[1] + 10**9, stale.file_key[1] + 10**9))
+    assert shared.current() is not stale
+    assert shared.current()[0].title == "Second"
+
+
+def test_missing_or_foreign_files_raise(tmp_path):
+    with pytest.raises(OSError):
+        SharedCatalog(tmp_path / "missing.catalog").current()
+    foreign = tmp_path / "foreign.catalog"
+    foreign.write_bytes(b"not a catalog at all")
+    with pytest.raises(ValueError):
+        CatalogGeneration(foreign)
+    assert publish_catalog(foreign, library()) == 1  # an unreadable file is replaced, starting over at 1
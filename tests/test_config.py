@@ -0,0 +1,30 @@
+"""Config loading through the parsed-data cache."""
+
+from __future__ import annotations
+
+import json
+import os
+
+from pseudo_tv.config import Config
+
+
+def write_config(path, channels) -> None:
+    path.write_text(json.dumps({"media_roots": ["media"], "channels": [{"name": name} for name in channels]}))
+
+
+def test_editing_the_config_invalidates_the_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    path = tmp_path / "config.json"
+    write_config(path, ["Comedy"])
+    assert [channel.name for channel in Config.load(path).channels] == ["Comedy"]
+    cache_path = Config.cache_path(path)
+    assert cache_path.is_relative_to(tmp_path / "cache")
+    assert json.loads(cache_path.read_text())["data"]["channels"] == [{"name": "Comedy"}]
+    assert [channel.name for channel in Config.load(path).channels] == ["Comedy"]
+
+    mtime = os.stat(path).st_mtime_ns
+    write_config(path, ["Drama", "News"])
+    os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+    assert [channel.name for channel in Config.load(path).channels] == ["Drama", "News"]
+    assert not list(tmp_path.glob(".*.cache"))
+
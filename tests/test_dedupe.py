@@ -0,0 +1,40 @@
+"""Duplicate detection on the bundled sample library and on real copies."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from pseudo_tv.config import Config
+from pseudo_tv.library import LibraryScanner
+from pseudo_tv.scheduler import Scheduler
+
+SAMPLE_MEDIA = Path(__file__).resolve().parents[1] / "sample_media"
+
+
+def test_empty_sample_files_are_not_duplicates():
+    plain = LibraryScanner([SAMPLE_MEDIA]).scan()
+    deduped = LibraryScanner([SAMPLE_MEDIA], dedupe="first").scan()
+    assert [item.path for item in deduped] == [item.path for item in plain]
+
+    channels = [
+        Config._parse_channel({"name": "Comedy", "include_genres": ["comedy"]}),
+        Config._parse_channel({"name": "Drama", "include_genres": ["drama"]}),
+    ]
+    schedule = Scheduler(channels, seed=1).build_schedule(deduped, datetime(2026, 1, 1), timedelta(hours=24))
+    assert {entry.channel.name for entry in schedule} == {"Comedy", "Drama"}
+
+
+def test_identical_copies_collapse(tmp_path):
+    content = bytes(range(256)) * 64
+    roots = [tmp_path / "a", tmp_path / "b"]
+    for root in roots:
+        root.mkdir()
+        (root / "Funny.Movie.2020[comedy].mp4").write_bytes(content)
+    (roots[1] / "Other.Movie.2021[comedy].mp4").write_bytes(content[::-1])
+
+    items = LibraryScanner(roots, dedupe="first").scan()
+    assert sorted(str(item.path.relative_to(tmp_path)) for item in items) == [
+        "a/Funny.Movie.2020[comedy].mp4",
+        "b/Other.Movie.2021[comedy].mp4",
+    ]
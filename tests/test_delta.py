@@ -0,0 +1,59 @@
+"""Scheduler.apply_delta patches only what has not aired, and watchers report changes."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from pseudo_tv.config import Config
+from pseudo_tv.library import LibraryScanner
+from pseudo_tv.models import MediaItem
+from pseudo_tv.scheduler import Scheduler
+from pseudo_tv.watcher import LibraryDelta, PollingWatcher
+
+START = datetime(2026, 3, 1, 20)
+
+
+def episode(number: int, genre: str = "comedy") -> MediaItem:
+    path = f"/media/Show.S01E{number:02d}[{genre}].mkv"
+    return MediaItem(path, f"Episode {number}", timedelta(minutes=25), genre, "Show", 1, number)
+
+
+def key(entries):
+    return [(entry.channel.name, entry.item.path_string, entry.start) for entry in entries]
+
+
+def test_apply_delta_leaves_aired_entries_untouched():
+    library = [episode(n) for n in range(1, 9)] + [episode(n, "drama") for n in range(20, 24)]
+    channels = [
+        Config._parse_channel({"name": "Comedy", "include_genres": ["comedy"], "allow_repeats": True}),
+        Config._parse_channel({"name": "Drama", "include_genres": ["drama"], "allow_repeats": True}),
+    ]
+    scheduler = Scheduler(channels, seed=3)
+    schedule = scheduler.build_schedule(library, START, timedelta(hours=12))
+    before = key(schedule)
+    now = START + timedelta(hours=3, minutes=10)
+    gone, fresh = library[2], episode(50)
+
+    patched, touched = scheduler.apply_delta(schedule, LibraryDelta(added=[fresh], removed=[gone.path]), now)
+
+    assert touched == ["Comedy"]
+    assert key(schedule) == before  # the published schedule is not modified
+    aired = [entry for entry in before if entry[0] == "Comedy" and entry[2] <= now]
+    assert [entry for entry in key(patched) if entry[0] == "Comedy" and entry[2] <= now] == aired
+    assert [entry for entry in key(patched) if entry[0] == "Drama"] == [entry for entry in before if entry[0] == "Drama"]
+    upcoming = [entry for entry in patched if entry.channel.name == "Comedy" and entry.start > now]
+    assert gone.path_string not in {entry.item.path_string for entry in upcoming}
+    assert fresh.path_string in {entry.item.path_string for entry in upcoming}
+    assert upcoming[-1].end >= START + timedelta(hours=12)
+    starts = [entry.start for entry in patched if entry.channel.name == "Comedy"]
+    assert starts == sorted(set(starts))
+
+
+def test_polling_watcher_skips_ignored_directories(tmp_path):
+    (tmp_path / "@eaDir").mkdir()
+    scanner = LibraryScanner([tmp_path], ignore_dirs=["@eaDir"])
+    with PollingWatcher(scanner, scanner.scan(), interval=0.01) as watcher:
+        (tmp_path / "Funny.Movie.2020[comedy].mp4").write_bytes(b"")
+        (tmp_path / "@eaDir" / "Thumb.Movie.2020[comedy].mp4").write_bytes(b"")
+        delta = watcher.poll(0.05)
+    assert [item.path.name for item in delta.added] == ["Funny.Movie.2020[comedy].mp4"]
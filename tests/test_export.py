@@ -0,0 +1,29 @@
+"""M3U export: one entry per channel and file, with safe attributes."""
+
+from __future__ import annotations
+
+import io
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from pseudo_tv.config import Config
+from pseudo_tv.export import stream_entries, write_m3u
+from pseudo_tv.library import LibraryScanner
+from pseudo_tv.scheduler import Scheduler
+
+SAMPLE_MEDIA = Path(__file__).resolve().parents[1] / "sample_media"
+
+
+def test_m3u_lists_each_file_once_per_channel():
+    channel = Config._parse_channel({"name": 'The "Best" Comedy', "include_genres": ["comedy"], "allow_repeats": True})
+    scheduler = Scheduler([channel], seed=1)
+    library = LibraryScanner([SAMPLE_MEDIA]).scan()
+    start = datetime(2026, 3, 1)
+    handle = io.StringIO()
+    written = write_m3u(handle, stream_entries(scheduler, library, start, start + timedelta(days=7)))
+
+    lines = handle.getvalue().splitlines()
+    paths = lines[2::2]
+    assert written == len(paths) == len(set(paths)) == 3
+    assert all(line.count('"') == 6 for line in lines[1::2])
+    assert "tvg-name=\"The 'Best' Comedy\"" in lines[1]
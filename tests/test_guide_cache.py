@@ -0,0 +1,63 @@
+"""GuideCache answers match the schedule and never outlive it."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from pseudo_tv.config import Config
+from pseudo_tv.guide import GuideCache, render_guide
+from pseudo_tv.models import MediaItem, ScheduleEntry
+from pseudo_tv.player import LivePlayer, Player
+from pseudo_tv.scheduler import Scheduler
+
+START = datetime(2026, 3, 1, 20)
+
+
+def build(titles, seed: int = 2):
+    library = [MediaItem(f"/media/{title}[comedy].mkv", title, timedelta(minutes=25), "comedy") for title in titles]
+    channel = Config._parse_channel({"name": "Comedy", "include_genres": ["comedy"], "allow_repeats": True})
+    return Scheduler([channel], seed=seed).build_schedule(library, START, timedelta(hours=12))
+
+
+def test_cached_windows_match_the_schedule():
+    schedule = build(["A", "B", "C"])
+    cache = GuideCache(schedule, max_entries=4)
+    start, end = START + timedelta(minutes=41), START + timedelta(hours=2, minutes=7)
+    assert cache.guide(start, end) == schedule.overlapping(start, end)
+    assert cache.guide(start + timedelta(minutes=3), end) == schedule.overlapping(start + timedelta(minutes=3), end)
+    assert (cache.stats.misses, cache.stats.hits) == (1, 1)  # same half-hour slots
+    assert cache.guide_text(start, end) == render_guide(schedule.overlapping(start, end))
+    assert cache.upcoming(start, end) == schedule.starting_within(start, end)
+
+    for hour in range(6):
+        cache.guide(START + timedelta(hours=hour), START + timedelta(hours=hour + 1))
+    assert len(cache._entries) == 4 and cache.stats.evictions > 0
+
+
+def test_replacing_a_channel_invalidates_the_cache():
+    schedule = build(["A", "B", "C"])
+    cache = GuideCache(schedule)
+    window = (START, START + timedelta(hours=1))
+    before = cache.guide(*window)
+    replacement = [
+        ScheduleEntry(channel=entry.channel, item=before["Comedy"][0].item, start=entry.start)
+        for entry in schedule.timelines["Comedy"].entries
+    ]
+    schedule.replace_channel("Comedy", replacement)
+    after = cache.guide(*window)
+    assert cache.stats.invalidations == 1
+    assert after == schedule.overlapping(*window) != before
+
+
+def test_publish_gives_readers_a_fresh_cache(tmp_path):
+    live = LivePlayer(Player(build(["A", "B", "C"]), state_path=tmp_path / "state.json"))
+    old = live.current
+    window = (START, START + timedelta(hours=2))
+    old_guide = old.guide(*window)
+
+    live.publish(build(["X", "Y"]))
+    new = live.current
+    assert new.guide_cache is not old.guide_cache
+    titles = {entry.item.title for entries in new.guide(*window).values() for entry in entries}
+    assert titles == {"X", "Y"}
+    assert old.guide(*window) == old_guide  # readers holding the old player are unaffected
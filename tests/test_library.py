@@ -0,0 +1,51 @@
+"""Incremental scans through a LibraryIndex pick up metadata edited in place."""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import timedelta
+
+from pseudo_tv.index import LibraryIndex
+from pseudo_tv.library import LibraryScanner
+
+
+def rewrite(path, data) -> None:
+    """Edit ``path`` in place with a new mtime, leaving its directory's mtime as it was."""
+    directory = os.stat(path.parent)
+    before = os.stat(path).st_mtime_ns
+    path.write_text(json.dumps(data))
+    os.utime(path, ns=(before + 10**9, before + 10**9))
+    os.utime(path.parent, ns=(directory.st_atime_ns, directory.st_mtime_ns))
+
+
+def durations(scanner):
+    return {item.path.name: item.duration for item in scanner.scan()}
+
+
+def test_companion_edited_in_place(tmp_path):
+    media = tmp_path / "media"
+    media.mkdir()
+    (media / "Funny.Movie.2020[comedy].mp4").write_bytes(b"")
+    companion = media / "Funny.Movie.2020[comedy].mp4.meta.json"
+    companion.write_text(json.dumps({"duration_minutes": 5}))
+    scanner = LibraryScanner([media], index=LibraryIndex(tmp_path / "index.db"))
+    assert durations(scanner) == {"Funny.Movie.2020[comedy].mp4": timedelta(minutes=5)}
+
+    rewrite(companion, {"duration_minutes": 7})
+    assert durations(scanner) == {"Funny.Movie.2020[comedy].mp4": timedelta(minutes=7)}
+    assert durations(LibraryScanner([media])) == durations(scanner)
+
+
+def test_manifest_edited_in_place(tmp_path):
+    media = tmp_path / "media"
+    media.mkdir()
+    (media / "Funny.Movie.2020[comedy].mp4").write_bytes(b"")
+    manifest = media / "pseudo_tv.manifest.json"
+    manifest.write_text(json.dumps({"Funny.Movie.2020[comedy].mp4": {"duration_minutes": 10}}))
+    scanner = LibraryScanner([media], index=LibraryIndex(tmp_path / "index.db"))
+    assert durations(scanner) == {"Funny.Movie.2020[comedy].mp4": timedelta(minutes=10)}
+
+    rewrite(manifest, {"Funny.Movie.2020[comedy].mp4": {"duration_minutes": 45}})
+    assert durations(scanner) == {"Funny.Movie.2020[comedy].mp4": timedelta(minutes=45)}
+    assert durations(LibraryScanner([media])) == durations(scanner)
@@ -0,0 +1,52 @@
+"""ChannelRouter sends each item only to channels that can match it."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from pseudo_tv.config import Config
+from pseudo_tv.instrumentation import metrics
+from pseudo_tv.models import MediaItem
+from pseudo_tv.pipeline import ChannelRouter
+
+GENRES = ["comedy", "drama", "news", "Sci-Fi"]
+
+
+def make_library(size: int):
+    items = []
+    for i in range(size):
+        show = f"Show {i % 7}"
+        genre = GENRES[i % len(GENRES)] if i % 11 else None
+        path = f"/media/{'tv' if i % 3 else 'films'}/{show}/S01E{i % 20:02d}.mkv"
+        items.append(MediaItem(path, f"Episode {i}", timedelta(minutes=20 + i % 50), genre, show, 1, i % 20 + 1))
+    return items
+
+
+def make_channels():
+    rules = [
+        {"include_genres": ["Comedy", "comedy", "drama"]},
+        {"include_genres": ["sci-fi"], "minimum_runtime_minutes": 40},
+        {"include_genres": ["news"], "include_shows": ["show 1"]},
+        {"include_shows": ["Show 2", "show 3"], "exclude_genres": ["drama"]},
+        {"include_paths": ["/media/tv", "/media/tv/Show 4"]},
+        {"include_paths": ["/media/films"], "maximum_runtime_minutes": 30},
+        {"exclude_genres": ["comedy"]},
+        {"maximum_runtime_minutes": 25},
+    ]
+    return [Config._parse_channel({"name": f"Channel {n}", **rule}) for n, rule in enumerate(rules)]
+
+
+def test_router_matches_every_rule_but_evaluates_fewer():
+    library = make_library(500)
+    channels = make_channels()
+    router = ChannelRouter(channels, ["/media"])
+    before = metrics.snapshot()["counters"].get("rules.evaluations", 0)
+    for item in library:
+        router.add(item)
+    evaluations = metrics.snapshot()["counters"]["rules.evaluations"] - before
+
+    for channel in channels:
+        expected = [item for item in library if channel.rules.matches(item)]
+        assert router.pools[channel.name].items() == expected, channel.name
+    assert evaluations < len(channels) * len(library)
+    assert evaluations == sum(len(router.candidates(item)) for item in library)
@@ -0,0 +1,86 @@
+"""Container header parsers, on minimal hand-built files."""
+
+from __future__ import annotations
+
+import struct
+from datetime import timedelta
+
+import pytest
+
+from pseudo_tv.library import LibraryScanner
+from pseudo_tv.probe import probe_duration
+
+
+def box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def mp4(timescale: int, duration: int, version: int = 0) -> bytes:
+    if version == 1:
+        mvhd = bytes([1, 0, 0, 0]) + bytes(16) + struct.pack(">IQ", timescale, duration)
+    else:
+        mvhd = bytes(4) + bytes(8) + struct.pack(">II", timescale, duration)
+    return box(b"ftyp", b"isom" + bytes(4)) + box(b"moov", box(b"mvhd", mvhd + bytes(80)))
+
+
+def ebml(element_id: int, payload: bytes) -> bytes:
+    assert len(payload) < 127
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, "big") + bytes([0x80 | len(payload)]) + payload
+
+
+def mkv(milliseconds: float, unknown_segment_size: bool = False) -> bytes:
+    info = ebml(0x1549A966, ebml(0x2AD7B1, (1_000_000).to_bytes(3, "big")) + ebml(0x4489, struct.pack(">d", milliseconds)))
+    body = info + ebml(0x1F43B675, bytes(8))
+    segment_size = b"\x01\xff\xff\xff\xff\xff\xff\xff" if unknown_segment_size else bytes([0x80 | len(body)])
+    return ebml(0x1A45DFA3, b"") + (0x18538067).to_bytes(4, "big") + segment_size + body
+
+
+def avi(us_per_frame: int, frames: int) -> bytes:
+    avih = b"avih" + struct.pack("<I", 56) + struct.pack("<5I", us_per_frame, 0, 0, 0, frames) + bytes(36)
+    hdrl = b"LIST" + struct.pack("<I", 4 + len(avih)) + b"hdrl" + avih
+    return b"RIFF" + struct.pack("<I", 4 + len(hdrl)) + b"AVI " + hdrl
+
+
+MP3_FRAME = b"\xff\xfb\x90\x00"  # MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo
+
+
+@pytest.mark.parametrize(
+    "name, content, expected",
+    [
+        ("a.mp4", mp4(1000, 1_500_000), 1500.0),
+        ("a.mov", mp4(90000, 90000 * 600, version=1), 600.0),
+        ("a.mkv", mkv(2_700_000.0), 2700.0),
+        ("a.webm", mkv(61_500.0, unknown_segment_size=True), 61.5),
+        ("a.avi", avi(40_000, 25 * 1320), 1320.0),
+        ("a.mp3", MP3_FRAME + bytes(15_996), 1.0),
+        ("b.mp3", MP3_FRAME + bytes(32) + b"Xing" + struct.pack(">II", 1, 441) + bytes(200), 441 * 1152 / 44100),
+        ("c.mp3", b"ID3\x03\x00\x00\x00\x00\x00\x0a" + bytes(10) + MP3_FRAME + bytes(31_996), 2.0),
+    ],
+)
+def test_durations(tmp_path, name, content, expected):
+    path = tmp_path / name
+    path.write_bytes(content)
+    assert probe_duration(path) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    "name, content",
+    [
+        ("empty.mkv", b""),
+        ("truncated.mp4", mp4(1000, 5000)[:30]),
+        ("zero.mp4", mp4(0, 5000)),
+        ("noise.mp3", bytes(range(0, 0xF0)) * 10),
+        ("wrong.avi", b"RIFF\x04\x00\x00\x00WAVE"),
+        ("notes.txt", b"hello"),
+    ],
+)
+def test_unreadable_files_give_none(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    assert probe_duration(path) is None
+
+
+def test_scanner_uses_probed_durations(tmp_path):
+    (tmp_path / "Funny.Movie.2020[comedy].mkv").write_bytes(mkv(5_400_000.0))
+    items = LibraryScanner([tmp_path], probe_durations=True, probe_workers=1).scan()
+    assert [item.duration for item in items] == [timedelta(minutes=90)]
@@ -0,0 +1,63 @@
+"""Scheduler builds: virtual schedules and process-pool builds."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from pseudo_tv.config import Config
+from pseudo_tv.library import LibraryScanner
+from pseudo_tv.models import MediaItem
+from pseudo_tv.scheduler import Scheduler
+from pseudo_tv.timeline import VIRTUAL_ANCHOR
+
+SAMPLE_MEDIA = Path(__file__).resolve().parents[1] / "sample_media"
+GENRES = ["comedy", "drama", "news"]
+
+
+def sample_channels():
+    return [
+        Config._parse_channel({"name": "Comedy", "include_genres": ["comedy"], "allow_repeats": True}),
+        Config._parse_channel({"name": "Drama", "include_genres": ["drama"]}),
+    ]
+
+
+def test_non_repeating_channel_airs_in_virtual_mode():
+    library = LibraryScanner([SAMPLE_MEDIA]).scan()
+    scheduler = Scheduler(sample_channels(), seed=1)
+    start = datetime(2026, 3, 1, 20)
+    virtual = scheduler.build_virtual_schedule(library, anchor=VIRTUAL_ANCHOR, start=start)
+    plain = scheduler.build_schedule(library, start, timedelta(hours=24))
+
+    playing = virtual.playing_at(start + timedelta(minutes=5))
+    assert set(playing) == {"Comedy", "Drama"}
+    assert playing["Drama"] == plain.playing_at(start + timedelta(minutes=5))["Drama"]
+
+
+def test_repeating_channels_do_not_depend_on_build_time():
+    library = LibraryScanner([SAMPLE_MEDIA]).scan()
+    scheduler = Scheduler(sample_channels(), seed=1)
+    moment = datetime(2026, 3, 1, 22, 17)
+    first = scheduler.build_virtual_schedule(library, anchor=VIRTUAL_ANCHOR, start=datetime(2026, 3, 1, 20))
+    later = scheduler.build_virtual_schedule(library, anchor=VIRTUAL_ANCHOR, start=datetime(2026, 3, 1, 22))
+    assert first.playing_at(moment)["Comedy"] == later.playing_at(moment)["Comedy"]
+
+
+def test_process_pool_build_matches_serial():
+    library = [
+        MediaItem(f"/media/E{i:03d}.mkv", f"Episode {i}", timedelta(minutes=20 + i % 30), GENRES[i % 3], f"Show {i % 9}")
+        for i in range(300)
+    ]
+    channels = [
+        Config._parse_channel({"name": "Comedy", "include_genres": ["comedy"], "allow_repeats": True}),
+        Config._parse_channel({"name": "Sampled", "include_genres": ["drama"], "allow_repeats": True, "max_items": 7}),
+        Config._parse_channel({"name": "In order", "include_shows": ["show 4"], "shuffle": False}),
+        Config._parse_channel({"name": "Long", "minimum_runtime_minutes": 45}),
+    ]
+    start = datetime(2026, 3, 1, 20)
+
+    def build(workers):
+        schedule = Scheduler(channels, seed=5, workers=workers).build_schedule(library, start, timedelta(days=2))
+        return [(e.channel.name, e.channel.items, e.item, e.start) for e in schedule]
+
+    assert build(2) == build(1)
@@ -0,0 +1,125 @@
+"""Round trips against a real GuideServer on a free local port."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from pseudo_tv.config import Config
+from pseudo_tv.library import LibraryScanner
+from pseudo_tv.player import Player
+from pseudo_tv.scheduler import Scheduler
+from pseudo_tv.server import GuideServer
+
+SAMPLE_MEDIA = Path(__file__).resolve().parents[1] / "sample_media"
+
+
+def make_server(tmp_path: Path, **options) -> GuideServer:
+    channels = [
+        Config._parse_channel({"name": "Comedy", "include_genres": ["comedy"], "allow_repeats": True}),
+        Config._parse_channel({"name": "Drama", "include_genres": ["drama"], "allow_repeats": True}),
+    ]
+    scheduler = Scheduler(channels, seed=1)
+    library = LibraryScanner([SAMPLE_MEDIA]).scan()
+    start = datetime.now().replace(minute=0, second=0, microsecond=0)
+    schedule = scheduler.build_schedule(library, start, timedelta(hours=24))
+    return GuideServer(Player(schedule, state_path=tmp_path / "state.json"), channels, **options)
+
+
+async def fetch(host: str, port: int, target: str, method: str = "GET"):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"{method} {target} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        raw = await reader.read()
+    finally:
+        writer.close()
+    head, _, body = raw.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+    return status, json.loads(body)
+
+
+def round_trips(server: GuideServer, targets):
+    async def run():
+        host, port = await server.start("127.0.0.1", 0)
+        try:
+            return [await fetch(host, port, *target) for target in targets]
+        finally:
+            await server.close()
+
+    return asyncio.run(run())
+
+
+def test_every_endpoint_answers(tmp_path):
+    server = make_server(tmp_path)
+    at = datetime.now().replace(microsecond=0).isoformat()
+    responses = round_trips(
+        server,
+        [
+            (f"/now?at={at}",),
+            (f"/upcoming?at={at}&hours=2",),
+            (f"/guide?start={at}&hours=4",),
+            ("/channels",),
+            ("/health",),
+            ("/metrics",),
+        ],
+    )
+    assert [status for status, _ in responses] == [200] * 6
+    now, upcoming, guide, channels, health, _ = (body for _, body in responses)
+    assert set(now["channels"]) == {"Comedy", "Drama"}
+    assert upcoming["channels"]["Comedy"]
+    assert guide["channels"]["Comedy"][0]["start"] <= at
+    assert [channel["name"] for channel in channels["channels"]] == ["Comedy", "Drama"]
+    assert health["status"] == "ok" and health["horizon"]
+
+
+def test_bad_requests_get_a_response(tmp_path):
+    server = make_server(tmp_path)
+    responses = round_trips(
+        server,
+        [
+            ("/upcoming?hours=inf",),
+            ("/upcoming?hours=1e9",),
+            ("/guide?hours=nan",),
+            ("/guide?start=9999-12-31T20:00:00&hours=8",),
+            ("/guide?start=9999-12-31T23:59:00&hours=0.001",),
+            ("/now?at=yesterday",),
+            ("/nowhere",),
+            ("/now", "POST"),
+        ],
+    )
+    assert [status for status, _ in responses] == [400, 400, 400, 400, 400, 400, 404, 405]
+    assert all("error" in body for _, body in responses)
+
+
+def test_failed_rebuild_is_retried(tmp_path, caplog):
+    calls = []
+
+    def rebuild():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise OSError("catalog unreadable")
+        return rebuilt.player.schedule
+
+    rebuilt = make_server(tmp_path)
+    server = make_server(
+        tmp_path, rebuild=rebuild, rebuild_margin=timedelta(days=2), rebuild_retry=timedelta(milliseconds=10)
+    )
+
+    async def run():
+        await server.start("127.0.0.1", 0)
+        try:
+            for _ in range(200):
+                if server.rebuilds:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await server.close()
+
+    asyncio.run(run())
+    assert server.rebuild_failures == 1
+    assert server.rebuilds == 1
+    assert server.live.generation == 1
+    assert "Schedule rebuild failed" in caplog.text
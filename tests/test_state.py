@@ -0,0 +1,73 @@
+"""StateStore journal replay and compaction, and the Config wrappers over it."""
+
+from __future__ import annotations
+
+import json
+
+from pseudo_tv.config import Config
+from pseudo_tv.state import ChannelPosition, StateStore
+
+
+def position(offset: float) -> ChannelPosition:
+    return ChannelPosition(path="/media/a.mkv", start="2026-03-01T20:00:00", offset_seconds=offset, duration_seconds=1800)
+
+
+def test_flushed_positions_survive_a_reload(tmp_path):
+    store = StateStore(tmp_path / "state.json")
+    store.update("Comedy", position(60))
+    store.update("Drama", position(90))
+    store.flush()
+    store.update("Comedy", position(120))
+    store.flush()
+
+    reloaded = StateStore(tmp_path / "state.json")
+    assert reloaded.get("Comedy") == position(120)
+    assert reloaded.get("Drama") == position(90)
+    assert not (tmp_path / "state.json").exists()  # still only a journal
+
+
+def test_torn_final_line_is_ignored(tmp_path):
+    path = tmp_path / "state.json"
+    store = StateStore(path)
+    store.update("Comedy", position(60))
+    store.flush()
+    with open(store.journal_path, "ab") as handle:
+        handle.write(b'{"channel":"Comedy","path":"/media/a.mkv","sta')  # crash mid-append
+
+    reloaded = StateStore(path)
+    assert reloaded.get("Comedy") == position(60)
+    reloaded.update("Drama", position(30))
+    reloaded.flush()
+    assert StateStore(path).get("Drama") == position(30)
+
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path):
+    path = tmp_path / "state.json"
+    store = StateStore(path, compact_bytes=512)
+    for offset in range(20):
+        store.update("Comedy", position(offset))
+        store.update("Drama", position(offset * 2))
+        store.flush()
+
+    snapshot = json.loads(path.read_text())
+    assert set(snapshot["positions"]) == {"Comedy", "Drama"}
+    assert store.journal_path.stat().st_size <= 512
+    reloaded = StateStore(path)
+    assert reloaded.get("Comedy") == position(19)
+    assert reloaded.get("Drama") == position(38)
+
+
+def test_legacy_percentages_are_read(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text(json.dumps({"last_positions": {"Comedy": "25%", "Broken": "n/a"}}))
+    store = StateStore(path)
+    assert store.get("Comedy").fraction == 0.25
+    assert store.get("Broken") is None
+
+
+def test_config_wrappers_round_trip(tmp_path):
+    config = Config(media_roots=[], state_path=tmp_path / "state.json")
+    assert config.load_state() == {"positions": {}}
+    config.save_state({"positions": {"Comedy": position(60).to_dict()}})
+    assert config.load_state() == {"positions": {"Comedy": position(60).to_dict()}}
+    assert config.state_store().get("Comedy") == position(60)